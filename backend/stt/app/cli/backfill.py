@@ -0,0 +1,217 @@
+"""
+Re-transcribe existing transcription_result records, e.g. after changing WHISPER_MODEL or VAD_THRESHOLD.
+
+Pipeline per record:
+1. Load audio from the artifact store - the normalized PCM if present, otherwise the original upload (re-decoded)
+2. VAD with the requested threshold
+3. Transcription with the requested model (HuggingFace Inference API), skipped for audio without speech
+
+Implementation Details:
+1) Decoding and VAD run in a process pool, every worker loads the Silero model once
+2) Upstream calls are bounded by a semaphore (--concurrency) on top of the shared UpstreamGuard
+3) Results are written per batch in a single transaction, either replacing the transcript or as a new
+   row in transcription_version (--as-version)
+4) Progress is checkpointed to a JSON file after every committed batch. Re-running the same command resumes
+   after the last committed record id, a different model, VAD threshold or --as-version starts from the beginning
+5) Throughput and ETA are logged after every batch
+
+Records without stored audio (artifact store disabled at the time, or evicted) are skipped and reported.
+
+Usage (from the app directory):
+    python -m cli.backfill --model openai/whisper-base --since 2024-11-01 --as-version
+    python -m cli.backfill --vad-threshold 0.5 --audio-format mp3 --workers 4 --concurrency 2
+"""
+
+import os
+import json
+import time
+import asyncio
+import argparse
+import multiprocessing
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from services.artifact_store_service import get_artifact_store
+from services.audio_processor_service import AudioService
+from services.pysqlite_service import get_sqlite_service
+from services.transcription_service import TranscriptionService
+from services.vad_service import get_vad_service
+from utils.logger import logger
+
+
+def _init_worker():
+    """Load the VAD model once per worker process"""
+    get_vad_service()
+
+
+def prepare_audio(record: dict, vad_threshold: float) -> dict:
+    """
+    Runs in a worker process: load the stored audio and apply VAD.
+    Returns {"id", "status", "audio"} where status is "ok", "missing_audio" or "error".
+    """
+    
+    try:
+        artifact_store = get_artifact_store()
+        wav = artifact_store.get_pcm_wav(record["pcm_sha256"])
+        
+        if wav is None:
+            original = artifact_store.get_original(record["audio_sha256"])
+            if original is None:
+                return {"id": record["id"], "status": "missing_audio"}
+            wav = asyncio.run(AudioService().preprocess_audio(audio_format=record["audio_format"], audio_content=BytesIO(original)))
+        
+        vad_service = get_vad_service()
+        speech = asyncio.run(vad_service.detect_speech(wav, threshold=vad_threshold))
+        if speech["speech_duration"] < float(os.getenv("VAD_MIN_SPEECH_SECONDS", "0.25")):
+            return {"id": record["id"], "status": "ok", "audio": None}
+        return {"id": record["id"], "status": "ok", "audio": vad_service.extract_speech(speech).getvalue()}
+    
+    except Exception as e:
+        return {"id": record["id"], "status": "error", "error": str(e)}
+
+
+def checkpoint_key(filters: dict, model: str, vad_threshold: float, as_version: bool) -> dict:
+    """The record filters and the settings a checkpoint was written for, a checkpoint is only resumed when all match"""
+    return dict(filters, model=model, vad_threshold=vad_threshold, as_version=as_version)
+
+
+def load_checkpoint(path: str, filters: dict) -> dict:
+    """Load a checkpoint, starting fresh if there is none or it was written for different filters or settings"""
+    
+    if os.path.exists(path):
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("filters") == filters:
+            logger.info(f"Resuming backfill after record id {checkpoint['last_id']} ({checkpoint['processed']} already processed)")
+            return checkpoint
+        logger.warning(f"Checkpoint {path} was written for different filters or settings (model, VAD threshold, --as-version), starting from the beginning")
+    
+    return {"filters": filters, "last_id": 0, "processed": 0, "skipped": 0, "failed_ids": []}
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    """Write the checkpoint atomically so an interruption never leaves a half-written file"""
+    
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+async def transcribe_record(transcription_service: TranscriptionService, semaphore: asyncio.Semaphore, prepared: dict):
+    if prepared["audio"] is None:
+        # No speech detected, never sent upstream
+        return prepared["id"], ""
+    async with semaphore:
+        result = await transcription_service.transcribe(BytesIO(prepared["audio"]))
+    return prepared["id"], result["text"]
+
+
+async def run_backfill(args):
+    filters = {
+        "since": args.since,
+        "until": args.until,
+        "audio_format": args.audio_format,
+        "ids": args.ids
+    }
+    model = args.model or os.getenv("WHISPER_MODEL", "openai/whisper-tiny")
+    vad_threshold = args.vad_threshold if args.vad_threshold is not None else float(os.getenv("VAD_THRESHOLD", 0.3))
+    
+    sqlite_service = get_sqlite_service("transcriptions.db")
+    transcription_service = TranscriptionService(api_key=os.getenv("HF_TOKEN", ""), model=model)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    
+    ## A finished run for another model or VAD threshold must not make this one skip every record
+    checkpoint = load_checkpoint(args.checkpoint, checkpoint_key(filters, model, vad_threshold, args.as_version))
+    remaining = await sqlite_service.count_backfill_candidates(after_id=checkpoint["last_id"], **filters)
+    logger.info(f"Backfill: {remaining} record(s) to process with model={model}, vad_threshold={vad_threshold}")
+    
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+    done_this_run = 0
+    
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        while True:
+            records = await sqlite_service.get_backfill_candidates(
+                after_id=checkpoint["last_id"],
+                limit=args.batch_size,
+                **filters
+            )
+            if not records:
+                break
+            
+            ## Step 1: Decode + VAD in the process pool
+            prepared = await asyncio.gather(*[
+                loop.run_in_executor(pool, prepare_audio, record, vad_threshold) for record in records
+            ])
+            
+            ready = [item for item in prepared if item["status"] == "ok"]
+            for item in prepared:
+                if item["status"] == "missing_audio":
+                    checkpoint["skipped"] += 1
+                elif item["status"] == "error":
+                    logger.error(f"Failed to prepare record {item['id']}: {item['error']}")
+                    checkpoint["failed_ids"].append(item["id"])
+            
+            ## Step 2: Transcribe with bounded upstream concurrency
+            outcomes = await asyncio.gather(
+                *[transcribe_record(transcription_service, semaphore, item) for item in ready],
+                return_exceptions=True
+            )
+            results = []
+            for item, outcome in zip(ready, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error(f"Failed to transcribe record {item['id']}: {str(outcome)}")
+                    checkpoint["failed_ids"].append(item["id"])
+                else:
+                    results.append(outcome)
+            
+            ## Step 3: Commit the batch, then checkpoint
+            if not args.dry_run:
+                await sqlite_service.apply_backfill_batch(results, model=model, vad_threshold=vad_threshold, as_version=args.as_version)
+            
+            checkpoint["last_id"] = records[-1]["id"]
+            checkpoint["processed"] += len(results)
+            save_checkpoint(args.checkpoint, checkpoint)
+            
+            ## Report throughput and ETA
+            done_this_run += len(records)
+            elapsed = time.monotonic() - started
+            rate = done_this_run / elapsed if elapsed > 0 else 0.0
+            left = max(remaining - done_this_run, 0)
+            eta = left / rate if rate > 0 else float("inf")
+            logger.info(
+                f"Backfill progress: {done_this_run}/{remaining} ({rate:.2f} records/s, ETA {eta:.0f}s) - "
+                f"written {checkpoint['processed']}, skipped {checkpoint['skipped']}, failed {len(checkpoint['failed_ids'])}"
+            )
+    
+    logger.info(f"Backfill completed in {time.monotonic() - started:.1f}s")
+    return checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-transcribe stored records with a new model or VAD setting")
+    parser.add_argument("--model", help="Whisper model to use (default: WHISPER_MODEL)")
+    parser.add_argument("--vad-threshold", type=float, help="VAD threshold to use (default: VAD_THRESHOLD)")
+    parser.add_argument("--since", help="Only records created at or after this timestamp (e.g. 2024-11-01)")
+    parser.add_argument("--until", help="Only records created before this timestamp")
+    parser.add_argument("--audio-format", help="Only records of this audio format")
+    parser.add_argument("--ids", type=int, nargs="+", help="Only these record ids")
+    parser.add_argument("--as-version", action="store_true", help="Store the new transcript in transcription_version instead of replacing it")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for decoding and VAD")
+    parser.add_argument("--concurrency", type=int, default=2, help="Maximum concurrent upstream transcription requests")
+    parser.add_argument("--batch-size", type=int, default=50, help="Records per transaction and checkpoint")
+    parser.add_argument("--checkpoint", default="backfill_checkpoint.json", help="Checkpoint file used to resume")
+    parser.add_argument("--dry-run", action="store_true", help="Run the pipeline without writing results")
+    args = parser.parse_args()
+    
+    load_dotenv(override=True)
+    asyncio.run(run_backfill(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Export transcription records to CSV, JSONL or Parquet.
+
+Rows are streamed from the database in chunks and written to the output as they are encoded,
+so memory use stays constant regardless of table size.
+
+Usage (from the app directory):
+    python -m cli.export --format csv --compression gzip --output transcriptions.csv.gz
+    python -m cli.export --format parquet --compression zstd --start 2024-11-01 --end 2024-12-01
+    python -m cli.export --format jsonl
+"""
+
+import argparse
+from services.export_service import COMPRESSIONS, FORMATS, export_filename, export_transcriptions, validate_export_options
+from services.pysqlite_service import get_sqlite_service
+from utils.logger import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream transcription records to a file")
+    parser.add_argument("--format", choices=list(FORMATS), default="csv")
+    parser.add_argument("--compression", choices=[name for name in COMPRESSIONS if name])
+    parser.add_argument("--start", help="Only records created at or after this timestamp (e.g. 2024-11-01)")
+    parser.add_argument("--end", help="Only records created before this timestamp")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows fetched from the database per chunk")
+    parser.add_argument("--output", help="Output file (default: transcriptions.<ext> in the current directory)")
+    args = parser.parse_args()
+    
+    try:
+        validate_export_options(args.format, args.compression)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    get_sqlite_service("transcriptions.db")
+    
+    # Logs go to stdout, so the export is always written to a file
+    output_path = args.output or export_filename(args.format, args.compression)
+    
+    written = 0
+    with open(output_path, "wb") as output:
+        for data in export_transcriptions(
+            export_format=args.format,
+            compression=args.compression,
+            start=args.start,
+            end=args.end,
+            chunk_size=args.chunk_size
+        ):
+            output.write(data)
+            written += len(data)
+    
+    logger.info(f"Exported {written} bytes to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
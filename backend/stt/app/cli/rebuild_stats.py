@@ -0,0 +1,23 @@
+"""
+Rebuild the transcription statistics rollups from all stored records.
+
+Rollups are maintained incrementally by triggers and seeded automatically when the rollup tables are first created.
+Run this after restoring a backup or editing records outside of the application.
+
+Usage (from the app directory):
+    python -m cli.rebuild_stats
+"""
+
+import sys
+import asyncio
+from services.pysqlite_service import get_sqlite_service
+
+
+def main():
+    sqlite_service = get_sqlite_service("transcriptions.db")
+    success = asyncio.run(sqlite_service.rebuild_stats())
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Move transcription records older than the retention period to the archive database (hot/cold retention).
+
+The application runs the same job in the background when RETENTION_DAYS is set, see services/retention_service.py.
+Use this to archive once, e.g. from cron, or to archive with a different period. Records are moved in small batches,
+the application keeps serving uploads while it runs.
+
+Usage (from the app directory):
+    python -m cli.retention --days 90
+    python -m cli.retention --days 30 --batch-size 200
+"""
+
+import sys
+import asyncio
+import argparse
+from dotenv import load_dotenv
+from services.pysqlite_service import get_sqlite_service
+from services.retention_service import RetentionService
+from utils.logger import logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Archive old transcription records")
+    parser.add_argument("--days", type=float, default=None, help="Archive records older than this many days (default RETENTION_DAYS)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Records moved per transaction (default RETENTION_BATCH_SIZE or 500)")
+    return parser.parse_args()
+
+
+def main():
+    load_dotenv(override=True)
+    args = parse_args()
+    
+    retention_service = RetentionService(days=args.days, batch_size=args.batch_size)
+    if not retention_service.enabled:
+        logger.error("No retention period, pass --days or set RETENTION_DAYS")
+        sys.exit(1)
+    
+    get_sqlite_service("transcriptions.db")
+    try:
+        moved = asyncio.run(retention_service.run_once())
+    except Exception as e:
+        logger.error(f"Retention failed: {str(e)}")
+        sys.exit(1)
+    logger.info(f"Moved {moved} records to the archive")
+
+
+if __name__ == "__main__":
+    main()
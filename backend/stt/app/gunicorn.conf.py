@@ -0,0 +1,53 @@
+"""
+Gunicorn configuration for the fork-safe preloaded multi-worker deployment mode.
+
+Usage (from the app directory):
+    gunicorn main:app -c gunicorn.conf.py
+
+How it works:
+1) preload_app imports the FastAPI application once in the master process
+2) on_starting loads the Silero VAD model in the master, before any worker is forked.
+   Workers inherit the VADService singleton and share the model weights copy-on-write
+3) gc.freeze() moves everything loaded so far into a permanent generation, so the garbage collector
+   in the workers does not touch (and therefore copy) the shared pages
+4) SQLite connections and the upstream guard are never shared: their singletons are reset in every forked
+   child (os.register_at_fork), each worker opens its own connection on startup
+5) Writes across workers are coordinated by SQLite locking (WAL journal mode + busy timeout)
+
+Configuration (environment variables):
+- WEB_CONCURRENCY: Number of worker processes (default 2)
+- GUNICORN_PRELOAD: Set to 0 to disable preloading, every worker then loads its own model (baseline for benchmarks)
+- PORT: Port to bind (default 8020)
+- TORCH_NUM_THREADS: Intra-op threads per worker for the VAD model (default 1, avoids oversubscribing cores)
+"""
+
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8020')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+
+def on_starting(server):
+    """Runs in the master after the application is preloaded and before workers are forked"""
+
+    if not server.cfg.preload_app:
+        return
+
+    from services.vad_service import get_vad_service
+
+    get_vad_service()
+    gc.freeze()
+    server.log.info("Preloaded VAD model in master process")
+
+
+def post_fork(server, worker):
+    """Runs in each worker right after fork"""
+
+    import torch
+
+    torch.set_num_threads(int(os.getenv("TORCH_NUM_THREADS", "1")))
+    server.log.info(f"Worker {worker.pid} started with {torch.get_num_threads()} torch thread(s)")
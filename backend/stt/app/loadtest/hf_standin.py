@@ -0,0 +1,160 @@
+"""
+Local stand-in for the HuggingFace Inference API, to load test /stt/transcribe without using HuggingFace quota or network.
+
+Contract (as used by TranscriptionService):
+- POST /models/{model}: raw audio bytes as the request body, the Authorization header is accepted and ignored
+- 200 {"text": "..."}
+- 503 {"error": "Model <model> is currently loading", "estimated_time": <seconds>} while the model is loading
+- 500 {"error": "..."} for injected errors
+
+Behaviour:
+1. Latency: sampled from a configurable distribution, plus an optional cost per second of audio
+   - fixed:<seconds>
+   - uniform:<min>:<max>
+   - lognormal:<median>:<sigma>
+   - exponential:<mean>
+2. Loading phases: every model is "loading" for --loading-seconds after its first request, and again every
+   --reload-every seconds (0 = never), answering 503 immediately like the real API
+3. Errors: a share of the requests (--error-rate) fails with 500 after the sampled latency
+4. GET /stats: request counts per status code and model
+
+Usage (from the app directory):
+    python -m loadtest.hf_standin --port 8081 --latency lognormal:0.8:0.5 --loading-seconds 20 --error-rate 0.02
+    HF_API_BASE_URL=http://127.0.0.1:8081/models uvicorn main:app
+"""
+
+import time
+import random
+import asyncio
+import argparse
+import soundfile as sf
+from io import BytesIO
+from pydantic import BaseModel
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+WORDS = ["help", "me", "find", "my", "parents", "they", "told", "to", "wait", "for", "them", "but", "i", "saw",
+         "this", "pretty", "butterfly", "and", "followed", "it", "now", "am", "lost"]
+WORDS_PER_SECOND = 2.5
+
+
+class LatencyDistribution:
+    KINDS = {"fixed": 1, "uniform": 2, "lognormal": 2, "exponential": 1}
+
+    def __init__(self, spec: str):
+        kind, *params = spec.split(":")
+        if kind not in self.KINDS or len(params) != self.KINDS[kind]:
+            raise ValueError(f"Invalid latency '{spec}', expected one of: fixed:<s>, uniform:<min>:<max>, lognormal:<median>:<sigma>, exponential:<mean>")
+        self.kind = kind
+        self.params = [float(param) for param in params]
+        self.spec = spec
+
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return median * rng.lognormvariate(0, sigma)
+        return rng.expovariate(1 / self.params[0])
+
+
+class StandInConfig(BaseModel):
+    latency: str = "lognormal:0.8:0.5"
+    latency_per_audio_second: float = 0.0
+    loading_seconds: float = 0.0
+    reload_every: float = 0.0
+    error_rate: float = 0.0
+    text: str = None
+    seed: int = None
+
+
+def audio_duration(data: bytes) -> float:
+    try:
+        info = sf.info(BytesIO(data))
+        return info.frames / info.samplerate
+    except Exception:
+        return 0.0
+
+
+def create_app(config: StandInConfig) -> FastAPI:
+    app = FastAPI(title="HuggingFace Inference API stand-in")
+    latency = LatencyDistribution(config.latency)
+    rng = random.Random(config.seed)
+    first_request = {}
+    stats = {}
+
+    def loading_remaining(model: str) -> float:
+        """Seconds until the model finishes its current loading phase, 0 when it is loaded"""
+
+        now = time.monotonic()
+        elapsed = now - first_request.setdefault(model, now)
+        if config.reload_every > 0:
+            elapsed %= config.reload_every
+        return max(0.0, config.loading_seconds - elapsed)
+
+    def respond(model: str, status_code: int, body: dict) -> JSONResponse:
+        counts = stats.setdefault(model, {})
+        counts[str(status_code)] = counts.get(str(status_code), 0) + 1
+        return JSONResponse(status_code=status_code, content=body)
+
+    @app.post("/models/{model:path}")
+    async def infer(model: str, request: Request):
+        data = await request.body()
+
+        remaining = loading_remaining(model)
+        if remaining > 0:
+            return respond(model, 503, {"error": f"Model {model} is currently loading", "estimated_time": round(remaining, 1)})
+
+        duration = audio_duration(data)
+        await asyncio.sleep(latency.sample(rng) + duration * config.latency_per_audio_second)
+
+        if rng.random() < config.error_rate:
+            return respond(model, 500, {"error": "Injected inference error"})
+
+        text = config.text if config.text is not None else " ".join(rng.choices(WORDS, k=max(1, int(duration * WORDS_PER_SECOND))))
+        return respond(model, 200, {"text": text})
+
+    @app.get("/stats")
+    async def get_stats():
+        return {"config": config.model_dump(), "responses": stats}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the HuggingFace Inference API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", default="lognormal:0.8:0.5", help="fixed:<s>, uniform:<min>:<max>, lognormal:<median>:<sigma> or exponential:<mean>")
+    parser.add_argument("--latency-per-audio-second", type=float, default=0.0, help="Extra latency per second of audio")
+    parser.add_argument("--loading-seconds", type=float, default=0.0, help="503 loading phase after the first request of a model")
+    parser.add_argument("--reload-every", type=float, default=0.0, help="Repeat the loading phase every N seconds (0 = never)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 500 (0.0 to 1.0)")
+    parser.add_argument("--text", help="Fixed transcript to return (default: random words, ~2.5 per second of audio)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = StandInConfig(
+        latency=args.latency,
+        latency_per_audio_second=args.latency_per_audio_second,
+        loading_seconds=args.loading_seconds,
+        reload_every=args.reload_every,
+        error_rate=args.error_rate,
+        text=args.text,
+        seed=args.seed
+    )
+    try:
+        LatencyDistribution(config.latency)
+    except ValueError as e:
+        parser.error(str(e))
+
+    uvicorn.run(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Load generator for /stt/transcribe, reporting throughput, errors and latency percentiles per pipeline stage.
+
+Modes:
+1. Closed loop (--concurrency, --requests): N clients each send their next request as soon as the previous one returns,
+   measures the maximum throughput
+2. Open loop (--rate, --duration): requests start at a fixed rate regardless of how long earlier ones take, so queueing
+   shows up in the latency percentiles instead of lowering the request rate (no coordinated omission)
+
+Every request picks an audio file from a weighted mix (path:weight). Stage durations are read from the Server-Timing
+response header set by the API (utils/timing.py), e.g. decode, vad, upstream, store.
+
+Usage (from the app directory), against the HuggingFace stand-in (loadtest/hf_standin.py):
+    python -m loadtest.load_generator --url http://127.0.0.1:8080 --audio tests/audio/sample.mp3:3 long.wav:1 \\
+        --concurrency 16 --requests 500
+    python -m loadtest.load_generator --audio tests/audio/sample.mp3 --rate 20 --duration 60 --json results.json
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import mimetypes
+import httpx
+
+PERCENTILES = (50, 95, 99)
+
+
+def parse_audio_mix(specs):
+    """["a.wav:3", "b.mp3"] -> [(path, content, content_type, weight)]"""
+
+    mix = []
+    for spec in specs:
+        path, separator, weight = spec.rpartition(":")
+        if not separator or not weight.replace(".", "", 1).isdigit():
+            path, weight = spec, "1"
+        with open(path, "rb") as f:
+            content = f.read()
+        content_type = mimetypes.guess_type(path)[0] or "audio/wav"
+        mix.append((path, content, content_type, float(weight)))
+    return mix
+
+
+def parse_server_timing(header: str):
+    """'decode;dur=12.5, vad;dur=40.1' -> {"decode": 12.5, "vad": 40.1} (milliseconds)"""
+
+    stages = {}
+    for entry in (header or "").split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        if not name:
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "dur":
+                try:
+                    stages[name] = stages.get(name, 0.0) + float(value)
+                except ValueError:
+                    pass
+    return stages
+
+
+def percentile(values, p: float) -> float:
+    """Linear interpolation between closest ranks, like numpy.percentile"""
+
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(results, elapsed: float):
+    """Aggregate per request results into throughput, status counts and latency percentiles (ms)"""
+
+    statuses = {}
+    for result in results:
+        statuses[str(result["status"])] = statuses.get(str(result["status"]), 0) + 1
+    succeeded = [result for result in results if result["status"] == 200]
+
+    stage_values = {}
+    for result in succeeded:
+        for stage, duration in result["stages"].items():
+            stage_values.setdefault(stage, []).append(duration)
+
+    def distribution(values):
+        return {f"p{p}": round(percentile(values, p), 1) for p in PERCENTILES} if values else None
+
+    return {
+        "requests": len(results),
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_rps": round(len(succeeded) / elapsed, 2) if elapsed > 0 else 0.0,
+        "error_rate": round(1 - len(succeeded) / len(results), 4) if results else 0.0,
+        "statuses": statuses,
+        "latency_ms": distribution([result["latency"] for result in succeeded]),
+        "stages_ms": {stage: distribution(values) for stage, values in stage_values.items()}
+    }
+
+
+class LoadGenerator:
+    def __init__(self, url: str, mix, timeout: float = 120.0, seed: int = None):
+        self.url = f"{url.rstrip('/')}/stt/transcribe"
+        self.mix = mix
+        self.timeout = timeout
+        self.results = []
+        self._rng = random.Random(seed)
+
+
+    async def send(self, client: httpx.AsyncClient):
+        path, content, content_type, _ = self._rng.choices(self.mix, weights=[entry[3] for entry in self.mix])[0]
+        started = time.perf_counter()
+        try:
+            response = await client.post(self.url, files={"audio": (os.path.basename(path), content, content_type)})
+            status, stages = response.status_code, parse_server_timing(response.headers.get("server-timing"))
+        except httpx.HTTPError as e:
+            status, stages = type(e).__name__, {}
+        self.results.append({"file": path, "status": status, "latency": (time.perf_counter() - started) * 1000, "stages": stages})
+
+
+    async def run_closed(self, concurrency: int, requests: int):
+        remaining = iter(range(requests))
+
+        async def client_loop(client):
+            for _ in remaining:
+                await self.send(client)
+
+        async with httpx.AsyncClient(timeout=self.timeout, limits=httpx.Limits(max_connections=concurrency)) as client:
+            await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+
+
+    async def run_open(self, rate: float, duration: float):
+        async with httpx.AsyncClient(timeout=self.timeout, limits=httpx.Limits(max_connections=None)) as client:
+            tasks = []
+            started = time.perf_counter()
+            for i in range(int(rate * duration)):
+                ## Fixed schedule, a slow response never delays the next request
+                await asyncio.sleep(max(0.0, started + i / rate - time.perf_counter()))
+                tasks.append(asyncio.create_task(self.send(client)))
+            await asyncio.gather(*tasks)
+
+
+def print_report(summary):
+    print(f"Requests: {summary['requests']} in {summary['elapsed_seconds']}s, "
+          f"throughput {summary['throughput_rps']} req/s, error rate {summary['error_rate'] * 100:.2f}%")
+    print(f"Statuses: {summary['statuses']}")
+
+    rows = [("total", summary["latency_ms"])] + list(summary["stages_ms"].items())
+    print(f"\n{'stage':<14}" + "".join(f"{f'p{p} (ms)':>12}" for p in PERCENTILES))
+    for stage, distribution in rows:
+        if distribution:
+            print(f"{stage:<14}" + "".join(f"{distribution[f'p{p}']:>12.1f}" for p in PERCENTILES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for /stt/transcribe")
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="Base URL of the STT API")
+    parser.add_argument("--audio", nargs="+", required=True, help="Audio files as path or path:weight")
+    parser.add_argument("--concurrency", type=int, default=8, help="Closed loop: number of concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Closed loop: total number of requests")
+    parser.add_argument("--rate", type=float, help="Open loop: requests per second (enables open loop mode)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Open loop: test duration in seconds")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per request timeout in seconds")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", help="Also write the summary to this JSON file")
+    args = parser.parse_args()
+
+    generator = LoadGenerator(args.url, parse_audio_mix(args.audio), timeout=args.timeout, seed=args.seed)
+    started = time.perf_counter()
+    if args.rate:
+        asyncio.run(generator.run_open(args.rate, args.duration))
+    else:
+        asyncio.run(generator.run_closed(args.concurrency, args.requests))
+    summary = summarize(generator.results, time.perf_counter() - started)
+
+    print_report(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
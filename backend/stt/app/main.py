@@ -1,4 +1,5 @@
 import os
+import asyncio
 from fastapi import FastAPI
 from datetime import datetime, timezone, timedelta
 from routers import stt, database
@@ -8,7 +9,8 @@ from utils.logger import logger
 ## Services
 from services.pysqlite_service import get_sqlite_service
 from services.vad_service import get_vad_service
-from services.transcription_service import TranscriptionService
+from services.model_router_service import get_model_router
+from services.retention_service import get_retention_service
 
 
 ## Setup OS/DIR Path
@@ -34,10 +36,15 @@ async def startup():
         
         # Initialize VAD service
         get_vad_service()
+        
+        # Move old records to the archive database in the background, if retention is enabled
+        retention_service = get_retention_service()
+        if retention_service.enabled:
+            app.state.retention_task = asyncio.create_task(retention_service.run_forever())
+            logger.info(f"Retention enabled, archiving records older than {retention_service.days:g} days")
 
-        # Initialize transcription service
-        service = TranscriptionService(api_key=os.getenv("HF_TOKEN", ""))
-        warm_up_success = await service.warm_up()
+        # Warm up the model of every routing tier
+        warm_up_success = await get_model_router().warm_up(api_key=os.getenv("HF_TOKEN", ""))
         if not warm_up_success:
             logger.warning("Model warm-up was not successful, but application will continue")
     except Exception as e:
@@ -52,6 +59,10 @@ async def shutdown():
     """
     
     logger.info("Application shutdown initiated")
+    retention_task = getattr(app.state, "retention_task", None)
+    if retention_task is not None:
+        retention_task.cancel()
+        
     try:
         # Cleanup VAD service
         vad_service = get_vad_service()
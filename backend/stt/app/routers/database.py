@@ -1,28 +1,129 @@
-from fastapi import APIRouter, HTTPException, Query
+import base64
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from services.export_service import FORMATS, export_filename, export_transcriptions, validate_export_options
 from services.pysqlite_service import get_sqlite_service
+from services.query_cache_service import get_query_cache, normalize_keyword
+from services.retention_service import get_retention_service
 from utils.logger import logger
+from utils.response import build_json_response, compress_body
 
 
 router = APIRouter(
     prefix="/data",
     tags=["Database"],
+    default_response_class=ORJSONResponse,
     responses={
         404: {"description": "Not Found"}
     }
 )
 
 
+async def listing(records):
+    """Payload of the listing endpoints from an awaitable returning records"""
+    
+    transcriptions = await records
+    return {
+        "record": len(transcriptions),
+        "data": transcriptions
+    }
+
+
+def encode_cursor(after: tuple) -> str:
+    """Opaque next_cursor for the (created_at, id) keyset of the last record of a page"""
+    return base64.urlsafe_b64encode(orjson.dumps(list(after))).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        created_at, record_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(created_at, str) or not isinstance(record_id, int):
+            raise ValueError("unexpected cursor content")
+        return created_at, record_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor, use next_cursor of the previous page")
+
+
+async def cached_json_response(request: Request, key: tuple, query):
+    """
+    Serve a listing from the query cache, or run query() (returning the response payload) and cache its serialized
+    body for the current database generation, along with its compressed variants per Accept-Encoding. Without a
+    readable generation the cache is bypassed.
+    """
+    
+    query_cache = get_query_cache()
+    try:
+        generation = await get_sqlite_service().data_generation()
+    except Exception as e:
+        logger.warning(f"Query cache bypassed, failed to read the database generation: {str(e)}")
+        generation = None
+    
+    cached = query_cache.get(key, generation) if generation is not None else None
+    if cached is None:
+        body = orjson.dumps(await query())
+        if generation is None:
+            return build_json_response(request, body)
+        cached = query_cache.put(key, generation, body)
+    
+    return build_json_response(
+        request,
+        cached.body,
+        etag=cached.etag,
+        encode=lambda body, encoding: query_cache.encoded(key, cached, encoding, compress_body)
+    )
+
+
 @router.get("/transcriptions")
-async def get_all_transcriptions():
+async def get_all_transcriptions(
+    request: Request,
+    audio_format: str = Query(None, description="Only records of this audio format, e.g. mp3"),
+    sample_rate: int = Query(None, ge=1, description="Only records with this sample rate (Hz)"),
+    channel: int = Query(None, ge=1, description="Only records with this number of channels"),
+    min_duration: float = Query(None, ge=0, description="Only records at least this long (seconds)"),
+    max_duration: float = Query(None, ge=0, description="Only records at most this long (seconds)"),
+    start: str = Query(None, description="Only records created at or after this timestamp (e.g. 2024-11-01)"),
+    end: str = Query(None, description="Only records created before this timestamp"),
+    limit: int = Query(None, ge=1, le=1000, description="Page size, defaults to 100 when filtering or paginating"),
+    cursor: str = Query(None, description="next_cursor of the previous page")
+):
+    """
+    Without parameters, all records of the hot table newest first. With any filter, limit or cursor, one page of
+    matching records newest first, together with next_cursor to request the following page (null on the last page).
+    Pages continue into archived records (see /data/retention).
+    """
+    
+    filters = {
+        "audio_format": audio_format.strip().lower() if audio_format else None,
+        "sample_rate": sample_rate,
+        "channel": channel,
+        "min_duration": min_duration,
+        "max_duration": max_duration,
+        "start": start or None,
+        "end": end or None
+    }
+    
     try:
         sqlite_service = get_sqlite_service()
-        transcriptions = await sqlite_service.get_all_transcriptions()
+        if all(value is None for value in filters.values()) and limit is None and cursor is None:
+            return await cached_json_response(request, ("transcriptions",), lambda: listing(sqlite_service.get_all_transcriptions()))
         
-        return {
-            "record": len(transcriptions),
-            "data": transcriptions
-        }
+        ## Keyset pagination: the page continues after the (created_at, id) of the previous page's last record
+        after = decode_cursor(cursor) if cursor else None
+        page_size = limit or 100
+        
+        async def page():
+            transcriptions, next_after = await sqlite_service.query_transcriptions(after=after, limit=page_size, **filters)
+            return {
+                "record": len(transcriptions),
+                "data": transcriptions,
+                "next_cursor": encode_cursor(next_after) if next_after else None
+            }
         
+        return await cached_json_response(request, ("transcriptions", tuple(filters.values()), after, page_size), page)
+    
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving transcriptions: {str(e)}")
         raise HTTPException(
@@ -33,7 +134,11 @@ async def get_all_transcriptions():
 
 @router.get("/search")  # Changed to GET since we're retrieving data
 async def search_transcriptions(
-    keyword: str = Query(None, description="Search by file name or transcription content")
+    request: Request,
+    keyword: str = Query(None, description="Search by file name or transcription content"),
+    fuzzy: bool = Query(False, description="Typo tolerant search ranked by similarity score"),
+    threshold: float = Query(0.5, ge=0.0, le=1.0, description="Minimum similarity score for fuzzy search"),
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of fuzzy search results")
 ):
     try:
         if not keyword or not keyword.strip():
@@ -43,12 +148,17 @@ async def search_transcriptions(
             )
             
         sqlite_service = get_sqlite_service()
-        transcriptions = await sqlite_service.search_transcriptions(keyword.strip())
-        
-        return {
-            "record": len(transcriptions),
-            "data": transcriptions
-        }
+        if fuzzy:
+            return await cached_json_response(
+                request,
+                ("fuzzy_search", normalize_keyword(keyword, collapse_whitespace=True), threshold, limit),
+                lambda: listing(sqlite_service.fuzzy_search_transcriptions(keyword.strip(), threshold=threshold, limit=limit))
+            )
+        return await cached_json_response(
+            request,
+            ("search", normalize_keyword(keyword)),
+            lambda: listing(sqlite_service.search_transcriptions(keyword.strip()))
+        )
         
     except HTTPException:
         raise
@@ -60,14 +170,121 @@ async def search_transcriptions(
         )
         
         
+@router.get("/cache")
+async def get_query_cache_status():
+    """
+    Query result cache of /data/transcriptions and /data/search: entries, size, hit rate, stale lookups and evictions.
+    """
+    
+    return get_query_cache().snapshot()
+
+
+@router.get("/retention")
+async def get_retention_status():
+    """
+    Hot/cold retention: configured retention period, newest archived record, number of archived records and archive size.
+    """
+    
+    try:
+        retention_service = get_retention_service()
+        status = await get_sqlite_service().get_retention_status()
+        return {"retention_days": retention_service.days, **status}
+        
+    except Exception as e:
+        logger.error(f"Failed to get retention status: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to get retention status"
+        )
+
+
+@router.get("/stats")
+async def get_transcription_stats(
+    start: str = Query(None, description="First day to include, YYYY-MM-DD (UTC)"),
+    end: str = Query(None, description="Day to stop before, YYYY-MM-DD (UTC)")
+):
+    """
+    Per day record count, total audio duration, format mix and average speech ratio, read from incrementally
+    maintained rollups.
+    """
+    
+    try:
+        sqlite_service = get_sqlite_service()
+        days = await sqlite_service.get_daily_stats(start=start, end=end)
+        
+        speech_ratio_count = sum(day["speech_ratio_count"] for day in days)
+        formats = {}
+        for day in days:
+            day["average_speech_ratio"] = day["speech_ratio_sum"] / day["speech_ratio_count"] if day["speech_ratio_count"] else None
+            for audio_format, count in day["formats"].items():
+                formats[audio_format] = formats.get(audio_format, 0) + count
+        
+        return {
+            "totals": {
+                "record_count": sum(day["record_count"] for day in days),
+                "total_duration": sum(day["total_duration"] for day in days),
+                "average_speech_ratio": sum(day["speech_ratio_sum"] for day in days) / speech_ratio_count if speech_ratio_count else None,
+                "formats": formats
+            },
+            "days": [
+                {
+                    "day": day["day"],
+                    "record_count": day["record_count"],
+                    "total_duration": day["total_duration"],
+                    "average_speech_ratio": day["average_speech_ratio"],
+                    "formats": day["formats"]
+                }
+                for day in days
+            ]
+        }
+        
+    except Exception as e:
+        logger.error(f"Error retrieving transcription statistics: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to retrieve transcription statistics"
+        )
+
+
+@router.get("/export")
+async def export_all_transcriptions(
+    format: str = Query("csv", description="Export format: csv, jsonl or parquet"),
+    compression: str = Query(None, description="Optional compression: gzip or zstd"),
+    start: str = Query(None, description="Only records created at or after this timestamp (e.g. 2024-11-01)"),
+    end: str = Query(None, description="Only records created before this timestamp"),
+    chunk_size: int = Query(1000, ge=1, le=100000, description="Rows fetched from the database per chunk")
+):
+    """
+    Stream the transcription archive as a file download. Rows are read from the database and encoded chunk by chunk,
+    so memory use stays constant regardless of table size.
+    """
+    
+    try:
+        validate_export_options(format, compression)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        export_transcriptions(
+            export_format=format,
+            compression=compression,
+            start=start,
+            end=end,
+            chunk_size=chunk_size
+        ),
+        media_type=FORMATS[format]["media_type"],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(format, compression)}"'}
+    )
+
+
 @router.delete("/delete_record")
 async def delete_transcription(record_id: int):
     try:
         sqlite_service = get_sqlite_service()
-        ## First check if record exists
-        record = await sqlite_service.get_all_transcriptions()
+        ## First check if record exists, in the hot table or the archive
+        record = await sqlite_service.get_transcription(record_id)
         
-        if not record:
+        if record is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Transcription with id {record_id} not found"
@@ -4,19 +4,43 @@ Speech-to-Text transcription endpoint.
 Pipeline:
 1. Audio Validation - Verify file format and extract metadata
 2. Preprocessing - Convert to 16kHz mono WAV
-3. VAD - Remove silences using Silero model
-4. Transcription - Process using HuggingFace API
+3. Duplicate detection - Uploads whose acoustic fingerprint matches an earlier upload (e.g. the same recording
+   re-encoded or slightly trimmed) reuse its transcript and skip the following steps
+4. VAD - Remove silences using Silero model
+5. Transcription - Process using HuggingFace API. Audio with less speech than VAD_MIN_SPEECH_SECONDS is not
+   sent upstream and gets an empty transcript
+
+Steps 2 onwards wait for a processing slot of the upload's lane (services/scheduler_service.py): clips up to
+SCHED_INTERACTIVE_MAX_SECONDS go before longer recordings, which age in the queue so they are never starved.
+They only start once the estimated memory of the decoded audio fits in the process budget
+(services/admission_service.py), otherwise the request waits in a queue or is rejected with 503 / 413.
+
+Identical uploads (same content, model tier and VAD settings) arriving while one is being processed are coalesced
+(services/singleflight_service.py): they wait for the running pipeline and return its result or error.
+
+When ARTIFACT_STORE_DIR is set, the original upload and the normalized PCM are kept in the content-addressed
+artifact store and referenced from the stored record, so it can be re-processed later without a new upload.
 
 Requires HF_TOKEN environment variable for HuggingFace authentication.
 """
 
 import os
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import asyncio
+import hashlib
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Query, Response
+from services.admission_service import get_admission_controller
+from services.artifact_store_service import get_artifact_store
 from services.audio_processor_service import AudioReader, AudioService
+from services.fingerprint_service import get_fingerprint_service
+from services.model_router_service import get_model_router
 from services.pysqlite_service import get_sqlite_service
+from services.scheduler_service import get_scheduler
+from services.singleflight_service import get_single_flight
 from services.vad_service import get_vad_service
 from services.transcription_service import TranscriptionService
+from services.upstream_guard_service import get_upstream_guard
 from utils.logger import logger
+from utils.timing import StageTimer
 
 
 router = APIRouter(
@@ -28,8 +52,209 @@ router = APIRouter(
 )
 
 
+def content_sha256(file) -> str:
+    """SHA-256 of an uploaded file, read in chunks. The file position is reset for the following readers."""
+    
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(1024 * 1024), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+async def store_artifacts(audio_content_raw: bytes, processed_audio):
+    """
+    Store the original upload and normalized PCM in the artifact store, if enabled.
+    Returns their SHA-256 references, or (None, None) when the store is disabled or storing failed.
+    Storing is best effort, a failure never fails the transcription.
+    """
+    
+    artifact_store = get_artifact_store()
+    if not artifact_store.enabled:
+        return None, None
+    
+    try:
+        audio_sha256 = await asyncio.to_thread(artifact_store.put_original, audio_content_raw)
+        pcm_sha256 = await asyncio.to_thread(artifact_store.put_pcm, processed_audio)
+        return audio_sha256, pcm_sha256
+    except Exception as e:
+        logger.warning(f"Failed to store audio artifacts: {str(e)}")
+        return None, None
+
+
+async def find_near_duplicate(processed_audio):
+    """
+    Fingerprint the normalized audio and look up near-duplicates of earlier uploads.
+    Returns (fingerprint, duplicate): duplicate is the earlier record together with the similarity, or None.
+    Like store_artifacts, this is best effort, a failure never fails the transcription.
+    """
+    
+    fingerprint_service = get_fingerprint_service()
+    if not fingerprint_service.enabled:
+        return None, None
+    
+    try:
+        fingerprint = await asyncio.to_thread(fingerprint_service.compute, processed_audio)
+        match = await fingerprint_service.find_duplicate(fingerprint)
+        if match is None:
+            return fingerprint, None
+        
+        record = await get_sqlite_service().get_transcription(match["record_id"])
+        if record is None:
+            return fingerprint, None
+        return fingerprint, dict(record, similarity=match["similarity"])
+    except Exception as e:
+        logger.warning(f"Failed to look up near-duplicate uploads: {str(e)}")
+        return None, None
+
+
+def duplicate_matches_tier(duplicate: dict, duration: float, requested: str) -> bool:
+    """
+    Whether the transcript of a near-duplicate may be reused: it must come from the model this upload would be
+    transcribed with. The speech length is taken from the earlier record, VAD measured it on the same recording.
+    """
+    
+    if duplicate["speech_ratio"] is None:
+        return False
+    speech_duration = duplicate["speech_ratio"] * duration
+    if speech_duration < float(os.getenv("VAD_MIN_SPEECH_SECONDS", "0.25")):
+        return duplicate["model"] is None  # Silence, no model was called for the earlier record either
+    
+    tier = get_model_router().select_tier(duration=duration, speech_duration=speech_duration, requested=requested, endpoint="/stt/transcribe")
+    return duplicate["model"] == tier.model
+
+
+async def run_transcription(audio: UploadFile, x_stt_tier: str, timings: StageTimer):
+    """
+    Steps 1 to 6 of the pipeline for one upload, returns the response body. Stage durations are recorded in timings.
+    """
+    
+    ## An unknown X-STT-Tier is rejected (400) before any slot is taken or any artifact is stored
+    model_router = get_model_router()
+    if x_stt_tier:
+        model_router.get_tier(x_stt_tier)
+    
+    ## Step 1: Retrieve audio metadata (e.g. audio format, sample rate)
+    audio_reader = AudioReader(audio)
+    audio_info = audio_reader.get_audio_info()
+    logger.info(f"Audio detected and processing: {audio_info}")
+    timings.lap("probe")
+    
+    ## Short clips go before long recordings, decoding and VAD wait for a slot of their lane
+    async with get_scheduler().schedule(audio_info["duration"], label=audio_info["file_name"]) as slot:
+        timings.lap("scheduler")
+        
+        ## Reserve memory for the decoded audio before decoding it, waits or rejects when the process budget is used up
+        admission = get_admission_controller()
+        estimated_bytes = admission.estimate(
+            duration=audio_info["duration"],
+            sample_rate=audio_info["sample_rate"],
+            channel=audio_info["channel"],
+            upload_bytes=len(audio_reader.file_content)
+        )
+        async with admission.admit(estimated_bytes, label=audio_info["file_name"]):
+            timings.lap("admission")
+            
+            ## Step 2: Preprocess audio using output obtain from step 1 (e.g. Convert to .wav, convert to single channel, resample)
+            audio_service = AudioService()
+            audio_content_raw, audio_content_bytes = audio_reader.get_audio_content() # Keep audio_content_raw as a memory object of the original audio for any downstream operation
+            processed_audio = await audio_service.preprocess_audio(audio_content=audio_content_bytes, audio_format=audio_info["audio_format"])
+            timings.lap("decode")
+            
+            ## Optional: Keep the original upload and the normalized PCM for re-processing
+            audio_sha256, pcm_sha256 = await store_artifacts(audio_content_raw, processed_audio)
+            timings.lap("artifacts")
+            
+            ## Step 3: Reuse the transcript of an earlier upload of the same recording, skipping VAD and transcription
+            ## A transcript made by another model than the tier of this upload (e.g. X-STT-Tier asks for a larger one) is not reused
+            fingerprint, duplicate = await find_near_duplicate(processed_audio)
+            if duplicate is not None and not duplicate_matches_tier(duplicate, audio_info["duration"], x_stt_tier):
+                logger.info(f"Upload matches record {duplicate['id']}, transcribed by {duplicate['model']}, not the model of this upload's tier")
+                duplicate = None
+            timings.lap("fingerprint")
+            
+            if duplicate is not None:
+                logger.info(f"Upload matches record {duplicate['id']} (similarity {duplicate['similarity']}), reusing its transcript")
+                result = {"text": duplicate["transcription"]}
+                speech_ratio = duplicate["speech_ratio"]
+                model = duplicate["model"]
+            else:
+                ## Step 4: Apply VAD to remove silences from the preprocessed audio(step 2)
+                vad_service = get_vad_service()
+                speech = await vad_service.detect_speech(processed_audio)
+                speech_ratio = speech["speech_ratio"]
+                timings.lap("vad")
+                
+                ## Step 5: Send final processed audio to transcription service (HuggingFace Inference API)
+                ## The model tier is chosen from the audio duration and the speech length after VAD
+                tier = model_router.select_tier(
+                    duration=audio_info["duration"],
+                    speech_duration=speech["speech_duration"],
+                    requested=x_stt_tier,
+                    endpoint="/stt/transcribe"
+                )
+                
+                ## Audio without enough speech is never sent upstream, the transcript is empty and no model is reported
+                if speech["speech_duration"] < float(os.getenv("VAD_MIN_SPEECH_SECONDS", "0.25")):
+                    logger.info(f"Only {speech['speech_duration']:.2f}s of speech detected, skipping transcription")
+                    result = {"text": ""}
+                    model = None
+                else:
+                    model = tier.model
+                    vad_processed_audio = vad_service.extract_speech(speech)
+                    
+                    ## The slot is for decode and VAD, waiting upstream does not hold it (UpstreamGuard bounds upstream concurrency)
+                    await slot.release()
+                    transcription_service = TranscriptionService(api_key=os.getenv("HF_TOKEN"), model=tier.model)
+                    async with model_router.track(tier, speech_duration=speech["speech_duration"]):
+                        result = await transcription_service.transcribe(vad_processed_audio)
+                timings.lap("upstream")
+            
+            ## Step 6: Store transcription result in SQLite
+            sqlite_service = get_sqlite_service()
+            record_id = await sqlite_service.insert_transcription(
+                file_name=audio_info["file_name"],
+                audio_format=audio_info["audio_format"],
+                channel=audio_info["channel"],
+                sample_rate=audio_info["sample_rate"],
+                duration=audio_info["duration"],
+                transcription=result["text"],
+                audio_sha256=audio_sha256,
+                pcm_sha256=pcm_sha256,
+                speech_ratio=speech_ratio,
+                duplicate_of=duplicate["id"] if duplicate is not None else None,
+                model=model
+            )
+            
+            if record_id is None:
+                logger.error("Failed to store transcription in database")
+                raise HTTPException(
+                    status_code=500,
+                    detail="Failed to store transcription result"
+                )
+                
+            logger.info("Successfully inserted record into database")
+            timings.lap("store")
+            
+            ## Only original uploads are fingerprinted, near-duplicates are found through the record they duplicate
+            if fingerprint is not None and duplicate is None:
+                await get_fingerprint_service().index(record_id, fingerprint)
+                timings.lap("fingerprint")
+            
+            return {
+                "metadata": audio_info,
+                "transcript": result["text"],
+                "model": model,
+                "duplicate": {"record_id": duplicate["id"], "similarity": duplicate["similarity"]} if duplicate is not None else None
+            }
+
+
 @router.post("/transcribe")
-async def transcribe_file(audio: UploadFile = File(..., description="The audio file to transcribe")):
+async def transcribe_file(
+    response: Response,
+    audio: UploadFile = File(..., description="The audio file to transcribe"),
+    x_stt_tier: str = Header(None, description="Optional model tier name, overrides duration based routing")
+):
     if not audio.content_type.startswith('audio/'):
         raise HTTPException(
             status_code=400, 
@@ -38,49 +263,118 @@ async def transcribe_file(audio: UploadFile = File(..., description="The audio f
     
     try:
         logger.debug("Starting transcription request.")
+        timings = StageTimer()  # Reported in the Server-Timing response header
         
-        ## Step 1: Retrieve audio metadata (e.g. audio format, sample rate)
-        audio_reader = AudioReader(audio)
-        audio_info = audio_reader.get_audio_info()
-        logger.info(f"Audio detected and processing: {audio_info}")
-        
-        ## Step 2: Preprocess audio using output obtain from step 1 (e.g. Convert to .wav, convert to single channel, resample)
-        audio_service = AudioService()
-        audio_content_raw, audio_content_bytes = audio_reader.get_audio_content() # Keep audio_content_raw as a memory object of the original audio for any downstream operation
-        processed_audio = await audio_service.preprocess_audio(audio_content=audio_content_bytes, audio_format=audio_info["audio_format"])
-        
-        ## Step 3: Apply VAD to remove silences from the preprocessed audio(step 2)
-        vad_service = get_vad_service()
-        vad_processed_audio = await vad_service.remove_silence(processed_audio)
-        
-        ## Step 4: Send final processed audio to transcription service (HuggingFace Inference API)
-        transcription_service = TranscriptionService(api_key=os.getenv("HF_TOKEN"))
-        result = await transcription_service.transcribe(vad_processed_audio)
+        ## Identical uploads in flight (double submissions, client retries) share a single pipeline run and its result or error
+        upload_sha256 = await asyncio.to_thread(content_sha256, audio.file)
+        key = (upload_sha256, x_stt_tier, os.getenv("VAD_THRESHOLD", "0.3"), os.getenv("VAD_MIN_SPEECH_SECONDS", "0.25"))
+        result, shared = await get_single_flight().run(key, lambda: run_transcription(audio, x_stt_tier, timings))
+        if shared:
+            timings.lap("singleflight")
         
-        ## Step 5: Store transcription result in SQLite
-        sqlite_service = get_sqlite_service()
-        record_id = await sqlite_service.insert_transcription(
-            file_name=audio_info["file_name"],
-            audio_format=audio_info["audio_format"],
-            channel=audio_info["channel"],
-            sample_rate=audio_info["sample_rate"],
-            duration=audio_info["duration"],
-            transcription=result["text"]
+        response.headers["Server-Timing"] = timings.header()
+        return result
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error in transcribing file: {str(e)}")
+
+
+@router.post("/vad")
+async def detect_speech(
+    audio: UploadFile = File(..., description="The audio file to analyse"),
+    threshold: float = Query(None, ge=0.0, le=1.0, description="VAD threshold, defaults to VAD_THRESHOLD")
+):
+    """
+    Voice activity detection only, without transcription. Returns the speech timestamps (seconds) and speech ratio,
+    so bulk uploads can be pre-screened before paying for transcription.
+    """
+    
+    if not audio.content_type.startswith('audio/'):
+        raise HTTPException(
+            status_code=400, 
+            detail="File must be an audio file"
         )
+    
+    try:
+        audio_reader = AudioReader(audio)
+        audio_info = audio_reader.get_audio_info()
         
-        if record_id is None:
-            logger.error("Failed to store transcription in database")
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to store transcription result"
+        ## Short clips go before long recordings, see run_transcription
+        async with get_scheduler().schedule(audio_info["duration"], label=audio_info["file_name"]):
+            ## Reserve memory for the decoded audio before decoding it, waits or rejects when the process budget is used up
+            admission = get_admission_controller()
+            estimated_bytes = admission.estimate(
+                duration=audio_info["duration"],
+                sample_rate=audio_info["sample_rate"],
+                channel=audio_info["channel"],
+                upload_bytes=len(audio_reader.file_content)
             )
-            
-        logger.info("Successfully inserted record into database")
-            
-        return {
-            "metadata": audio_info,
-            "transcript": result["text"],       
-        }
-
+            async with admission.admit(estimated_bytes, label=audio_info["file_name"]):
+                _, audio_content_bytes = audio_reader.get_audio_content()
+                processed_audio = await AudioService().preprocess_audio(audio_content=audio_content_bytes, audio_format=audio_info["audio_format"])
+                
+                speech = await get_vad_service().detect_speech(processed_audio, threshold=threshold)
+                sample_rate = speech["sample_rate"]
+                
+                return {
+                    "metadata": audio_info,
+                    "has_speech": bool(speech["speech_timestamps"]),
+                    "speech_duration": round(speech["speech_duration"], 3),
+                    "speech_ratio": round(speech["speech_ratio"], 4),
+                    "speech_timestamps": [
+                        {"start": round(ts["start"] / sample_rate, 3), "end": round(ts["end"] / sample_rate, 3)}
+                        for ts in speech["speech_timestamps"]
+                    ]
+                }
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error in transcribing file: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"Error in detecting speech: {str(e)}")
+
+
+@router.get("/tiers")
+async def get_model_tiers():
+    """
+    Configured model tiers with per tier latency and cost metrics.
+    """
+    
+    return get_model_router().snapshot()
+
+
+@router.get("/admission")
+async def get_admission_status():
+    """
+    Memory budget for decoded audio: current reservations, queue length and rejection counters.
+    """
+    
+    return get_admission_controller().snapshot()
+
+
+@router.get("/scheduler")
+async def get_scheduler_status():
+    """
+    Duration-aware scheduling of uploads: running and queued jobs and queue wait times per lane (interactive, bulk).
+    """
+    
+    return get_scheduler().snapshot()
+
+
+@router.get("/singleflight")
+async def get_single_flight_status():
+    """
+    Coalescing of identical concurrent transcription requests: requests in flight, leaders and coalesced followers.
+    """
+    
+    return get_single_flight().snapshot()
+
+
+@router.get("/upstream")
+async def get_upstream_status():
+    """
+    Current state of the upstream circuit breaker and adaptive concurrency limit, for dashboards.
+    """
+    
+    return get_upstream_guard().snapshot()
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+This module bounds the amount of decoded audio resident in a worker process at once.
+
+Key Responsibilities:
+1. Estimate the memory a request needs from the probed metadata (duration, sample rate, channels) before decoding
+   - Decoded upload at its original sample rate and channel count (float32 in process, or pydub AudioSegment with up
+     to 32-bit samples on the ffmpeg fallback)
+   - Normalized 16kHz copies: int16 WAV, float64 samples from sf.read in VAD, float32 tensor, extracted speech
+   - The raw upload itself, multiplied by a safety factor for intermediate copies
+2. Reserve the estimate against a process wide budget
+   - Requests that do not fit wait in a FIFO queue, so large requests are not starved by small ones
+   - Requests still waiting after the queue timeout are rejected with 503 and a Retry-After header
+   - Requests larger than the whole budget can never be admitted and are rejected immediately with 413
+3. Expose current reservations and counters for dashboards
+
+Configuration (environment variables):
+- AUDIO_MEMORY_BUDGET_MB: Budget per worker process in megabytes (default 1024)
+- AUDIO_MEMORY_OVERHEAD: Safety factor applied to the estimate (default 1.5)
+- AUDIO_ADMISSION_TIMEOUT: Maximum time (seconds) a request waits for budget (default 10)
+
+With several gunicorn workers every worker has its own budget, size it as container memory / WEB_CONCURRENCY minus
+the memory of the loaded models.
+"""
+
+import os
+import math
+import time
+import asyncio
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from utils.logger import logger
+
+NORMALIZED_SAMPLE_RATE = 16000
+DECODED_BYTES_PER_SAMPLE = 4
+# int16 WAV (2) + float64 from sf.read (8) + float32 tensor (4) + int16 extracted speech (2)
+NORMALIZED_BYTES_PER_SAMPLE = 16
+
+
+class MemoryAdmissionController:
+    _instance = None  # Class variable for singleton instance
+
+    def __init__(self, budget_bytes: int = None, overhead: float = None, queue_timeout: float = None):
+        self.budget_bytes = budget_bytes if budget_bytes is not None else int(float(os.getenv("AUDIO_MEMORY_BUDGET_MB", "1024")) * 1024 * 1024)
+        self.overhead = overhead if overhead is not None else float(os.getenv("AUDIO_MEMORY_OVERHEAD", "1.5"))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv("AUDIO_ADMISSION_TIMEOUT", "10"))
+
+        self.reserved_bytes = 0
+        self.reservations = {}
+        self.total_admitted = 0
+        self.total_rejected = 0
+        self.total_too_large = 0
+        self._queue = deque()
+        self._ids = itertools.count(1)
+        self._average_hold = None  # Exponential moving average of reservation hold times, used for Retry-After
+        self._condition = asyncio.Condition()
+
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+
+    @classmethod
+    def _reset_after_fork(cls):
+        """Reservations are per process, a forked worker starts with an empty budget"""
+        cls._instance = None
+
+
+    def estimate(self, duration: float, sample_rate: int, channel: int, upload_bytes: int = 0) -> int:
+        """Estimated peak memory (bytes) of processing an upload with the given metadata"""
+
+        decoded = duration * sample_rate * max(channel, 1) * DECODED_BYTES_PER_SAMPLE
+        normalized = duration * NORMALIZED_SAMPLE_RATE * NORMALIZED_BYTES_PER_SAMPLE
+        return int((decoded + normalized + upload_bytes) * self.overhead)
+
+
+    def retry_after(self) -> int:
+        """Seconds after which a rejected request may find budget again, based on how long reservations are held"""
+        return max(1, math.ceil(self._average_hold or 1))
+
+
+    @asynccontextmanager
+    async def admit(self, estimated_bytes: int, label: str = None):
+        """
+        Hold a reservation of estimated_bytes for the duration of the block. Usage:
+
+            async with admission.admit(admission.estimate(duration, sample_rate, channel), label=file_name):
+                ...decode and process the audio...
+        """
+
+        if estimated_bytes > self.budget_bytes:
+            self.total_too_large += 1
+            raise HTTPException(
+                status_code=413,
+                detail=f"Audio needs about {estimated_bytes / (1024 * 1024):.0f} MB to process, "
+                       f"more than the budget of {self.budget_bytes / (1024 * 1024):.0f} MB"
+            )
+
+        reservation_id = next(self._ids)
+        async with self._condition:
+            self._queue.append(reservation_id)
+            try:
+                await asyncio.wait_for(
+                    self._condition.wait_for(
+                        lambda: self._queue[0] == reservation_id and self.reserved_bytes + estimated_bytes <= self.budget_bytes
+                    ),
+                    timeout=self.queue_timeout
+                )
+            except asyncio.TimeoutError:
+                self.total_rejected += 1
+                logger.warning(f"Rejected {label}: no audio memory budget for {estimated_bytes} bytes within {self.queue_timeout}s")
+                raise HTTPException(
+                    status_code=503,
+                    detail="Server is busy processing other audio, please retry later",
+                    headers={"Retry-After": str(self.retry_after())}
+                )
+            finally:
+                self._queue.remove(reservation_id)
+                self._condition.notify_all()  # The next request in line may fit now
+
+            self.reserved_bytes += estimated_bytes
+            self.total_admitted += 1
+            self.reservations[reservation_id] = {"label": label, "bytes": estimated_bytes, "started": time.monotonic()}
+
+        try:
+            yield
+        finally:
+            async with self._condition:
+                reservation = self.reservations.pop(reservation_id)
+                self.reserved_bytes -= reservation["bytes"]
+                held = time.monotonic() - reservation["started"]
+                self._average_hold = held if self._average_hold is None else 0.8 * self._average_hold + 0.2 * held
+                self._condition.notify_all()
+
+
+    def snapshot(self):
+        now = time.monotonic()
+        return {
+            "budget_bytes": self.budget_bytes,
+            "reserved_bytes": self.reserved_bytes,
+            "available_bytes": self.budget_bytes - self.reserved_bytes,
+            "queued": len(self._queue),
+            "reservations": [
+                {
+                    "id": reservation_id,
+                    "label": reservation["label"],
+                    "bytes": reservation["bytes"],
+                    "held_seconds": round(now - reservation["started"], 3)
+                }
+                for reservation_id, reservation in self.reservations.items()
+            ],
+            "total_admitted": self.total_admitted,
+            "total_rejected": self.total_rejected,
+            "total_too_large": self.total_too_large
+        }
+
+
+os.register_at_fork(after_in_child=MemoryAdmissionController._reset_after_fork)
+
+
+def get_admission_controller():
+    """Get the singleton instance of MemoryAdmissionController"""
+    return MemoryAdmissionController.get_instance()
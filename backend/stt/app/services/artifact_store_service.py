@@ -0,0 +1,224 @@
+"""
+This module provides an optional content-addressed store for audio artifacts.
+
+Key Responsibilities:
+1. Persist the original upload and the normalized 16kHz mono PCM of every transcription
+   - Files are named by the SHA-256 of their content, identical uploads are stored once (deduplication)
+   - Original uploads are stored gzip compressed
+   - PCM is stored as raw little-endian int16 samples so it can be memory-mapped
+2. Read artifacts back for re-processing (e.g. with a new model or VAD setting)
+   - open_pcm() returns a read-only numpy memmap, samples are paged in from the file without copying
+3. Keep the store within a size budget
+   - Least recently used artifacts (by modification time, refreshed on every read/write) are evicted first
+
+Layout:
+    <ARTIFACT_STORE_DIR>/original/<sha[:2]>/<sha>.gz
+    <ARTIFACT_STORE_DIR>/pcm/<sha[:2]>/<sha>.pcm
+
+Configuration (environment variables):
+- ARTIFACT_STORE_DIR: Root directory of the store. The store is disabled when not set
+- ARTIFACT_STORE_MAX_MB: Size budget in megabytes (default 1024)
+
+Writes go to a temporary file followed by an atomic rename, so several worker processes can share the same directory.
+"""
+
+import os
+import gzip
+import hashlib
+import tempfile
+from io import BytesIO
+from pathlib import Path
+import numpy as np
+import soundfile as sf
+from utils.logger import logger
+
+PCM_SAMPLE_RATE = 16000
+PCM_DTYPE = "<i2"
+
+
+class ArtifactStore:
+    _instance = None  # Class variable for singleton instance
+
+    def __init__(self, root_dir: str = None, max_bytes: int = None):
+        root_dir = root_dir if root_dir is not None else os.getenv("ARTIFACT_STORE_DIR", "")
+        self.enabled = bool(root_dir)
+        self.root_dir = Path(root_dir) if root_dir else None
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv("ARTIFACT_STORE_MAX_MB", "1024")) * 1024 * 1024)
+        self._approx_size = None  # Lazily computed, refreshed by a directory scan whenever eviction runs
+
+        if self.enabled:
+            (self.root_dir / "original").mkdir(parents=True, exist_ok=True)
+            (self.root_dir / "pcm").mkdir(parents=True, exist_ok=True)
+            logger.info(f"Artifact store enabled at {self.root_dir} (budget {self.max_bytes / (1024 * 1024):.0f} MB)")
+
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+
+    def _path(self, kind: str, sha256: str) -> Path:
+        suffix = ".gz" if kind == "original" else ".pcm"
+        return self.root_dir / kind / sha256[:2] / f"{sha256}{suffix}"
+
+
+    def _write_atomic(self, path: Path, data: bytes) -> int:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return len(data)
+
+
+    def _store(self, kind: str, sha256: str, data: bytes):
+        """Write an artifact unless it already exists. Existing artifacts are touched to mark them recently used."""
+
+        path = self._path(kind, sha256)
+        if path.exists():
+            os.utime(path)
+            logger.debug(f"Artifact {kind}/{sha256} already stored, skipping write")
+            return
+
+        written = self._write_atomic(path, data)
+        if self._approx_size is not None:
+            self._approx_size += written
+        self.evict_if_needed()
+
+
+    def put_original(self, audio_content: bytes) -> str:
+        """Store the original upload (gzip compressed) and return its SHA-256"""
+
+        sha256 = hashlib.sha256(audio_content).hexdigest()
+        if self.enabled:
+            self._store("original", sha256, gzip.compress(audio_content, compresslevel=6))
+        return sha256
+
+
+    def put_pcm(self, wav_content: BytesIO) -> str:
+        """Store the samples of a preprocessed 16kHz mono WAV as raw int16 PCM and return its SHA-256"""
+
+        wav_content.seek(0)
+        samples, _ = sf.read(wav_content, dtype="int16")
+        wav_content.seek(0)
+
+        pcm_bytes = samples.astype(PCM_DTYPE, copy=False).tobytes()
+        sha256 = hashlib.sha256(pcm_bytes).hexdigest()
+        if self.enabled:
+            self._store("pcm", sha256, pcm_bytes)
+        return sha256
+
+
+    def get_original(self, sha256: str):
+        """Return the original upload bytes, or None if the artifact is missing or was evicted"""
+
+        if not self.enabled or not sha256:
+            return None
+        path = self._path("original", sha256)
+        if not path.exists():
+            return None
+        os.utime(path)
+        with gzip.open(path, "rb") as f:
+            return f.read()
+
+
+    def open_pcm(self, sha256: str):
+        """
+        Memory-map the stored PCM as a read-only int16 numpy array (zero-copy), or None if missing.
+        An empty PCM file cannot be mapped and is returned as an empty array.
+        """
+
+        if not self.enabled or not sha256:
+            return None
+        path = self._path("pcm", sha256)
+        if not path.exists():
+            return None
+        os.utime(path)
+        if path.stat().st_size == 0:
+            return np.zeros(0, dtype=PCM_DTYPE)
+        return np.memmap(path, dtype=PCM_DTYPE, mode="r")
+
+
+    def get_pcm_wav(self, sha256: str):
+        """Rebuild a 16kHz mono WAV buffer from the stored PCM, ready for the VAD stage. None if missing."""
+
+        samples = self.open_pcm(sha256)
+        if samples is None:
+            return None
+        buffer = BytesIO()
+        sf.write(buffer, samples, PCM_SAMPLE_RATE, format="WAV", subtype="PCM_16")
+        buffer.seek(0)
+        return buffer
+
+
+    def _scan(self):
+        """Return (total_size, [(mtime, size, path), ...]) for every artifact in the store"""
+
+        entries = []
+        total = 0
+        for kind in ("original", "pcm"):
+            for shard in os.scandir(self.root_dir / kind):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(".tmp"):
+                        continue
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        return total, entries
+
+
+    def evict_if_needed(self):
+        """Delete least recently used artifacts until the store is below 90% of its budget"""
+
+        if not self.enabled:
+            return
+        if self._approx_size is not None and self._approx_size <= self.max_bytes:
+            return
+
+        total, entries = self._scan()
+        self._approx_size = total
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                evicted += 1
+            except FileNotFoundError:
+                # Already evicted by another worker
+                total -= size
+
+        self._approx_size = total
+        logger.info(f"Artifact store evicted {evicted} artifact(s), size now {total / (1024 * 1024):.1f} MB")
+
+
+    def stats(self):
+        if not self.enabled:
+            return {"enabled": False}
+        total, entries = self._scan()
+        self._approx_size = total
+        return {
+            "enabled": True,
+            "artifacts": len(entries),
+            "size_bytes": total,
+            "max_bytes": self.max_bytes
+        }
+
+
+def get_artifact_store():
+    """Get the singleton instance of ArtifactStore"""
+    return ArtifactStore.get_instance()
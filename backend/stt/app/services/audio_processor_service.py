@@ -12,14 +12,21 @@ Key Responsibilities:
   - Performs audio resampling to match model requirements
   - Standardizes audio processing
 
+Metadata is read from the file header and audio is decoded in process (utils/audio_decoder.py: libsndfile for
+WAV/FLAC/OGG, PyAV for MP3/AAC/M4A). Formats neither can read fall back to ffprobe / ffmpeg subprocesses via pydub.
+Decoding, resampling and the ffmpeg fallback run in a worker thread so the event loop keeps serving other requests.
+
 Dependencies:
-- pydub: Audio processing library for format conversion and manipulation
+- soundfile, av (optional): In-process probing and decoding
+- pydub: Audio processing library for format conversion and manipulation, fallback for other formats
 """
 
+import asyncio
 from io import BytesIO
 from fastapi import File, UploadFile, HTTPException
 from pydub.utils import mediainfo_json
 from pydub import AudioSegment
+from utils import audio_decoder
 from utils.logger import logger
 
 
@@ -29,13 +36,20 @@ class AudioReader:
             self.file_name = audio_file.filename.split('/')[-1]
             self.file_content = audio_file.file.read() 
             self.file_bytes = BytesIO(self.file_content)
-            __info = mediainfo_json(BytesIO(self.file_content))
             
-            # Retrieve audio info from original audio data
-            self.audio_format = str(__info['format']['format_name']).lower()
-            self.channel = int(__info['streams'][0]['channels'])
-            self.sample_rate = int(__info['streams'][0]['sample_rate'])
-            self.duration = float(__info['streams'][0]['duration'])
+            # Retrieve audio info from the file header, ffprobe only for formats that cannot be read in process
+            __info = audio_decoder.probe(self.file_content) if audio_decoder.native_enabled() else None
+            if __info is not None:
+                self.audio_format = __info['audio_format']
+                self.channel = int(__info['channel'])
+                self.sample_rate = int(__info['sample_rate'])
+                self.duration = float(__info['duration'])
+            else:
+                __info = mediainfo_json(BytesIO(self.file_content))
+                self.audio_format = str(__info['format']['format_name']).lower()
+                self.channel = int(__info['streams'][0]['channels'])
+                self.sample_rate = int(__info['streams'][0]['sample_rate'])
+                self.duration = float(__info['streams'][0]['duration'])
             
         except Exception as e:
             error_message = f"Error while reading audio file: {str(e)}"
@@ -80,11 +94,11 @@ class AudioService:
             # Check if input is WAV format
             if audio_format == 'wav':
                 logger.debug("Input is already in WAV format")
-                audio = AudioSegment.from_wav(audio_content)
+                audio = await asyncio.to_thread(AudioSegment.from_wav, audio_content)
             else:
                 # Convert non-WAV format to WAV
                 logger.debug(f"Converting {audio_format} to WAV format")
-                audio = AudioSegment.from_file(audio_content, format=audio_format)
+                audio = await asyncio.to_thread(AudioSegment.from_file, audio_content, format=audio_format)
                 logger.info("Audio file converted to WAV format")
                 
             return audio
@@ -158,18 +172,25 @@ class AudioService:
         
     async def preprocess_audio(self, audio_format, audio_content: BytesIO):
         try:
+            ## Decode straight to 16kHz mono in process, steps 1 to 3 (pydub / ffmpeg) are the fallback for other formats
+            if audio_decoder.native_enabled():
+                samples = await asyncio.to_thread(audio_decoder.decode, audio_content.getvalue(), audio_format)
+                if samples is not None:
+                    return await asyncio.to_thread(audio_decoder.to_wav, samples)
+                logger.info(f"Decoding {audio_format} with ffmpeg")
+            
             ## Step 1 Convert to WAV format
             audio = await self.convert_to_wav(audio_content=audio_content, audio_format=audio_format)
 
             ## Step 2 Convert to mono channel
-            audio = self.convert_to_mono(audio)
+            audio = await asyncio.to_thread(self.convert_to_mono, audio)
             
             ## Step 3 Resampling
-            audio = self.resample_audio(audio)
+            audio = await asyncio.to_thread(self.resample_audio, audio)
             
             # Create preprocessed WAV output
             final_wav_buffer = BytesIO()
-            audio.export(final_wav_buffer, format="wav")
+            await asyncio.to_thread(audio.export, final_wav_buffer, format="wav")
             final_wav_buffer.seek(0)
             
             return final_wav_buffer
@@ -0,0 +1,199 @@
+"""
+This module provides streaming bulk export of transcription records.
+
+Key Responsibilities:
+1) Stream rows straight from a SQLite cursor in fixed size chunks, memory use does not depend on table size
+2) Encode rows as CSV, JSONL or Parquet
+   - CSV / JSONL are encoded chunk by chunk
+   - Parquet writes one row group per chunk, the footer is emitted once the cursor is exhausted
+3) Optional compression
+   - CSV / JSONL: gzip (standard library) or zstd (requires the zstandard package), applied as a stream
+   - Parquet: gzip or zstd are used as the Parquet column codec instead, the file itself stays a valid Parquet file
+
+Dependencies:
+- pyarrow: Parquet format. Listed in requirements.txt, an installation without it rejects Parquet exports with a 400
+  before streaming starts (validate_export_options)
+- zstandard: zstd compression of CSV / JSONL
+"""
+
+import io
+import csv
+import json
+import zlib
+from services.pysqlite_service import get_sqlite_service
+
+EXPORT_COLUMNS = [
+    "id",
+    "file_name",
+    "audio_format",
+    "channel",
+    "sample_rate",
+    "duration",
+    "transcription",
+    "created_at",
+    "audio_sha256",
+    "pcm_sha256"
+]
+
+FORMATS = {
+    "csv": {"media_type": "text/csv", "extension": "csv"},
+    "jsonl": {"media_type": "application/x-ndjson", "extension": "jsonl"},
+    "parquet": {"media_type": "application/vnd.apache.parquet", "extension": "parquet"}
+}
+
+COMPRESSIONS = {
+    None: {"extension": ""},
+    "gzip": {"extension": ".gz"},
+    "zstd": {"extension": ".zst"}
+}
+
+
+def _encode_csv(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():
+        # Header only, the table was empty
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _encode_jsonl(chunks):
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows
+        ).encode("utf-8")
+
+
+class _ChunkSink:
+    """Minimal writable file object collecting the bytes written by pyarrow between two chunks"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _encode_parquet(chunks, compression: str = None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("file_name", pa.string()),
+        ("audio_format", pa.string()),
+        ("channel", pa.int64()),
+        ("sample_rate", pa.int64()),
+        ("duration", pa.float64()),
+        ("transcription", pa.string()),
+        ("created_at", pa.string()),
+        ("audio_sha256", pa.string()),
+        ("pcm_sha256", pa.string())
+    ])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression=compression or "none")
+    try:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            ))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _compress(stream, compression: str):
+    if compression == "gzip":
+        compressor = zlib.compressobj(level=6, wbits=31)  # wbits=31 writes a gzip header
+    elif compression == "zstd":
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    else:
+        yield from stream
+        return
+
+    for data in stream:
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def validate_export_options(export_format: str, compression: str = None):
+    """Raise ValueError for unsupported options or missing optional dependencies"""
+
+    if export_format not in FORMATS:
+        raise ValueError(f"Unsupported export format '{export_format}', expected one of: {', '.join(FORMATS)}")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unsupported compression '{compression}', expected gzip or zstd")
+    if export_format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet export requires the pyarrow package")
+    elif compression == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            raise ValueError("zstd compression requires the zstandard package")
+
+
+def export_filename(export_format: str, compression: str = None) -> str:
+    """File name for an export, Parquet compression is internal to the file so it keeps its extension"""
+
+    extension = FORMATS[export_format]["extension"]
+    if export_format != "parquet":
+        extension += COMPRESSIONS[compression]["extension"]
+    return f"transcriptions.{extension}"
+
+
+def export_transcriptions(
+    export_format: str = "csv",
+    compression: str = None,
+    start: str = None,
+    end: str = None,
+    chunk_size: int = 1000
+):
+    """
+    Generator yielding the encoded (and optionally compressed) export as bytes.
+    start / end filter on created_at (start inclusive, end exclusive).
+    """
+
+    validate_export_options(export_format, compression)
+    chunks = get_sqlite_service().stream_transcriptions(EXPORT_COLUMNS, start=start, end=end, chunk_size=chunk_size)
+
+    if export_format == "parquet":
+        yield from _encode_parquet(chunks, compression)
+    elif export_format == "jsonl":
+        yield from _compress(_encode_jsonl(chunks), compression)
+    else:
+        yield from _compress(_encode_csv(chunks), compression)
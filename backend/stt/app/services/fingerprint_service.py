@@ -0,0 +1,165 @@
+"""
+This module provides acoustic fingerprints for near-duplicate upload detection.
+
+Key Responsibilities:
+1. Compute a compact spectral fingerprint from the normalized 16kHz mono PCM (output of AudioService.preprocess_audio)
+   - Frames of 4096 samples (256 ms) every 256 samples (16 ms), Hann window
+   - Energy in 33 logarithmically spaced bands between 300 Hz and 2000 Hz
+   - One 32-bit sub-fingerprint per frame: bit m is set when the energy difference between bands m and m+1
+     increases compared to the previous frame (Haitsma & Kalker). Only the sign of differences is kept,
+     so the fingerprint survives re-encoding at another bitrate, volume changes and mild noise
+2. Find near-duplicates of earlier uploads
+   - Sub-fingerprints are stored in an inverted index in SQLite (sub-fingerprint -> record, frame offset)
+   - Exact hits of the query sub-fingerprints vote for a (record, offset) alignment, so trimmed copies are found too
+   - The best alignments are verified on the full fingerprints: similarity = 1 - bit error rate over the overlap
+3. Index the fingerprint of every newly transcribed upload
+
+Configuration (environment variables):
+- FINGERPRINT_ENABLED: Set to 0 to disable duplicate detection (default 1)
+- FINGERPRINT_SIMILARITY_THRESHOLD: Minimum similarity (0.0 to 1.0) to reuse a transcript (default 0.75).
+  Unrelated audio scores around 0.5
+- FINGERPRINT_MIN_OVERLAP: Minimum share of the longer recording covered by the aligned overlap (default 0.8)
+- FINGERPRINT_QUERY_SECONDS: Seconds of the upload used for the index lookup (default 30)
+"""
+
+import os
+from io import BytesIO
+import numpy as np
+import soundfile as sf
+from services.pysqlite_service import get_sqlite_service
+from utils.logger import logger
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = 4096
+HOP_SIZE = 256
+BAND_EDGES = np.geomspace(300, 2000, 34)
+FRAMES_PER_BLOCK = 512  # Frames transformed at once, bounds memory use for long audio
+MIN_VOTES = 2
+MAX_CANDIDATES = 5
+
+# Sub-fingerprints of silence or of a constant signal carry no information and match everything
+IGNORED_HASHES = {0, 0xFFFFFFFF}
+
+
+class FingerprintService:
+    _instance = None  # Class variable for singleton instance
+
+    def __init__(self):
+        self.enabled = os.getenv("FINGERPRINT_ENABLED", "1") == "1"
+        self.similarity_threshold = float(os.getenv("FINGERPRINT_SIMILARITY_THRESHOLD", "0.75"))
+        self.min_overlap = float(os.getenv("FINGERPRINT_MIN_OVERLAP", "0.8"))
+        self.query_frames = int(float(os.getenv("FINGERPRINT_QUERY_SECONDS", "30")) * SAMPLE_RATE / HOP_SIZE)
+
+        frequencies = np.fft.rfftfreq(FRAME_SIZE, 1 / SAMPLE_RATE)
+        self._band_bins = np.searchsorted(frequencies, BAND_EDGES)
+        self._window = np.hanning(FRAME_SIZE).astype(np.float32)
+
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+
+    def compute(self, audio_content: BytesIO) -> np.ndarray:
+        """Fingerprint of a 16kHz mono WAV as an array of uint32 sub-fingerprints, one per 16 ms frame"""
+
+        samples, sample_rate = sf.read(audio_content, dtype="float32")
+        audio_content.seek(0)
+        if sample_rate != SAMPLE_RATE:
+            raise ValueError(f"Fingerprints require {SAMPLE_RATE}Hz audio, got {sample_rate}Hz")
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)
+        if len(samples) < FRAME_SIZE + HOP_SIZE:
+            return np.zeros(0, dtype=np.uint32)
+
+        frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+        energies = np.concatenate([
+            np.add.reduceat(
+                ## The last band ends at BAND_EDGES[-1], not at Nyquist, where noise and codec artifacts dominate
+                (np.abs(np.fft.rfft(frames[start:start + FRAMES_PER_BLOCK] * self._window)) ** 2)[:, :self._band_bins[-1]],
+                self._band_bins[:-1],
+                axis=1
+            )
+            for start in range(0, len(frames), FRAMES_PER_BLOCK)
+        ])
+
+        band_differences = energies[:, :-1] - energies[:, 1:]
+        bits = (band_differences[1:] - band_differences[:-1]) > 0
+        return (bits.astype(np.uint64) << np.arange(32, dtype=np.uint64)).sum(axis=1).astype(np.uint32)
+
+
+    @staticmethod
+    def similarity(query: np.ndarray, stored: np.ndarray, offset: int):
+        """
+        1 - bit error rate of the two fingerprints aligned so that query frame i matches stored frame i + offset.
+        Returns (similarity, overlapping frame count).
+        """
+
+        query_start = max(0, -offset)
+        stored_start = max(0, offset)
+        overlap = min(len(query) - query_start, len(stored) - stored_start)
+        if overlap <= 0:
+            return 0.0, 0
+
+        differing = np.bitwise_xor(query[query_start:query_start + overlap], stored[stored_start:stored_start + overlap])
+        bit_errors = np.unpackbits(differing.view(np.uint8)).sum()
+        return 1.0 - bit_errors / (overlap * 32), overlap
+
+
+    async def find_duplicate(self, fingerprint: np.ndarray):
+        """
+        Earlier record whose fingerprint matches, as {"record_id", "similarity"}, or None.
+        """
+
+        query = {}
+        for offset, sub_hash in enumerate(fingerprint[:self.query_frames].tolist()):
+            if sub_hash not in IGNORED_HASHES:
+                query.setdefault(sub_hash, offset)
+        if not query:
+            return None
+
+        sqlite_service = get_sqlite_service()
+
+        ## Vote for (record, offset) alignments using exact sub-fingerprint hits
+        votes = {}
+        for sub_hash, record_id, frame_offset in await sqlite_service.find_fingerprint_hits(list(query)):
+            alignment = (record_id, frame_offset - query[sub_hash])
+            votes[alignment] = votes.get(alignment, 0) + 1
+        candidates = sorted(
+            (alignment for alignment, count in votes.items() if count >= MIN_VOTES),
+            key=lambda alignment: -votes[alignment]
+        )[:MAX_CANDIDATES]
+        if not candidates:
+            return None
+
+        ## Verify the best alignments on the full fingerprints
+        stored_fingerprints = await sqlite_service.get_fingerprints(list({record_id for record_id, _ in candidates}))
+        best = None
+        for record_id, offset in candidates:
+            if record_id not in stored_fingerprints:
+                continue
+            stored = np.frombuffer(stored_fingerprints[record_id], dtype="<u4")
+            score, overlap = self.similarity(fingerprint, stored, offset)
+            if overlap < self.min_overlap * max(len(fingerprint), len(stored)):
+                continue
+            if score >= self.similarity_threshold and (best is None or score > best["similarity"]):
+                best = {"record_id": record_id, "similarity": round(float(score), 4)}
+        
+        logger.debug(f"Fingerprint lookup: {len(votes)} alignments, {len(candidates)} verified, match: {best}")
+        return best
+
+
+    async def index(self, record_id: int, fingerprint: np.ndarray) -> bool:
+        """Store the fingerprint of a record and add its sub-fingerprints to the inverted index"""
+
+        hashes = [(sub_hash, offset) for offset, sub_hash in enumerate(fingerprint.tolist()) if sub_hash not in IGNORED_HASHES]
+        if not hashes:
+            return False
+        return await get_sqlite_service().insert_fingerprint(record_id, fingerprint.astype("<u4").tobytes(), hashes)
+
+
+def get_fingerprint_service():
+    """Get the singleton instance of FingerprintService"""
+    return FingerprintService.get_instance()
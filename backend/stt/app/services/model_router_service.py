@@ -0,0 +1,181 @@
+"""
+This module routes transcription requests to Whisper model tiers based on audio length.
+
+Key Responsibilities:
+1. Tier selection
+   - Tiers are checked in order, the first tier whose limits fit the audio is used
+   - Limits: max_duration (original audio duration from AudioReader) and max_speech_duration (speech length after VAD)
+   - The last tier is the fallback for anything longer
+2. Overrides
+   - Per request: the X-STT-Tier header selects a tier by name
+   - Per endpoint: WHISPER_ENDPOINT_TIERS maps an endpoint path to a fixed tier
+3. Per tier warm-up at startup and per tier metrics (requests, errors, latency, audio seconds, estimated cost)
+
+Configuration (environment variables):
+- WHISPER_MODEL_TIERS: JSON list of tiers, e.g.
+    [
+        {"name": "fast", "model": "openai/whisper-tiny", "max_speech_duration": 5, "cost_per_second": 0.0001},
+        {"name": "accurate", "model": "openai/whisper-large-v3", "cost_per_second": 0.001}
+    ]
+  When not set, a single "default" tier uses WHISPER_MODEL (previous behaviour)
+- WHISPER_ENDPOINT_TIERS: JSON object mapping endpoint paths to tier names, e.g. {"/stt/transcribe": "accurate"}
+"""
+
+import os
+import json
+import time
+from typing import Optional
+from contextlib import asynccontextmanager
+from pydantic import BaseModel
+from fastapi import HTTPException
+from services.transcription_service import TranscriptionService
+from utils.logger import logger
+
+
+class ModelTier(BaseModel):
+    name: str
+    model: str
+    max_duration: Optional[float] = None
+    max_speech_duration: Optional[float] = None
+    cost_per_second: float = 0.0
+
+    def fits(self, duration: float, speech_duration: float) -> bool:
+        if self.max_duration is not None and duration > self.max_duration:
+            return False
+        if self.max_speech_duration is not None and speech_duration > self.max_speech_duration:
+            return False
+        return True
+
+
+class TierMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.audio_seconds = 0.0
+        self.estimated_cost = 0.0
+        self.warmed_up = False
+
+    def snapshot(self):
+        completed = self.requests - self.errors
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "average_latency": self.total_latency / completed if completed else None,
+            "max_latency": self.max_latency,
+            "audio_seconds": round(self.audio_seconds, 3),
+            "estimated_cost": round(self.estimated_cost, 6),
+            "warmed_up": self.warmed_up
+        }
+
+
+class ModelRouter:
+    _instance = None  # Class variable for singleton instance
+
+    def __init__(self, tiers: list = None, endpoint_tiers: dict = None):
+        self.tiers = tiers or self._load_tiers()
+        self.endpoint_tiers = endpoint_tiers if endpoint_tiers is not None else json.loads(os.getenv("WHISPER_ENDPOINT_TIERS", "{}"))
+        self.metrics = {tier.name: TierMetrics() for tier in self.tiers}
+
+        for endpoint, tier_name in self.endpoint_tiers.items():
+            if tier_name not in self.metrics:
+                raise ValueError(f"WHISPER_ENDPOINT_TIERS maps {endpoint} to unknown tier '{tier_name}'")
+        logger.info(f"Model routing tiers: {', '.join(f'{tier.name}={tier.model}' for tier in self.tiers)}")
+
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+
+    @staticmethod
+    def _load_tiers():
+        config = os.getenv("WHISPER_MODEL_TIERS", "")
+        if not config:
+            return [ModelTier(name="default", model=os.getenv("WHISPER_MODEL", "openai/whisper-tiny"))]
+
+        tiers = [ModelTier(**tier) for tier in json.loads(config)]
+        if not tiers:
+            raise ValueError("WHISPER_MODEL_TIERS must contain at least one tier")
+        return tiers
+
+
+    def get_tier(self, name: str) -> ModelTier:
+        for tier in self.tiers:
+            if tier.name == name:
+                return tier
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown model tier '{name}', available tiers: {', '.join(tier.name for tier in self.tiers)}"
+        )
+
+
+    def select_tier(self, duration: float, speech_duration: float, requested: str = None, endpoint: str = None) -> ModelTier:
+        """
+        Pick the tier for a request. Precedence: X-STT-Tier header, endpoint mapping, then the first tier that fits.
+        """
+
+        if requested:
+            return self.get_tier(requested)
+        if endpoint in self.endpoint_tiers:
+            return self.get_tier(self.endpoint_tiers[endpoint])
+
+        for tier in self.tiers:
+            if tier.fits(duration, speech_duration):
+                return tier
+        return self.tiers[-1]
+
+
+    @asynccontextmanager
+    async def track(self, tier: ModelTier, speech_duration: float):
+        """Record latency, audio seconds and estimated cost of one transcription on a tier"""
+
+        metrics = self.metrics[tier.name]
+        metrics.requests += 1
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            metrics.errors += 1
+            raise
+        latency = time.monotonic() - started
+        metrics.total_latency += latency
+        metrics.max_latency = max(metrics.max_latency, latency)
+        metrics.audio_seconds += speech_duration
+        metrics.estimated_cost += speech_duration * tier.cost_per_second
+
+
+    async def warm_up(self, api_key: str):
+        """Warm up every tier's model once"""
+
+        warmed_models = {}
+        for tier in self.tiers:
+            if tier.model not in warmed_models:
+                warmed_models[tier.model] = await TranscriptionService(api_key=api_key, model=tier.model).warm_up()
+            self.metrics[tier.name].warmed_up = warmed_models[tier.model]
+        return all(warmed_models.values())
+
+
+    def snapshot(self):
+        return {
+            "tiers": [
+                {
+                    "name": tier.name,
+                    "model": tier.model,
+                    "max_duration": tier.max_duration,
+                    "max_speech_duration": tier.max_speech_duration,
+                    "cost_per_second": tier.cost_per_second,
+                    "metrics": self.metrics[tier.name].snapshot()
+                }
+                for tier in self.tiers
+            ],
+            "endpoint_tiers": self.endpoint_tiers
+        }
+
+
+def get_model_router():
+    """Get the singleton instance of ModelRouter"""
+    return ModelRouter.get_instance()
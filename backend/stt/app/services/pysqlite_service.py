@@ -9,6 +9,14 @@ Key Responsibilities:
 Implementation Details:
 1) Singleton pattern ensures a single database instance across the application
 2) Manual database connection management within the service
+3) Fork-safe: the singleton is discarded in forked children (e.g. gunicorn workers with preload_app),
+   so every worker opens its own connection instead of sharing the parent's file descriptor
+4) Writes from multiple worker processes are coordinated by SQLite's file locking, using WAL journal mode
+   and a busy timeout so concurrent writers wait for the lock instead of failing with "database is locked"
+5) data_generation() changes after every committed change of the records, in this or any other process,
+   cached query results (services/query_cache_service.py) are only served for the generation they were computed at
+6) Hot/cold retention (services/retention_service.py): archive_batch() moves old records to a separate archive
+   database, attached as schema "archive" only when a query's date range reaches older than the newest archived record
 
 Schema (transcription_result):
 - id: INTEGER PRIMARY KEY AUTOINCREMENT
@@ -19,12 +27,105 @@ Schema (transcription_result):
 - duration: REAL
 - transcription: TEXT
 - created_at: TEXT DEFAULT CURRENT_TIMESTAMP
+- audio_sha256: TEXT (reference to the original upload in the artifact store, NULL if not stored)
+- pcm_sha256: TEXT (reference to the normalized 16kHz PCM in the artifact store, NULL if not stored)
+- speech_ratio: REAL (share of the audio kept by VAD, 0.0 to 1.0)
+- duplicate_of: INTEGER (record whose transcript was reused for this near-duplicate upload, NULL otherwise)
+- model: TEXT (Whisper model that produced the transcript, NULL when no model was called or for older records)
+
+Schema (transcription_version):
+- id: INTEGER PRIMARY KEY AUTOINCREMENT
+- transcription_id: INTEGER (references transcription_result.id)
+- model: TEXT
+- vad_threshold: REAL
+- transcription: TEXT
+- created_at: TEXT DEFAULT CURRENT_TIMESTAMP
+
+Rollups (transcription_daily_stats, transcription_format_stats):
+- Per day (UTC, from created_at) counts, total duration, speech ratio sums and format mix
+- Maintained incrementally by triggers on transcription_result, so statistics never scan the records table
+- rebuild_stats() recomputes them from scratch (cli/rebuild_stats.py)
+
+Fuzzy search index:
+- transcription_word: vocabulary of the words in file_name and transcription, with the number of records using them.
+  Words no record uses any more are removed with their trigrams
+- transcription_word_trigram / transcription_trigram_stats: trigrams of every vocabulary word (see utils/trigram.py),
+  with the number of words per trigram, used to find words similar to a misspelled query word
+- transcription_word_posting: records containing each word
+- Query cost follows the vocabulary and the records of the matched words, not the number of records in the table
+- Maintained in the same transaction as inserts, deletes and backfill updates
+
+Acoustic fingerprints (audio_fingerprint, audio_fingerprint_hash), see services/fingerprint_service.py:
+- audio_fingerprint: full fingerprint of a record (little-endian uint32 sub-fingerprints)
+- audio_fingerprint_hash: inverted index, sub-fingerprint -> (record, frame offset)
+
+Metadata indexes (transcription_result):
+- (created_at), (audio_format, created_at), (sample_rate, channel, created_at), used by query_transcriptions()
+  for filtered listings with keyset pagination on (created_at, id), newest first
+
+Archive database (archive.transcription_archive, archive.transcription_archive_dictionary):
+- Same columns and metadata indexes as transcription_result, the transcription compressed (BLOB) with its codec name
+- Compression dictionaries trained on transcripts, see utils/archive_codec.py
+- transcription_retention (main database): newest archived (created_at, id) and counters of the retention job
+
+Columns and tables added after the initial release are applied to existing databases by _migrate() on startup.
 """
 
+import os
+import math
 import sqlite3
+import itertools
 from pathlib import Path
 from pydantic import BaseModel
 from utils.logger import logger
+from utils.archive_codec import ArchiveCodec
+from utils.trigram import similarity, split_words, word_trigrams
+
+# Rollup maintenance of one record (NEW: added, OLD: removed), run by the triggers on transcription_result
+STATS_ADD_NEW = '''
+    INSERT INTO transcription_daily_stats (day, record_count, total_duration, speech_ratio_sum, speech_ratio_count)
+    VALUES (date(NEW.created_at), 1, COALESCE(NEW.duration, 0), COALESCE(NEW.speech_ratio, 0), NEW.speech_ratio IS NOT NULL)
+    ON CONFLICT (day) DO UPDATE SET
+        record_count = record_count + 1,
+        total_duration = total_duration + excluded.total_duration,
+        speech_ratio_sum = speech_ratio_sum + excluded.speech_ratio_sum,
+        speech_ratio_count = speech_ratio_count + excluded.speech_ratio_count;
+    INSERT INTO transcription_format_stats (day, audio_format, record_count)
+    VALUES (date(NEW.created_at), COALESCE(NEW.audio_format, 'unknown'), 1)
+    ON CONFLICT (day, audio_format) DO UPDATE SET record_count = record_count + 1;
+'''
+
+
+def stats_remove_statements(row: str) -> list:
+    """
+    Statements removing one record from the rollups. `row` prefixes the column references: "OLD." in the triggers,
+    ":" for named parameters when a record is deleted without a trigger (archived records).
+    """
+    return [
+        f'''UPDATE transcription_daily_stats SET
+            record_count = record_count - 1,
+            total_duration = total_duration - COALESCE({row}duration, 0),
+            speech_ratio_sum = speech_ratio_sum - COALESCE({row}speech_ratio, 0),
+            speech_ratio_count = speech_ratio_count - ({row}speech_ratio IS NOT NULL)
+        WHERE day = date({row}created_at)''',
+        f"DELETE FROM transcription_daily_stats WHERE day = date({row}created_at) AND record_count <= 0",
+        f'''UPDATE transcription_format_stats SET record_count = record_count - 1
+        WHERE day = date({row}created_at) AND audio_format = COALESCE({row}audio_format, 'unknown')''',
+        f'''DELETE FROM transcription_format_stats
+        WHERE day = date({row}created_at) AND audio_format = COALESCE({row}audio_format, 'unknown') AND record_count <= 0'''
+    ]
+
+
+# Trigger body and the statements run for archived records come from the same helper, so they cannot drift apart
+STATS_REMOVE_OLD = "".join(f"{statement};\n" for statement in stats_remove_statements("OLD."))
+STATS_REMOVE_ROW = stats_remove_statements(":")
+
+# Columns copied to the archive database (archive.transcription_archive), the transcription is stored compressed
+ARCHIVE_COLUMNS = [
+    "id", "file_name", "audio_format", "channel", "sample_rate", "duration", "transcription", "created_at",
+    "audio_sha256", "pcm_sha256", "speech_ratio", "duplicate_of", "model"
+]
+
 
 class Database(BaseModel):
     conn: sqlite3.Connection
@@ -36,11 +137,14 @@ class Database(BaseModel):
 
 def get_connection(db_path: str):
     """Helper function to create a database connection with row factory"""
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, timeout=float(os.getenv("SQLITE_BUSY_TIMEOUT", "30")))
     conn.row_factory = sqlite3.Row
     return conn
 
 
+_service_tokens = itertools.count(1)
+
+
 class SQLiteService:
     _instance = None  # Class variable for singleton instance
     
@@ -49,6 +153,13 @@ class SQLiteService:
         self.db_path = root_dir / db_path
         self._initialized = False
         self.db = None
+        self._token = next(_service_tokens)  # Distinguishes generations of different instances (e.g. after fork)
+        self._generation = 0  # Bumped on every committed change of the records by this instance
+        
+        ## Archive database of the hot/cold retention job, attached as schema "archive" when first needed
+        archive_name = os.getenv("RETENTION_ARCHIVE_DB")
+        self.archive_path = root_dir / archive_name if archive_name else Path(self.db_path).with_name(f"{Path(self.db_path).stem}_archive.db")
+        self._archive_codec = None
 
 
     @classmethod
@@ -59,6 +170,15 @@ class SQLiteService:
         return cls._instance
 
 
+    @classmethod
+    def _reset_after_fork(cls):
+        """
+        Drop the inherited singleton in a forked child. The parent's connection must not be used (or closed) in the child,
+        the next get_instance() call opens a fresh connection for this process.
+        """
+        cls._instance = None
+
+
     def _initialize_db(self):
         """Initialize the SQLite database and create transcription_result table"""
         
@@ -75,6 +195,9 @@ class SQLiteService:
             cursor = conn.cursor()
             self.db = Database(conn=conn, cursor=cursor) # Create a Database object to hold the connection and cursor, enabling access to the database for CRUD operations
 
+            # WAL lets readers in other workers proceed while one worker writes
+            cursor.execute(f"PRAGMA journal_mode={os.getenv('SQLITE_JOURNAL_MODE', 'WAL')}")
+
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS transcription_result (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -88,6 +211,8 @@ class SQLiteService:
                 )
             ''')
             
+            self._migrate(cursor)
+            
             conn.commit()
             logger.info(f"SQLite database initialized at {self.db_path}")
             self._initialized = True
@@ -97,6 +222,348 @@ class SQLiteService:
             raise
 
 
+    def _migrate(self, cursor: sqlite3.Cursor):
+        """Bring an existing database up to the current schema. Every step is idempotent."""
+        
+        self._ensure_column(cursor, "transcription_result", "audio_sha256", "TEXT")
+        self._ensure_column(cursor, "transcription_result", "pcm_sha256", "TEXT")
+        
+        # Alternative transcripts produced by re-transcription (cli/backfill.py --as-version)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transcription_version (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                transcription_id INTEGER NOT NULL,
+                model TEXT,
+                vad_threshold REAL,
+                transcription TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transcription_version_transcription_id ON transcription_version (transcription_id)")
+        
+        # Daily statistics rollups, maintained by triggers
+        self._ensure_column(cursor, "transcription_result", "speech_ratio", "REAL")
+        self._create_retention_state(cursor)
+        self._create_stats_rollups(cursor)
+        
+        # Vocabulary and trigram index for fuzzy search
+        self._create_search_index(cursor)
+        
+        # Acoustic fingerprints for near-duplicate detection
+        self._ensure_column(cursor, "transcription_result", "duplicate_of", "INTEGER")
+        self._ensure_column(cursor, "transcription_result", "model", "TEXT")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS audio_fingerprint (
+                record_id INTEGER PRIMARY KEY,
+                frame_count INTEGER NOT NULL,
+                fingerprint BLOB NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS audio_fingerprint_hash (
+                sub_hash INTEGER NOT NULL,
+                record_id INTEGER NOT NULL,
+                frame_offset INTEGER NOT NULL,
+                PRIMARY KEY (sub_hash, record_id, frame_offset)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audio_fingerprint_hash_record_id ON audio_fingerprint_hash (record_id)")
+        
+        # Composite indexes for metadata filters, ordered like the keyset pagination (created_at, then id as the rowid)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transcription_result_created_at ON transcription_result (created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transcription_result_format_created_at ON transcription_result (audio_format, created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transcription_result_rate_channel_created_at ON transcription_result (sample_rate, channel, created_at)")
+
+
+    def _create_search_index(self, cursor: sqlite3.Cursor):
+        """Create the fuzzy search index tables. Existing records are indexed once, when the tables are first created."""
+        
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'transcription_word'")
+        seed_required = cursor.fetchone() is None
+        
+        cursor.executescript('''
+            CREATE TABLE IF NOT EXISTS transcription_word (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                word TEXT NOT NULL UNIQUE,
+                doc_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS transcription_word_trigram (
+                trigram TEXT NOT NULL,
+                word_id INTEGER NOT NULL,
+                PRIMARY KEY (trigram, word_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS transcription_trigram_stats (
+                trigram TEXT PRIMARY KEY,
+                word_count INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS transcription_word_posting (
+                word_id INTEGER NOT NULL,
+                record_id INTEGER NOT NULL,
+                PRIMARY KEY (word_id, record_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_transcription_word_posting_record_id ON transcription_word_posting (record_id);
+        ''')
+        
+        if seed_required:
+            records = cursor.execute("SELECT id, file_name, transcription FROM transcription_result").fetchall()
+            for record in records:
+                self._index_words(cursor, record["id"], record["file_name"], record["transcription"])
+            logger.info(f"Built fuzzy search index for {len(records)} existing records")
+
+
+    def _index_words(self, cursor: sqlite3.Cursor, record_id: int, file_name: str, transcription: str):
+        """Add a record to the fuzzy search index, new words are added to the vocabulary. The caller commits."""
+        
+        words = set(split_words(f"{file_name or ''} {transcription or ''}"))
+        if not words:
+            return
+        
+        placeholders = ", ".join("?" for _ in words)
+        cursor.execute(f"SELECT id, word FROM transcription_word WHERE word IN ({placeholders})", list(words))
+        word_ids = {row[1]: row[0] for row in cursor.fetchall()}
+        
+        for word in words - word_ids.keys():
+            cursor.execute("INSERT INTO transcription_word (word) VALUES (?)", (word,))
+            word_ids[word] = cursor.lastrowid
+            trigrams = word_trigrams(word)
+            cursor.executemany(
+                "INSERT INTO transcription_word_trigram (trigram, word_id) VALUES (?, ?)",
+                [(trigram, word_ids[word]) for trigram in trigrams]
+            )
+            cursor.executemany(
+                """INSERT INTO transcription_trigram_stats (trigram, word_count) VALUES (?, 1)
+                   ON CONFLICT (trigram) DO UPDATE SET word_count = word_count + 1""",
+                [(trigram,) for trigram in trigrams]
+            )
+        
+        cursor.executemany(
+            "INSERT OR IGNORE INTO transcription_word_posting (word_id, record_id) VALUES (?, ?)",
+            [(word_id, record_id) for word_id in word_ids.values()]
+        )
+        cursor.executemany("UPDATE transcription_word SET doc_count = doc_count + 1 WHERE id = ?", [(word_id,) for word_id in word_ids.values()])
+
+
+    def _unindex_words(self, cursor: sqlite3.Cursor, record_id: int):
+        """
+        Remove a record from the fuzzy search index. Words no other record uses leave the vocabulary together with their
+        trigrams, so similar word lookups do not scan dead entries. The caller commits.
+        """
+        
+        cursor.execute("SELECT word_id FROM transcription_word_posting WHERE record_id = ?", (record_id,))
+        word_ids = [(row[0],) for row in cursor.fetchall()]
+        cursor.executemany("UPDATE transcription_word SET doc_count = doc_count - 1 WHERE id = ?", word_ids)
+        cursor.execute("DELETE FROM transcription_word_posting WHERE record_id = ?", (record_id,))
+        if not word_ids:
+            return
+        
+        ## Drop the words whose document count reached zero, with their trigrams
+        placeholders = ", ".join("?" for _ in word_ids)
+        cursor.execute(
+            f"SELECT id FROM transcription_word WHERE doc_count <= 0 AND id IN ({placeholders})",
+            [word_id for word_id, in word_ids]
+        )
+        dead_ids = [(row[0],) for row in cursor.fetchall()]
+        if not dead_ids:
+            return
+        
+        placeholders = ", ".join("?" for _ in dead_ids)
+        cursor.execute(
+            f"SELECT trigram FROM transcription_word_trigram WHERE word_id IN ({placeholders})",
+            [word_id for word_id, in dead_ids]
+        )
+        trigrams = [(row[0],) for row in cursor.fetchall()]
+        cursor.executemany("UPDATE transcription_trigram_stats SET word_count = word_count - 1 WHERE trigram = ?", trigrams)
+        cursor.executemany("DELETE FROM transcription_trigram_stats WHERE trigram = ? AND word_count <= 0", trigrams)
+        cursor.executemany("DELETE FROM transcription_word_trigram WHERE word_id = ?", dead_ids)
+        cursor.executemany("DELETE FROM transcription_word WHERE id = ?", dead_ids)
+
+
+    def _create_retention_state(self, cursor: sqlite3.Cursor):
+        """
+        Single row state of the hot/cold retention job: the archiving flag (set only inside the transaction moving a
+        batch, so other connections never see it), the (created_at, id) of the newest archived record and counters.
+        """
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transcription_retention (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                archiving INTEGER NOT NULL DEFAULT 0,
+                watermark TEXT,
+                watermark_id INTEGER,
+                archived_total INTEGER NOT NULL DEFAULT 0,
+                last_archived_at TEXT
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO transcription_retention (id) VALUES (1)")
+
+
+    def _create_stats_rollups(self, cursor: sqlite3.Cursor):
+        """Create rollup tables and the triggers keeping them up to date. Rollups are seeded from existing records once."""
+        
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'transcription_daily_stats'")
+        seed_required = cursor.fetchone() is None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transcription_daily_stats (
+                day TEXT PRIMARY KEY,
+                record_count INTEGER NOT NULL DEFAULT 0,
+                total_duration REAL NOT NULL DEFAULT 0,
+                speech_ratio_sum REAL NOT NULL DEFAULT 0,
+                speech_ratio_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transcription_format_stats (
+                day TEXT NOT NULL,
+                audio_format TEXT NOT NULL,
+                record_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, audio_format)
+            ) WITHOUT ROWID
+        ''')
+        
+        ## Records moved to the archive keep counting, the delete trigger is suspended while the retention job moves them.
+        ## Databases created before hot/cold retention have a delete trigger without this condition, it is replaced.
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_transcription_stats_delete'")
+        delete_trigger = cursor.fetchone()
+        if delete_trigger is not None and "transcription_retention" not in delete_trigger[0]:
+            cursor.execute("DROP TRIGGER trg_transcription_stats_delete")
+        
+        cursor.executescript(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_transcription_stats_insert AFTER INSERT ON transcription_result
+            BEGIN {STATS_ADD_NEW} END;
+            
+            CREATE TRIGGER IF NOT EXISTS trg_transcription_stats_delete AFTER DELETE ON transcription_result
+            WHEN (SELECT archiving FROM transcription_retention) IS NOT 1
+            BEGIN {STATS_REMOVE_OLD} END;
+            
+            CREATE TRIGGER IF NOT EXISTS trg_transcription_stats_update
+            AFTER UPDATE OF created_at, duration, speech_ratio, audio_format ON transcription_result
+            BEGIN {STATS_REMOVE_OLD} {STATS_ADD_NEW} END;
+        ''')
+        
+        if seed_required:
+            self._rebuild_stats(cursor)
+            logger.info("Seeded transcription statistics rollups from existing records")
+
+
+    def _rebuild_stats(self, cursor: sqlite3.Cursor):
+        """
+        Recompute the rollups from the records table (full scan), used for seeding and by rebuild_stats().
+        Archived records are included when the archive is attached.
+        """
+        
+        source = "transcription_result"
+        if self._archive_codec is not None:
+            columns = "created_at, duration, speech_ratio, audio_format"
+            source = f"(SELECT {columns} FROM transcription_result UNION ALL SELECT {columns} FROM archive.transcription_archive)"
+        
+        cursor.execute("DELETE FROM transcription_daily_stats")
+        cursor.execute("DELETE FROM transcription_format_stats")
+        cursor.execute(f'''
+            INSERT INTO transcription_daily_stats (day, record_count, total_duration, speech_ratio_sum, speech_ratio_count)
+            SELECT date(created_at), COUNT(*), SUM(COALESCE(duration, 0)), SUM(COALESCE(speech_ratio, 0)), COUNT(speech_ratio)
+            FROM {source}
+            GROUP BY date(created_at)
+        ''')
+        cursor.execute(f'''
+            INSERT INTO transcription_format_stats (day, audio_format, record_count)
+            SELECT date(created_at), COALESCE(audio_format, 'unknown'), COUNT(*)
+            FROM {source}
+            GROUP BY date(created_at), COALESCE(audio_format, 'unknown')
+        ''')
+
+
+    def _attach_archive(self, create: bool = False) -> bool:
+        """
+        Attach the archive database as schema "archive" to the shared connection, creating its tables if needed.
+        Only done once a query reaches archived records or records are moved. Returns False when no archive exists
+        yet and create is False.
+        """
+        
+        if self._archive_codec is not None:
+            return True
+        if not create and not Path(self.archive_path).exists():
+            return False
+        
+        cursor = self.db.conn.cursor()
+        cursor.execute("ATTACH DATABASE ? AS archive", (str(self.archive_path),))
+        cursor.execute(f"PRAGMA archive.journal_mode={os.getenv('SQLITE_JOURNAL_MODE', 'WAL')}")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.transcription_archive (
+                id INTEGER PRIMARY KEY,
+                file_name TEXT,
+                audio_format TEXT,
+                channel INTEGER,
+                sample_rate INTEGER,
+                duration REAL,
+                transcription BLOB,
+                created_at TEXT,
+                audio_sha256 TEXT,
+                pcm_sha256 TEXT,
+                speech_ratio REAL,
+                duplicate_of INTEGER,
+                model TEXT,
+                codec TEXT NOT NULL
+            )
+        ''')
+        self._ensure_column(cursor, "archive.transcription_archive", "model", "TEXT")
+        cursor.execute("CREATE INDEX IF NOT EXISTS archive.idx_transcription_archive_created_at ON transcription_archive (created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS archive.idx_transcription_archive_format_created_at ON transcription_archive (audio_format, created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS archive.idx_transcription_archive_rate_channel_created_at ON transcription_archive (sample_rate, channel, created_at)")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.transcription_archive_dictionary (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                dictionary BLOB NOT NULL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self.db.conn.commit()
+        
+        self._archive_codec = ArchiveCodec()
+        self._load_archive_dictionaries(cursor, self._archive_codec)
+        logger.info(f"Attached archive database {self.archive_path}")
+        return True
+
+
+    def _load_archive_dictionaries(self, cursor: sqlite3.Cursor, codec: ArchiveCodec):
+        """Add compression dictionaries of the archive that the codec does not know yet (e.g. trained by another worker)"""
+        
+        cursor.execute("SELECT id, dictionary FROM archive.transcription_archive_dictionary")
+        for dictionary_id, data in cursor.fetchall():
+            if dictionary_id not in codec.dictionaries:
+                codec.add_dictionary(dictionary_id, data)
+
+
+    def _archive_reaches(self, cursor: sqlite3.Cursor, start: str = None) -> bool:
+        """Whether records created at or after start (None: any time) may include archived records"""
+        
+        cursor.execute("SELECT watermark FROM transcription_retention")
+        row = cursor.fetchone()
+        return row is not None and row[0] is not None and (start is None or start <= row[0])
+
+
+    def _archived_records(self, rows, cursor: sqlite3.Cursor, codec: ArchiveCodec):
+        """Rows of archive.transcription_archive as records, with the transcript decompressed"""
+        
+        records = [dict(row) for row in rows]
+        if any(codec.requires_dictionary(record["codec"]) for record in records):
+            self._load_archive_dictionaries(cursor, codec)
+        for record in records:
+            record["transcription"] = codec.decompress(record["transcription"], record.pop("codec"))
+        return records
+
+
+    def _ensure_column(self, cursor: sqlite3.Cursor, table: str, column: str, definition: str):
+        """Add a column to a table if it does not exist yet"""
+        
+        schema, _, name = table.rpartition(".")
+        cursor.execute(f"PRAGMA {schema + '.' if schema else ''}table_info({name})")
+        existing_columns = [row[1] for row in cursor.fetchall()]
+        if column not in existing_columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            logger.info(f"Migrated {table}: added column {column}")
+
+
     async def insert_transcription(
         self,
         file_name: str,
@@ -104,28 +571,71 @@ class SQLiteService:
         channel: int,
         sample_rate: int,
         duration: float,
-        transcription: str
+        transcription: str,
+        audio_sha256: str = None,
+        pcm_sha256: str = None,
+        speech_ratio: float = None,
+        duplicate_of: int = None,
+        model: str = None
     ):
-        """Insert a transcription record with all metadata"""
+        """Insert a transcription record with all metadata. Statistics rollups are updated by triggers."""
         
         try:
             ## Using parameterized input ? to prevent SQL Injection
             self.db.cursor.execute(
                 """INSERT INTO transcription_result 
-                   (file_name, audio_format, channel, sample_rate, duration, transcription)
-                   VALUES (?, ?, ?, ?, ?, ?)""",
-                (file_name, audio_format, channel, sample_rate, duration, transcription)
+                   (file_name, audio_format, channel, sample_rate, duration, transcription, audio_sha256, pcm_sha256, speech_ratio, duplicate_of, model)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (file_name, audio_format, channel, sample_rate, duration, transcription, audio_sha256, pcm_sha256, speech_ratio, duplicate_of, model)
             )
+            record_id = self.db.cursor.lastrowid
+            self._index_words(self.db.conn.cursor(), record_id, file_name, transcription)
             self.db.conn.commit()
-            return self.db.cursor.lastrowid
+            self._generation += 1
+            return record_id
                 
         except Exception as e:
+            self.db.conn.rollback()
             logger.error(f"Failed to insert transcription: {str(e)}")
             return None
 
 
+    async def data_generation(self):
+        """
+        Token that changes whenever the records may have changed, used to invalidate cached query results.
+        Combines a counter of the changes committed through this instance with PRAGMA data_version, which changes
+        when another connection (another worker process, a CLI tool) commits to the database.
+        """
+        
+        data_version = self.db.conn.execute("PRAGMA data_version").fetchone()[0]
+        return (self._token, self._generation, data_version)
+
+
+    async def get_transcription(self, record_id: int):
+        """Get a single transcription by ID from the hot table, then the archive. None if it does not exist."""
+        
+        try:
+            self.db.cursor.execute("SELECT * FROM transcription_result WHERE id = ?", (record_id,))
+            record = self.db.cursor.fetchone()
+            if record:
+                return dict(record)
+            
+            if self._archive_reaches(self.db.conn.cursor()) and self._attach_archive():
+                self.db.cursor.execute("SELECT * FROM archive.transcription_archive WHERE id = ?", (record_id,))
+                archived = self._archived_records(self.db.cursor.fetchall(), self.db.conn.cursor(), self._archive_codec)
+                return archived[0] if archived else None
+            return None
+        
+        except Exception as e:
+            logger.error(f"Failed to get transcription {record_id}: {str(e)}")
+            return None
+
+
     async def get_all_transcriptions(self):
-        """Get all transcriptions ordered by creation date descending"""
+        """
+        Get all transcriptions of the hot table ordered by creation date descending. Archived records are only read
+        page by page through query_transcriptions(), never decompressed as a whole.
+        """
         
         try:
             self.db.cursor.execute("SELECT * FROM transcription_result ORDER BY created_at DESC")
@@ -159,18 +669,602 @@ class SQLiteService:
             return []
 
 
+    async def fuzzy_search_transcriptions(self, search_term: str, threshold: float = 0.5, limit: int = 50):
+        """
+        Typo tolerant search by file name or transcription content, ranked by similarity score (0.0 to 1.0).
+        
+        1) Every query word is matched against the vocabulary (see _similar_words), not against the records
+        2) A record scores the average, over the query words, of its best matching word (0.0 for a query word without
+           a match), records below threshold are dropped. Ties are ranked by most recent record first.
+        3) Only posting lists of matched words are read. With a single word query they are read best match first,
+           newest record first, and reading stops once limit records are found
+        """
+        
+        query_words = list(dict.fromkeys(split_words(search_term)))
+        if not query_words:
+            return []
+        
+        try:
+            matches = [self._similar_words(word, threshold) for word in query_words]
+            if len(query_words) == 1:
+                scores = self._rank_single_word(matches[0], limit)
+            else:
+                scores = self._rank_multiple_words(matches, threshold, limit)
+            if not scores:
+                return []
+            
+            self.db.cursor.execute(
+                f"SELECT * FROM transcription_result WHERE id IN ({', '.join('?' for _ in scores)})",
+                list(scores)
+            )
+            results = [dict(record, score=round(scores[record["id"]], 4)) for record in self.db.cursor.fetchall()]
+            results.sort(key=lambda record: (-record["score"], -record["id"]))
+            return results
+        
+        except Exception as e:
+            logger.error(f"Failed to fuzzy search transcriptions: {str(e)}")
+            return []
+
+
+    def _similar_words(self, word: str, threshold: float):
+        """
+        Vocabulary words whose trigram similarity with word reaches threshold, as {word_id: similarity}.
+        A word can only reach the threshold if it shares at least ceil(threshold * n) of the n trigrams of the query word,
+        so it must contain one of the (n - ceil(threshold * n) + 1) rarest ones: only their posting lists are read.
+        """
+        
+        trigrams = word_trigrams(word)
+        min_shared = max(1, math.ceil(threshold * len(trigrams)))
+        
+        ## Rarest trigrams first, trigrams never seen have no posting list and are the rarest of all
+        self.db.cursor.execute(
+            f"SELECT trigram, word_count FROM transcription_trigram_stats WHERE trigram IN ({', '.join('?' for _ in trigrams)})",
+            list(trigrams)
+        )
+        word_counts = {row[0]: row[1] for row in self.db.cursor.fetchall()}
+        by_rarity = sorted(trigrams, key=lambda trigram: word_counts.get(trigram, 0))
+        prefix = [trigram for trigram in by_rarity[:len(trigrams) - min_shared + 1] if word_counts.get(trigram, 0) > 0]
+        if not prefix:
+            return {}
+        
+        self.db.cursor.execute(
+            f"""
+                SELECT id, word FROM transcription_word
+                WHERE doc_count > 0
+                AND id IN (SELECT word_id FROM transcription_word_trigram WHERE trigram IN ({', '.join('?' for _ in prefix)}))
+            """,
+            prefix
+        )
+        matches = {}
+        for word_id, candidate in self.db.cursor.fetchall():
+            score = similarity(trigrams, word_trigrams(candidate))
+            if score >= threshold:
+                matches[word_id] = score
+        return matches
+
+
+    def _rank_single_word(self, matches: dict, limit: int):
+        """Top records for a single query word as {record_id: score}, reading posting lists best match first"""
+        
+        scores = {}
+        for score in sorted(set(matches.values()), reverse=True):
+            record_ids = set()
+            for word_id in [word_id for word_id, word_score in matches.items() if word_score == score]:
+                self.db.cursor.execute(
+                    "SELECT record_id FROM transcription_word_posting WHERE word_id = ? ORDER BY record_id DESC LIMIT ?",
+                    (word_id, limit)
+                )
+                record_ids.update(row[0] for row in self.db.cursor.fetchall())
+            
+            for record_id in sorted(record_ids - scores.keys(), reverse=True)[:limit - len(scores)]:
+                scores[record_id] = score
+            if len(scores) >= limit:
+                break
+        return scores
+
+
+    def _rank_multiple_words(self, matches: list, threshold: float, limit: int):
+        """Top records for several query words as {record_id: score}, aggregated over the posting lists of all matches"""
+        
+        values = [(word_id, index, score) for index, word_matches in enumerate(matches) for word_id, score in word_matches.items()]
+        if not values:
+            return {}
+        
+        self.db.cursor.execute(
+            f"""
+                WITH word_match (word_id, query_index, score) AS (VALUES {', '.join('(?, ?, ?)' for _ in values)})
+                SELECT record_id, SUM(best_score) / ? AS score
+                FROM (
+                    SELECT transcription_word_posting.record_id, word_match.query_index, MAX(word_match.score) AS best_score
+                    FROM word_match
+                    JOIN transcription_word_posting ON transcription_word_posting.word_id = word_match.word_id
+                    GROUP BY transcription_word_posting.record_id, word_match.query_index
+                )
+                GROUP BY record_id
+                HAVING score >= ?
+                ORDER BY score DESC, record_id DESC
+                LIMIT ?
+            """,
+            [value for row in values for value in row] + [len(matches), threshold, limit]
+        )
+        return {row[0]: row[1] for row in self.db.cursor.fetchall()}
+
+
+    def _metadata_query(
+        self,
+        audio_format: str = None,
+        sample_rate: int = None,
+        channel: int = None,
+        min_duration: float = None,
+        max_duration: float = None,
+        start: str = None,
+        end: str = None,
+        after: tuple = None,
+        limit: int = 100,
+        archive: bool = False
+    ):
+        """
+        Build the SELECT (and parameters) of query_transcriptions. Equality filters come first so the composite
+        indexes (audio_format, created_at) and (sample_rate, channel, created_at) serve both the filter and the order.
+        With archive, the same query on archive.transcription_archive, which has the same indexes.
+        """
+        
+        clauses, params = [], []
+        for column, value in (("audio_format", audio_format), ("sample_rate", sample_rate), ("channel", channel)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if min_duration is not None:
+            clauses.append("duration >= ?")
+            params.append(min_duration)
+        if max_duration is not None:
+            clauses.append("duration <= ?")
+            params.append(max_duration)
+        if start:
+            clauses.append("created_at >= ?")
+            params.append(start)
+        if end:
+            clauses.append("created_at < ?")
+            params.append(end)
+        if after is not None:
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend(after)
+        
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        table = "archive.transcription_archive" if archive else "transcription_result"
+        return f"SELECT * FROM {table} {where} ORDER BY created_at DESC, id DESC LIMIT ?", params + [limit]
+
+
+    async def query_transcriptions(self, after: tuple = None, limit: int = 100, **filters):
+        """
+        Get records matching all given metadata filters (see _metadata_query), newest first, one page at a time.
+        after is the (created_at, id) keyset of the last record of the previous page, None for the first page.
+        Returns (records, next_after): next_after is the keyset to continue from, None on the last page.
+        
+        Archived records are all older than the records in the hot table, so a page continues in the archive once the
+        hot table is exhausted. The archive is only read when the start of the date range reaches into it.
+        """
+        
+        ## One extra row tells whether another page follows
+        sql, params = self._metadata_query(after=after, limit=limit + 1, **filters)
+        self.db.cursor.execute(sql, params)
+        records = [dict(record) for record in self.db.cursor.fetchall()]
+        
+        if len(records) <= limit and self._archive_reaches(self.db.conn.cursor(), filters.get("start")) and self._attach_archive():
+            sql, params = self._metadata_query(after=after, limit=limit + 1 - len(records), archive=True, **filters)
+            self.db.cursor.execute(sql, params)
+            records += self._archived_records(self.db.cursor.fetchall(), self.db.conn.cursor(), self._archive_codec)
+        
+        if len(records) <= limit:
+            return records, None
+        records = records[:limit]
+        return records, (records[-1]["created_at"], records[-1]["id"])
+
+
+    def _backfill_filters(self, since: str = None, until: str = None, audio_format: str = None, ids: list = None):
+        """Build the WHERE clause (without the keyword) and parameters for selecting records to re-transcribe"""
+        
+        clauses, params = [], []
+        if since:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if audio_format:
+            clauses.append("audio_format = ?")
+            params.append(audio_format)
+        if ids:
+            clauses.append(f"id IN ({', '.join('?' for _ in ids)})")
+            params.extend(ids)
+        return " AND ".join(clauses) or "1 = 1", params
+
+
+    async def count_backfill_candidates(self, after_id: int = 0, **filters) -> int:
+        """Count records matching the backfill filters with an id greater than after_id"""
+        
+        where, params = self._backfill_filters(**filters)
+        self.db.cursor.execute(
+            f"SELECT COUNT(*) FROM transcription_result WHERE id > ? AND {where}",
+            [after_id] + params
+        )
+        return self.db.cursor.fetchone()[0]
+
+
+    async def get_backfill_candidates(self, after_id: int, limit: int, **filters):
+        """
+        Get the next page of records to re-transcribe, in ascending id order so progress can be checkpointed by id
+        """
+        
+        where, params = self._backfill_filters(**filters)
+        self.db.cursor.execute(
+            f"""
+                SELECT id, file_name, audio_format, audio_sha256, pcm_sha256
+                FROM transcription_result
+                WHERE id > ? AND {where}
+                ORDER BY id ASC
+                LIMIT ?
+            """,
+            [after_id] + params + [limit]
+        )
+        return [dict(record) for record in self.db.cursor.fetchall()]
+
+
+    async def apply_backfill_batch(self, results: list, model: str, vad_threshold: float, as_version: bool = False) -> int:
+        """
+        Write a batch of re-transcription results in a single transaction.
+        results: list of (record_id, transcription) tuples.
+        With as_version, the new text is stored in transcription_version alongside the current transcript,
+        otherwise the transcript of the record is replaced.
+        """
+        
+        if not results:
+            return 0
+        
+        try:
+            with self.db.conn:
+                if as_version:
+                    self.db.conn.executemany(
+                        """INSERT INTO transcription_version (transcription_id, model, vad_threshold, transcription)
+                           VALUES (?, ?, ?, ?)""",
+                        [(record_id, model, vad_threshold, text) for record_id, text in results]
+                    )
+                else:
+                    self.db.conn.executemany(
+                        "UPDATE transcription_result SET transcription = ?, model = ? WHERE id = ?",
+                        [(text, model, record_id) for record_id, text in results]
+                    )
+                    cursor = self.db.conn.cursor()
+                    for record_id, text in results:
+                        cursor.execute("SELECT file_name FROM transcription_result WHERE id = ?", (record_id,))
+                        record = cursor.fetchone()
+                        self._unindex_words(cursor, record_id)
+                        if record is not None:
+                            self._index_words(cursor, record_id, record["file_name"], text)
+                    self._generation += 1
+            return len(results)
+        
+        except Exception as e:
+            logger.error(f"Failed to write backfill batch: {str(e)}")
+            raise
+
+
+    async def get_daily_stats(self, start: str = None, end: str = None):
+        """
+        Get per day statistics between start (inclusive) and end (exclusive) days, formatted YYYY-MM-DD.
+        Reads only the rollup tables, the cost grows with the number of days and not with the number of records.
+        """
+        
+        clauses, params = [], []
+        if start:
+            clauses.append("day >= ?")
+            params.append(start)
+        if end:
+            clauses.append("day < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        
+        try:
+            self.db.cursor.execute(
+                f"""
+                    SELECT day, record_count, total_duration, speech_ratio_sum, speech_ratio_count
+                    FROM transcription_daily_stats {where}
+                    ORDER BY day DESC
+                """,
+                params
+            )
+            days = [dict(record) for record in self.db.cursor.fetchall()]
+            
+            self.db.cursor.execute(
+                f"SELECT day, audio_format, record_count FROM transcription_format_stats {where}",
+                params
+            )
+            format_mix = {}
+            for record in self.db.cursor.fetchall():
+                format_mix.setdefault(record["day"], {})[record["audio_format"]] = record["record_count"]
+            
+            for day in days:
+                day["formats"] = format_mix.get(day["day"], {})
+            return days
+        
+        except Exception as e:
+            logger.error(f"Failed to get transcription statistics: {str(e)}")
+            return []
+
+
+    async def rebuild_stats(self):
+        """Recompute the statistics rollups from all records, including archived records, in a single transaction"""
+        
+        try:
+            self._attach_archive()
+            with self.db.conn:
+                self._rebuild_stats(self.db.conn.cursor())
+            logger.info("Transcription statistics rollups rebuilt")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to rebuild transcription statistics: {str(e)}")
+            return False
+
+
+    def stream_transcriptions(self, columns: list, start: str = None, end: str = None, chunk_size: int = 1000):
+        """
+        Yield transcription rows (as tuples, archived records first, then in id order) in chunks of chunk_size, for exports of any size.
+        Uses a dedicated read-only connection so a long export never holds the shared cursor. The connection may be
+        iterated from different threads (e.g. by a streaming response), which is safe because iteration is sequential.
+        """
+        
+        clauses, params = [], []
+        if start:
+            clauses.append("created_at >= ?")
+            params.append(start)
+        if end:
+            clauses.append("created_at < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        try:
+            ## Archived records (older, lower ids) first, when the date range reaches into the archive
+            if self._archive_reaches(conn.cursor(), start) and Path(self.archive_path).exists():
+                conn.execute("ATTACH DATABASE ? AS archive", (f"file:{self.archive_path}?mode=ro",))
+                codec = ArchiveCodec()
+                self._load_archive_dictionaries(conn.cursor(), codec)
+                transcription_index = columns.index("transcription") if "transcription" in columns else None
+                
+                cursor = conn.execute(
+                    f"SELECT {', '.join(columns)}, codec FROM archive.transcription_archive {where} ORDER BY id ASC",
+                    params
+                )
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    if transcription_index is not None:
+                        rows = [
+                            row[:transcription_index] + (codec.decompress(row[transcription_index], row[-1]),) + row[transcription_index + 1:-1]
+                            for row in rows
+                        ]
+                    else:
+                        rows = [row[:-1] for row in rows]
+                    yield rows
+            
+            cursor = conn.execute(
+                f"SELECT {', '.join(columns)} FROM transcription_result {where} ORDER BY id ASC",
+                params
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+
+    async def insert_fingerprint(self, record_id: int, fingerprint: bytes, hashes: list) -> bool:
+        """
+        Store the acoustic fingerprint of a record and its inverted index entries in one transaction.
+        hashes: list of (sub_hash, frame_offset) tuples.
+        """
+        
+        try:
+            with self.db.conn:
+                self.db.conn.execute(
+                    "INSERT OR REPLACE INTO audio_fingerprint (record_id, frame_count, fingerprint) VALUES (?, ?, ?)",
+                    (record_id, len(fingerprint) // 4, fingerprint)
+                )
+                self.db.conn.executemany(
+                    "INSERT OR IGNORE INTO audio_fingerprint_hash (sub_hash, record_id, frame_offset) VALUES (?, ?, ?)",
+                    [(sub_hash, record_id, frame_offset) for sub_hash, frame_offset in hashes]
+                )
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to store fingerprint of transcription {record_id}: {str(e)}")
+            return False
+
+
+    async def find_fingerprint_hits(self, sub_hashes: list, batch_size: int = 500):
+        """Inverted index lookup, returns (sub_hash, record_id, frame_offset) rows for every matching sub-fingerprint"""
+        
+        hits = []
+        for start in range(0, len(sub_hashes), batch_size):
+            batch = sub_hashes[start:start + batch_size]
+            self.db.cursor.execute(
+                f"SELECT sub_hash, record_id, frame_offset FROM audio_fingerprint_hash WHERE sub_hash IN ({', '.join('?' for _ in batch)})",
+                batch
+            )
+            hits.extend(tuple(row) for row in self.db.cursor.fetchall())
+        return hits
+
+
+    async def get_fingerprints(self, record_ids: list):
+        """Full fingerprints of records as {record_id: bytes}"""
+        
+        if not record_ids:
+            return {}
+        self.db.cursor.execute(
+            f"SELECT record_id, fingerprint FROM audio_fingerprint WHERE record_id IN ({', '.join('?' for _ in record_ids)})",
+            record_ids
+        )
+        return {row[0]: row[1] for row in self.db.cursor.fetchall()}
+
+
+    def _delete_archived(self, cursor: sqlite3.Cursor, record_id: int) -> bool:
+        """Delete an archived record. No trigger covers the archive, so its rollup counts are removed here."""
+        
+        cursor.execute("SELECT created_at, duration, speech_ratio, audio_format FROM archive.transcription_archive WHERE id = ?", (record_id,))
+        record = cursor.fetchone()
+        if record is None:
+            return False
+        
+        cursor.execute("DELETE FROM archive.transcription_archive WHERE id = ?", (record_id,))
+        for statement in STATS_REMOVE_ROW:
+            cursor.execute(statement, dict(record))
+        return True
+
+
     async def delete_transcription(self, record_id: int) -> bool:
-        """Delete a transcription by ID"""
+        """Delete a transcription by ID, in the hot table or the archive"""
         
         try:
+            ## ATTACH is not possible inside the transaction of the delete, attach first
+            archived = self._archive_reaches(self.db.conn.cursor()) and self._attach_archive()
             self.db.cursor.execute("DELETE FROM transcription_result WHERE id = ?", (record_id,))
+            deleted = self.db.cursor.rowcount > 0
+            if not deleted and archived:
+                deleted = self._delete_archived(self.db.cursor, record_id)
+            self.db.cursor.execute("DELETE FROM transcription_version WHERE transcription_id = ?", (record_id,))
+            self._unindex_words(self.db.cursor, record_id)
+            self.db.cursor.execute("DELETE FROM audio_fingerprint WHERE record_id = ?", (record_id,))
+            self.db.cursor.execute("DELETE FROM audio_fingerprint_hash WHERE record_id = ?", (record_id,))
             self.db.conn.commit()
-            return self.db.cursor.rowcount > 0
+            self._generation += 1
+            return deleted
                 
         except Exception as e:
+            self.db.conn.rollback()
             logger.error(f"Failed to delete transcription {record_id}: {str(e)}")
             return False
 
+
+    async def archive_batch(self, cutoff: str, batch_size: int = 500) -> int:
+        """
+        Move up to batch_size of the oldest records created before cutoff to the archive database, in one short
+        transaction. Transcripts are compressed, the records leave the fuzzy search index and the fingerprint index,
+        statistics rollups keep counting them. Returns the number of records moved, 0 when none are left.
+        
+        SQLite commits each attached database file on its own in WAL mode, so a crash can leave a moved record in
+        both databases. Moves are idempotent (INSERT OR REPLACE), the next batch finishes the move.
+        """
+        
+        self._attach_archive(create=True)
+        codec = self._archive_codec
+        cursor = self.db.conn.cursor()
+        
+        try:
+            ## Take the write lock up front, the batch is small so writers wait at most one batch
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(
+                f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM transcription_result WHERE created_at < ? ORDER BY created_at, id LIMIT ?",
+                (cutoff, batch_size)
+            )
+            records = [dict(record) for record in cursor.fetchall()]
+            if not records:
+                self.db.conn.rollback()
+                return 0
+            
+            for record in records:
+                record["transcription"], record["codec"] = codec.compress(record["transcription"])
+            columns = ARCHIVE_COLUMNS + ["codec"]
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO archive.transcription_archive ({', '.join(columns)}) VALUES ({', '.join(':' + column for column in columns)})",
+                records
+            )
+            
+            ## Suspend the rollup delete trigger, moved records are still counted
+            ids = [(record["id"],) for record in records]
+            cursor.execute("UPDATE transcription_retention SET archiving = 1")
+            cursor.executemany("DELETE FROM transcription_result WHERE id = ?", ids)
+            for (record_id,) in ids:
+                self._unindex_words(cursor, record_id)
+            cursor.executemany("DELETE FROM audio_fingerprint WHERE record_id = ?", ids)
+            cursor.executemany("DELETE FROM audio_fingerprint_hash WHERE record_id = ?", ids)
+            
+            ## Records are moved oldest first, the last one is the newest archived record
+            cursor.execute(
+                """UPDATE transcription_retention SET
+                       archiving = 0, watermark = ?, watermark_id = ?,
+                       archived_total = archived_total + ?, last_archived_at = CURRENT_TIMESTAMP""",
+                (records[-1]["created_at"], records[-1]["id"], len(records))
+            )
+            self.db.conn.commit()
+            self._generation += 1
+            return len(records)
+        
+        except Exception as e:
+            self.db.conn.rollback()
+            logger.error(f"Failed to archive transcriptions: {str(e)}")
+            raise
+
+
+    async def train_archive_dictionary(self, cutoff: str, min_samples: int = 1000, size: int = 16384):
+        """
+        Train the compression dictionary of the archive on transcripts about to be archived (created before cutoff),
+        once at least min_samples are available. Returns the id of the dictionary in use, None when there is none yet.
+        """
+        
+        self._attach_archive(create=True)
+        cursor = self.db.conn.cursor()
+        self._load_archive_dictionaries(cursor, self._archive_codec)
+        if self._archive_codec.active_dictionary_id is not None:
+            return self._archive_codec.active_dictionary_id
+        
+        cursor.execute(
+            "SELECT transcription FROM transcription_result WHERE created_at < ? AND transcription != '' ORDER BY created_at, id LIMIT ?",
+            (cutoff, max(min_samples, 5000))
+        )
+        samples = [row[0] for row in cursor.fetchall()]
+        if len(samples) < min_samples:
+            return None
+        
+        try:
+            dictionary = ArchiveCodec.train_dictionary(samples, size)
+        except Exception as e:
+            logger.warning(f"Failed to train archive compression dictionary, archiving without: {str(e)}")
+            return None
+        
+        cursor.execute("INSERT INTO archive.transcription_archive_dictionary (dictionary) VALUES (?)", (dictionary,))
+        dictionary_id = cursor.lastrowid
+        self.db.conn.commit()
+        self._archive_codec.add_dictionary(dictionary_id, dictionary)
+        logger.info(f"Trained archive compression dictionary {dictionary_id} ({len(dictionary)} bytes) on {len(samples)} transcripts")
+        return dictionary_id
+
+
+    async def get_retention_status(self):
+        """Retention state: newest archived record, number of records moved, archive size and compression dictionary"""
+        
+        self.db.cursor.execute("SELECT watermark, watermark_id, archived_total, last_archived_at FROM transcription_retention")
+        row = self.db.cursor.fetchone()
+        status = dict(row) if row is not None else {}
+        
+        archive = Path(self.archive_path)
+        status["archive_path"] = str(archive)
+        status["archive_bytes"] = archive.stat().st_size if archive.exists() else 0
+        if archive.exists() and self._attach_archive():
+            self._load_archive_dictionaries(self.db.conn.cursor(), self._archive_codec)
+            status["dictionary_id"] = self._archive_codec.active_dictionary_id
+        else:
+            status["dictionary_id"] = None
+        return status
+
+
+# Ensure forked worker processes never reuse the parent's SQLite connection
+os.register_at_fork(after_in_child=SQLiteService._reset_after_fork)
+
+
 # Default db created will be transcriptions.db, so we'll include it as a fallback.
 def get_sqlite_service(db_path: str = "transcriptions.db"):
     return SQLiteService.get_instance(db_path)
@@ -0,0 +1,178 @@
+"""
+This module caches serialized results of the read endpoints (/data/transcriptions and /data/search).
+
+Key Responsibilities:
+1. Keep serialized response bodies and their ETag in a bounded LRU cache
+   - Keyed by endpoint and normalized query parameters (e.g. surrounding whitespace and ASCII case of the keyword)
+   - Bounded by entry count and total body size, least recently used entries are evicted first
+2. Invalidate cheaply by generation instead of tracking which entries a write affects
+   - Every entry remembers the database generation it was computed at (SQLiteService.data_generation)
+   - The generation changes on inserts, deletes and backfill updates of this process, and through PRAGMA data_version
+     on commits of other connections, so entries cached by one worker are not served after another worker wrote
+   - A lookup with a different generation is a miss and drops the stale entry
+3. Keep compressed variants of a cached body per content encoding (br, gzip)
+   - Compressed on the first hit that accepts the encoding, later hits send the stored bytes with the same ETag
+   - Count towards the size bound of their entry and are dropped with it
+4. Expose hit rate, stale lookups, compressions and evictions for dashboards
+
+Configuration (environment variables):
+- QUERY_CACHE_ENABLED: Set to 0 to disable the cache (default 1)
+- QUERY_CACHE_MAX_ENTRIES: Maximum number of cached results (default 256)
+- QUERY_CACHE_MAX_MB: Maximum total size of cached bodies and their compressed variants in megabytes (default 64).
+  Larger bodies are not cached
+"""
+
+import os
+import hashlib
+from collections import OrderedDict
+from pydantic import BaseModel, Field
+
+
+class CachedResult(BaseModel):
+    generation: tuple
+    body: bytes
+    etag: str
+    encoded: dict = Field(default_factory=dict)  # Content encoding -> compressed body
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(variant) for variant in self.encoded.values())
+
+
+def normalize_keyword(keyword: str, collapse_whitespace: bool = False) -> str:
+    """
+    Cache key form of a search keyword. LIKE matching is case-insensitive for ASCII only, so other keywords keep
+    their case. Inner whitespace is only collapsed where the search tokenizes the keyword (fuzzy search).
+    """
+
+    keyword = " ".join(keyword.split()) if collapse_whitespace else keyword.strip()
+    return keyword.lower() if keyword.isascii() else keyword
+
+
+class QueryCache:
+    _instance = None  # Class variable for singleton instance
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None, enabled: bool = None):
+        self.enabled = enabled if enabled is not None else os.getenv("QUERY_CACHE_ENABLED", "1") == "1"
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv("QUERY_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+        self._entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.compressions = 0
+
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+
+    @classmethod
+    def _reset_after_fork(cls):
+        """Generations are only comparable within the connection that produced them, a forked worker starts empty"""
+        cls._instance = None
+
+
+    def get(self, key: tuple, generation: tuple):
+        """Cached result for key computed at generation, None on a miss"""
+
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.generation != generation:
+            self._remove(key)
+            self.stale += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+
+    def put(self, key: tuple, generation: tuple, body: bytes) -> CachedResult:
+        """
+        Cache a serialized body computed at generation and return it with its ETag. The generation must be read
+        before running the query, so a write that lands during the query leaves the entry stale instead of wrong.
+        """
+
+        result = CachedResult(generation=generation, body=body, etag=f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+        if not self.enabled or len(body) > self.max_bytes:
+            return result
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = result
+        self.total_bytes += len(body)
+        self._evict()
+        return result
+
+
+    def encoded(self, key: tuple, entry: CachedResult, encoding: str, encode) -> bytes:
+        """
+        Body of a cached entry compressed with encoding, computed with encode(body, encoding) on first use. The variant
+        is only kept while entry is still the cached result for key (not replaced or evicted in the meantime).
+        """
+
+        variant = entry.encoded.get(encoding)
+        if variant is not None:
+            return variant
+
+        variant = encode(entry.body, encoding)
+        self.compressions += 1
+        if self._entries.get(key) is entry:
+            entry.encoded[encoding] = variant
+            self.total_bytes += len(variant)
+            self._evict()
+        return variant
+
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+
+    def _evict(self):
+        """Drop least recently used entries until both bounds hold"""
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+
+    def _remove(self, key: tuple):
+        self.total_bytes -= self._entries.pop(key).size
+
+
+    def snapshot(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "compressions": self.compressions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None
+        }
+
+
+os.register_at_fork(after_in_child=QueryCache._reset_after_fork)
+
+
+def get_query_cache():
+    """Get the singleton instance of QueryCache"""
+    return QueryCache.get_instance()
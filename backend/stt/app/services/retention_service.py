@@ -0,0 +1,112 @@
+"""
+This module keeps the transcription_result table small by moving old records to an archive database (hot/cold retention).
+
+Key Responsibilities:
+1. Move records older than RETENTION_DAYS to the archive database, oldest first
+   - Small batches, each a short write transaction, with a pause in between so uploads are never blocked for long
+   - Transcripts are stored compressed (zstd with a dictionary trained on earlier transcripts, see utils/archive_codec.py)
+2. Train the compression dictionary once enough transcripts are due for archiving
+3. Run periodically in the background of the application, or once from the command line (cli/retention.py)
+
+Reads stay transparent: the /data endpoints attach the archive only when the requested date range reaches records
+older than the newest archived record (see SQLiteService). Search, fuzzy search and duplicate detection cover the
+records in the hot table only.
+
+Configuration (environment variables):
+- RETENTION_DAYS: Age in days after which records are archived (default 0, retention disabled)
+- RETENTION_BATCH_SIZE: Records moved per transaction (default 500)
+- RETENTION_BATCH_PAUSE: Pause (seconds) between batches, lets waiting writers in (default 0.05)
+- RETENTION_INTERVAL: Time (seconds) between runs of the background job (default 3600)
+- RETENTION_DICT_SIZE_KB: Size of the trained compression dictionary in kilobytes (default 16)
+- RETENTION_DICT_MIN_SAMPLES: Transcripts required before a dictionary is trained (default 1000)
+- RETENTION_ARCHIVE_DB: Archive database file (default <database name>_archive.db next to the database)
+
+Every gunicorn worker runs its own background job. Batches are serialized by the database write lock and moves are
+idempotent, so this is safe, but enabling it in a single process (or running cli/retention.py from cron) is enough.
+"""
+
+import os
+import asyncio
+from datetime import datetime, timezone, timedelta
+from services.pysqlite_service import get_sqlite_service
+from utils.logger import logger
+
+
+class RetentionService:
+    _instance = None  # Class variable for singleton instance
+
+    def __init__(self, days: float = None, batch_size: int = None, batch_pause: float = None):
+        self.days = days if days is not None else float(os.getenv("RETENTION_DAYS", "0"))
+        self.batch_size = batch_size if batch_size is not None else int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+        self.batch_pause = batch_pause if batch_pause is not None else float(os.getenv("RETENTION_BATCH_PAUSE", "0.05"))
+        self.interval = float(os.getenv("RETENTION_INTERVAL", "3600"))
+        self.dictionary_size = int(float(os.getenv("RETENTION_DICT_SIZE_KB", "16")) * 1024)
+        self.dictionary_min_samples = int(os.getenv("RETENTION_DICT_MIN_SAMPLES", "1000"))
+
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+
+    @classmethod
+    def _reset_after_fork(cls):
+        """The background task belongs to the parent's event loop, a forked worker starts its own"""
+        cls._instance = None
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.days > 0
+
+
+    def cutoff(self, now: datetime = None) -> str:
+        """Records created before this timestamp are archived, formatted like created_at (UTC)"""
+
+        now = now or datetime.now(timezone.utc)
+        return (now - timedelta(days=self.days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+    async def run_once(self, now: datetime = None) -> int:
+        """Move every record older than the retention period to the archive, returns the number of records moved"""
+
+        sqlite_service = get_sqlite_service()
+        cutoff = self.cutoff(now)
+
+        await sqlite_service.train_archive_dictionary(cutoff, min_samples=self.dictionary_min_samples, size=self.dictionary_size)
+
+        moved = 0
+        while True:
+            count = await sqlite_service.archive_batch(cutoff, self.batch_size)
+            moved += count
+            if count < self.batch_size:
+                break
+            ## Leave the write lock to waiting writers between batches
+            await asyncio.sleep(self.batch_pause)
+
+        if moved:
+            logger.info(f"Archived {moved} transcriptions created before {cutoff}")
+        return moved
+
+
+    async def run_forever(self):
+        """Background job of the application, runs until cancelled"""
+
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Retention run failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+
+os.register_at_fork(after_in_child=RetentionService._reset_after_fork)
+
+
+def get_retention_service():
+    """Get the singleton instance of RetentionService"""
+    return RetentionService.get_instance()
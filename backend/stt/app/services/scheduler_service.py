@@ -0,0 +1,186 @@
+"""
+This module schedules the decode and VAD stages of uploads so short clips are not stuck behind long ones.
+
+Key Responsibilities:
+1. Classify work into lanes by the probed audio duration (AudioReader), before anything is decoded
+   - interactive: clips up to SCHED_INTERACTIVE_MAX_SECONDS, e.g. voice messages
+   - bulk: longer recordings
+2. Bound the number of uploads processed at once per worker process
+   - Bulk work never holds more than SCHED_BULK_SLOTS of the SCHED_SLOTS slots, the rest stays free for interactive clips
+   - When a slot frees up, the waiting job with the shortest audio goes first
+   - Aging: every second of waiting counts as SCHED_AGING_RATE seconds less audio, so long recordings are never starved
+3. Expose running and queued jobs and queue wait times (mean, p50, p95, max of recent jobs) per lane for dashboards
+
+Configuration (environment variables):
+- SCHED_SLOTS: Uploads processed at once per worker process (default 4)
+- SCHED_BULK_SLOTS: Slots bulk work may hold at once (default SCHED_SLOTS - 1, at least 1)
+- SCHED_INTERACTIVE_MAX_SECONDS: Longest audio (seconds) of the interactive lane (default 30)
+- SCHED_AGING_RATE: Seconds of audio credited per second of waiting (default 60)
+
+Requests coalesced by single-flight (services/singleflight_service.py) wait for the running pipeline and never take
+a slot. Memory admission (services/admission_service.py) still applies to scheduled work. The slot is released before
+the transcription request, concurrency upstream is bounded by UpstreamGuard (services/upstream_guard_service.py), so
+a slow upstream never keeps uploads from being decoded.
+"""
+
+import os
+import time
+import asyncio
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from utils.logger import logger
+
+LANES = ("interactive", "bulk")
+WAIT_SAMPLES = 1000  # Recent queue waits kept per lane for the percentiles
+
+
+def wait_summary(waits) -> dict:
+    """Mean, median, 95th percentile and maximum of queue waits in seconds"""
+
+    if not waits:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(waits)
+    percentile = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "mean": round(sum(ordered) / len(ordered), 4),
+        "p50": round(percentile(0.5), 4),
+        "p95": round(percentile(0.95), 4),
+        "max": round(ordered[-1], 4)
+    }
+
+
+class Slot:
+    """A processing slot held by one upload, released when the schedule() block exits or earlier by release()"""
+
+    def __init__(self, scheduler, lane: str):
+        self.scheduler = scheduler
+        self.lane = lane
+        self.released = False
+
+
+    async def release(self):
+        if self.released:
+            return
+        self.released = True
+        async with self.scheduler._condition:
+            self.scheduler.running[self.lane] -= 1
+            self.scheduler._condition.notify_all()
+
+
+class LaneScheduler:
+    _instance = None  # Class variable for singleton instance
+
+    def __init__(self, slots: int = None, bulk_slots: int = None, interactive_max_seconds: float = None, aging_rate: float = None):
+        self.slots = slots if slots is not None else int(os.getenv("SCHED_SLOTS", "4"))
+        if bulk_slots is None:
+            bulk_slots = int(os.getenv("SCHED_BULK_SLOTS", str(self.slots - 1)))
+        self.bulk_slots = min(max(bulk_slots, 1), self.slots)
+        self.interactive_max_seconds = interactive_max_seconds if interactive_max_seconds is not None else float(os.getenv("SCHED_INTERACTIVE_MAX_SECONDS", "30"))
+        self.aging_rate = aging_rate if aging_rate is not None else float(os.getenv("SCHED_AGING_RATE", "60"))
+
+        self.running = {lane: 0 for lane in LANES}
+        self.total_scheduled = {lane: 0 for lane in LANES}
+        self._waiting = {}
+        self._waits = {lane: deque(maxlen=WAIT_SAMPLES) for lane in LANES}
+        self._ids = itertools.count(1)
+        self._condition = asyncio.Condition()
+
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+
+    @classmethod
+    def _reset_after_fork(cls):
+        """Slots are per process, a forked worker starts with all of them free"""
+        cls._instance = None
+
+
+    def lane(self, duration: float) -> str:
+        return "interactive" if duration <= self.interactive_max_seconds else "bulk"
+
+
+    def _can_start(self, lane: str) -> bool:
+        if sum(self.running.values()) >= self.slots:
+            return False
+        return lane == "interactive" or self.running["bulk"] < self.bulk_slots
+
+
+    def _next(self):
+        """
+        Id of the waiting job to start next, None when no slot is free for any of them.
+        Priority is duration - aging_rate * waited, as every job ages at the same rate its order is fixed at enqueue time.
+        """
+
+        startable = [(job["priority"], job_id) for job_id, job in self._waiting.items() if self._can_start(job["lane"])]
+        return min(startable)[1] if startable else None
+
+
+    @asynccontextmanager
+    async def schedule(self, duration: float, label: str = None):
+        """
+        Hold a processing slot for the duration of the block, yields the Slot. Usage:
+
+            async with scheduler.schedule(audio_info["duration"], label=file_name) as slot:
+                ...decode and VAD...
+                await slot.release()
+                ...transcribe...
+        """
+
+        lane = self.lane(duration)
+        job_id = next(self._ids)
+        enqueued = time.monotonic()
+
+        async with self._condition:
+            self._waiting[job_id] = {"lane": lane, "label": label, "enqueued": enqueued, "priority": duration + self.aging_rate * enqueued}
+            try:
+                await self._condition.wait_for(lambda: self._next() == job_id)
+            finally:
+                del self._waiting[job_id]
+                self._condition.notify_all()  # Another job may be startable now
+
+            self.running[lane] += 1
+            self.total_scheduled[lane] += 1
+            waited = time.monotonic() - enqueued
+            self._waits[lane].append(waited)
+            if waited > 1:
+                logger.info(f"Scheduled {label} ({lane}, {duration:.1f}s of audio) after waiting {waited:.2f}s")
+
+        slot = Slot(self, lane)
+        try:
+            yield slot
+        finally:
+            await slot.release()
+
+
+    def snapshot(self):
+        now = time.monotonic()
+        lanes = {}
+        for lane in LANES:
+            queued = [job for job in self._waiting.values() if job["lane"] == lane]
+            lanes[lane] = {
+                "running": self.running[lane],
+                "queued": len(queued),
+                "oldest_wait_seconds": round(max((now - job["enqueued"] for job in queued), default=0.0), 3),
+                "total_scheduled": self.total_scheduled[lane],
+                "wait_seconds": wait_summary(self._waits[lane])
+            }
+        return {
+            "slots": self.slots,
+            "bulk_slots": self.bulk_slots,
+            "interactive_max_seconds": self.interactive_max_seconds,
+            "aging_rate": self.aging_rate,
+            "lanes": lanes
+        }
+
+
+os.register_at_fork(after_in_child=LaneScheduler._reset_after_fork)
+
+
+def get_scheduler():
+    """Get the singleton instance of LaneScheduler"""
+    return LaneScheduler.get_instance()
@@ -0,0 +1,88 @@
+"""
+This module coalesces identical concurrent requests into a single execution (single-flight).
+
+Key Responsibilities:
+1. Run the work for a key once while it is in flight
+   - The first request for a key (the leader) starts the work as a separate task
+   - Requests for the same key arriving while it runs (followers) await that task instead of repeating the work
+   - Every waiter receives the same result, or the same exception when the work fails
+2. Keep in-flight work independent of its waiters
+   - Waiters are shielded, a client that disconnects cancels neither the work nor the other waiters
+   - The key is released as soon as the work finishes, later requests run it again
+3. Expose leader / coalesced counters and the keys currently in flight for dashboards
+
+Used by POST /stt/transcribe with the upload content hash, requested model tier and VAD settings as key, so
+double submissions and client retries share one decode, VAD and inference pass.
+"""
+
+import os
+import asyncio
+from utils.logger import logger
+
+
+class SingleFlight:
+    _instance = None  # Class variable for singleton instance
+
+    def __init__(self):
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.failures = 0
+
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+
+    @classmethod
+    def _reset_after_fork(cls):
+        """In-flight tasks belong to the parent's event loop, a forked worker starts without any"""
+        cls._instance = None
+
+
+    async def run(self, key, work):
+        """
+        Await the in-flight work for key, or start work() when there is none.
+        Returns (result, shared): shared is True when the result was produced for an earlier request.
+        """
+
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+            logger.info(f"Coalescing request with in-flight work for {key}")
+        else:
+            task = asyncio.create_task(work())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+            self.leaders += 1
+
+        return await asyncio.shield(task), shared
+
+
+    def _release(self, key, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        ## Retrieve the exception here as well, so it is not reported as never retrieved when every waiter went away
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+
+
+    def snapshot(self):
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "failures": self.failures
+        }
+
+
+os.register_at_fork(after_in_child=SingleFlight._reset_after_fork)
+
+
+def get_single_flight():
+    """Get the singleton instance of SingleFlight"""
+    return SingleFlight.get_instance()
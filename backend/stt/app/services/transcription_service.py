@@ -13,27 +13,53 @@ Key Responsibilities:
    - Manages transcription requests to HuggingFace inference API
    - Performs model readiness check
    - Automatically initiates warm-up if model is not loaded
+
+3. Upstream Protection
+   - Every upstream call goes through the shared UpstreamGuard (adaptive concurrency limit + circuit breaker)
+   - Blocking HTTP calls run in a worker thread so the event loop keeps serving other requests
+
+4. Configurable endpoint
+   - HF_API_BASE_URL: Base URL of the inference API (default https://api-inference.huggingface.co/models),
+     point it to the local stand-in (loadtest/hf_standin.py) to load test without using HuggingFace quota
 """
 
 
 import os
-import time
 import wave
+import asyncio
 import requests
 from io import BytesIO
 from fastapi import HTTPException
+from services.upstream_guard_service import get_upstream_guard
 from utils.logger import logger
 
+
+def is_model_loading(response: requests.Response) -> bool:
+    """
+    HuggingFace answers 503 with {"error": "Model ... is currently loading", "estimated_time": ...} while a cold model
+    loads. That is the expected cold start, not an upstream failure.
+    """
+    
+    if response.status_code != 503:
+        return False
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    return isinstance(body, dict) and ("estimated_time" in body or "currently loading" in str(body.get("error", "")).lower())
+
+
 class TranscriptionService:
-    def __init__(self, api_key: str = ""):
+    def __init__(self, api_key: str = "", model: str = None):
         """
-        Initialize the transcription service.
+        Initialize the transcription service. Model defaults to the WHISPER_MODEL environment variable.
         """
-        self.model = os.getenv("WHISPER_MODEL", "openai/whisper-tiny")
-        self.api_url = f"https://api-inference.huggingface.co/models/{self.model}"
+        self.model = model or os.getenv("WHISPER_MODEL", "openai/whisper-tiny")
+        self.api_url = f"{os.getenv('HF_API_BASE_URL', 'https://api-inference.huggingface.co/models').rstrip('/')}/{self.model}"
         self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
         self.max_retries = int(os.getenv("HF_MAX_RETRIES", "5"))
         self.retry_delay = int(os.getenv("HF_RETRY_DELAY", "2"))
+        self.guard = get_upstream_guard()
         logger.info(f"Initialized TranscriptionService with model: {self.model}")
 
     def _create_dummy_wav(self) -> BytesIO:
@@ -50,6 +76,24 @@ class TranscriptionService:
         buffer.seek(0)
         return buffer
 
+    async def _post(self, data: bytes) -> requests.Response:
+        """
+        Send a single request to the upstream through the UpstreamGuard. 5xx responses count as upstream failures,
+        except the 503 of a model that is still loading, which counts as neither a failure nor a latency sample.
+        Raises HTTPException(503) without calling the upstream when the circuit breaker is open or no slot is free.
+        """
+        
+        async with self.guard.call() as outcome:
+            response = await asyncio.to_thread(
+                requests.post,
+                self.api_url,
+                headers=self.headers,
+                data=data
+            )
+            outcome.ignored = is_model_loading(response)
+            outcome.success = response.status_code < 500
+            return response
+
     async def warm_up(self) -> bool:
         """
         Warm up the model with a minimal WAV file.
@@ -65,11 +109,7 @@ class TranscriptionService:
                 # Reset buffer position
                 audio_data.seek(0)
                 
-                response = requests.post(
-                    self.api_url,
-                    headers=self.headers,
-                    data=audio_data.read()
-                )
+                response = await self._post(audio_data.read())
                 
                 # Log response for debugging
                 logger.debug(f"Warm-up response status: {response.status_code}")
@@ -83,7 +123,7 @@ class TranscriptionService:
                 elif response.status_code == 503:
                     wait_time = self.retry_delay * (2 ** attempt)
                     logger.info(f"Model still loading. Waiting {wait_time} seconds before retry...")
-                    time.sleep(wait_time)
+                    await asyncio.sleep(wait_time)
                     continue
                     
                 else:
@@ -92,10 +132,15 @@ class TranscriptionService:
                         logger.error(f"Error response: {response.content}")
                     return False
                     
+            except HTTPException as e:
+                # Upstream guard rejected the call, retrying would only add load to a struggling upstream
+                logger.warning(f"Warm-up aborted: {e.detail}")
+                return False
+                
             except Exception as e:
                 wait_time = self.retry_delay * (2 ** attempt)
                 logger.warning(f"Warm-up attempt {attempt + 1} failed: {str(e)}. Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
+                await asyncio.sleep(wait_time)
         
         logger.error(f"Failed to warm up model after {self.max_retries} attempts")
         return False
@@ -112,23 +157,23 @@ class TranscriptionService:
             
             # Send request to Hugging Face API
             logger.debug("Sending request to Hugging Face API")
-            response = requests.post(
-                self.api_url,
-                headers=self.headers,
-                data=audio_data.read()
-            )
+            response = await self._post(audio_data.read())
             
             # If model is still loading, retry with backoff
-            if response.status_code == 503:
+            if is_model_loading(response):
                 logger.debug("Model not ready. Starting warm-up sequence...")
                 await self.warm_up()
                 
                 # Retry the transcription after warm-up
                 audio_data.seek(0)
-                response = requests.post(
-                    self.api_url,
-                    headers=self.headers,
-                    data=audio_data.read()
+                response = await self._post(audio_data.read())
+            
+            # Any other 503 is an overloaded upstream, retrying here would only add to its load (the breaker sheds it)
+            if response.status_code == 503 and not is_model_loading(response):
+                raise HTTPException(
+                    status_code=503,
+                    detail="Transcription upstream is overloaded, please retry later",
+                    headers={"Retry-After": str(max(1, self.retry_delay))}
                 )
             
             result = response.json()
@@ -0,0 +1,311 @@
+"""
+This module protects the HuggingFace inference upstream from being overloaded by our own retries.
+
+Key Responsibilities:
+1. AdaptiveConcurrencyLimiter
+   - Bounds the number of in-flight upstream requests
+   - Adjusts the limit with AIMD (additive increase, multiplicative decrease) based on observed latency and errors
+   - Requests above the limit wait in a queue instead of piling onto the upstream
+
+2. CircuitBreaker
+   - Tracks the outcome of recent upstream calls in a sliding window
+   - Opens when the error rate spikes, failing fast instead of calling the upstream
+   - Half-opens after a cool down period to let a few probe requests test recovery
+
+3. UpstreamGuard
+   - Combines both into a single async context manager used by TranscriptionService
+   - Exposes a snapshot of the current state for dashboards
+
+Configuration (environment variables):
+- HF_CONCURRENCY_INITIAL / HF_CONCURRENCY_MIN / HF_CONCURRENCY_MAX: Bounds for the adaptive limit
+- HF_LATENCY_TARGET: Latency (seconds) above which the limit is decreased
+- HF_QUEUE_TIMEOUT: Maximum time (seconds) a request waits for an upstream slot
+- HF_CB_WINDOW: Number of recent calls used to compute the error rate
+- HF_CB_MIN_CALLS: Minimum calls in the window before the breaker may open
+- HF_CB_ERROR_RATE: Error rate (0.0 to 1.0) that opens the breaker
+- HF_CB_RESET_TIMEOUT: Seconds the breaker stays open before half-opening
+- HF_CB_HALF_OPEN_PROBES: Number of concurrent probe calls allowed while half-open
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from utils.logger import logger
+
+
+class AdaptiveConcurrencyLimiter:
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        latency_target: float = 10.0,
+        backoff_ratio: float = 0.5
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self.waiting = 0
+        self._condition = asyncio.Condition()
+
+
+    async def acquire(self, timeout: float = None) -> bool:
+        """
+        Wait for a free slot under the current limit. Returns False if no slot became available within timeout.
+        """
+
+        async with self._condition:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self.in_flight < int(self.limit)),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.waiting -= 1
+
+            self.in_flight += 1
+            return True
+
+
+    async def release(self, latency: float, success: bool, adapt: bool = True):
+        """
+        Release a slot and adapt the limit. Fast successful calls grow the limit by roughly one slot per window of calls,
+        slow calls or errors shrink it multiplicatively. With adapt=False the call is not a latency sample.
+        """
+
+        async with self._condition:
+            self.in_flight -= 1
+
+            if not adapt:
+                pass
+            elif success and latency <= self.latency_target:
+                self.limit = min(self.max_limit, self.limit + 1.0 / max(self.limit, 1.0))
+            else:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+
+            self._condition.notify_all()
+
+
+    def snapshot(self):
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "latency_target": self.latency_target
+        }
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        window_size: int = 20,
+        min_calls: int = 5,
+        error_rate_threshold: float = 0.5,
+        reset_timeout: float = 30.0,
+        half_open_probes: int = 1
+    ):
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.probes_in_flight = 0
+        self._outcomes = deque(maxlen=window_size)  # True for success, False for failure
+        self.total_rejected = 0
+
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+
+    def retry_after(self) -> int:
+        """Seconds until the breaker will half-open again"""
+        if self.state != self.OPEN:
+            return 0
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        return max(1, int(remaining + 0.999))
+
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may be sent upstream. Moves an open breaker to half-open once the reset timeout has elapsed.
+        """
+
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.total_rejected += 1
+                return False
+            logger.info("Circuit breaker half-open, probing upstream recovery")
+            self.state = self.HALF_OPEN
+            self.probes_in_flight = 0
+
+        if self.state == self.HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                self.total_rejected += 1
+                return False
+            self.probes_in_flight += 1
+
+        return True
+
+
+    def record_success(self):
+        if self.state == self.HALF_OPEN:
+            logger.info("Circuit breaker closed, upstream recovered")
+            self.state = self.CLOSED
+            self.probes_in_flight = 0
+            self._outcomes.clear()
+        self._outcomes.append(True)
+
+
+    def record_failure(self):
+        if self.state == self.HALF_OPEN:
+            self._trip()
+            return
+
+        self._outcomes.append(False)
+        if len(self._outcomes) >= self.min_calls and self.error_rate() >= self.error_rate_threshold:
+            self._trip()
+
+
+    def _trip(self):
+        logger.warning(f"Circuit breaker opened (error rate {self.error_rate():.0%}), failing fast for {self.reset_timeout}s")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.probes_in_flight = 0
+
+
+    def snapshot(self):
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 3),
+            "window_calls": len(self._outcomes),
+            "retry_after": self.retry_after(),
+            "total_rejected": self.total_rejected
+        }
+
+
+class UpstreamGuard:
+    _instance = None  # Class variable for singleton instance
+
+    def __init__(self):
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=int(os.getenv("HF_CONCURRENCY_INITIAL", "4")),
+            min_limit=int(os.getenv("HF_CONCURRENCY_MIN", "1")),
+            max_limit=int(os.getenv("HF_CONCURRENCY_MAX", "32")),
+            latency_target=float(os.getenv("HF_LATENCY_TARGET", "10"))
+        )
+        self.breaker = CircuitBreaker(
+            window_size=int(os.getenv("HF_CB_WINDOW", "20")),
+            min_calls=int(os.getenv("HF_CB_MIN_CALLS", "5")),
+            error_rate_threshold=float(os.getenv("HF_CB_ERROR_RATE", "0.5")),
+            reset_timeout=float(os.getenv("HF_CB_RESET_TIMEOUT", "30")),
+            half_open_probes=int(os.getenv("HF_CB_HALF_OPEN_PROBES", "1"))
+        )
+        self.queue_timeout = float(os.getenv("HF_QUEUE_TIMEOUT", "30"))
+
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+
+    @classmethod
+    def _reset_after_fork(cls):
+        """Limits and breaker state are per process, a forked worker starts with a fresh guard"""
+        cls._instance = None
+
+
+    def _reject(self, detail: str):
+        retry_after = max(1, self.breaker.retry_after())
+        raise HTTPException(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+    @asynccontextmanager
+    async def call(self):
+        """
+        Guard a single upstream call. Usage:
+
+            async with guard.call() as outcome:
+                response = ...
+                outcome.success = response.status_code < 500
+
+        Exceptions raised inside the block are recorded as failures. Calls marked outcome.ignored (e.g. the upstream
+        answered that the model is still loading) are neither an outcome of the breaker nor a latency sample.
+        """
+
+        if not self.breaker.allow_request():
+            self._reject("Transcription upstream is unavailable, circuit breaker is open")
+
+        if not await self.limiter.acquire(timeout=self.queue_timeout):
+            # The slot was never used, so give back a half-open probe without recording an outcome
+            if self.breaker.state == CircuitBreaker.HALF_OPEN:
+                self.breaker.probes_in_flight = max(0, self.breaker.probes_in_flight - 1)
+            self._reject("Transcription upstream is saturated, please retry later")
+
+        outcome = _CallOutcome()
+        started = time.monotonic()
+        try:
+            yield outcome
+        except Exception:
+            outcome.success = False
+            outcome.ignored = False
+            raise
+        finally:
+            ## No return in here, it would swallow the exception (or cancellation) propagating out of the block
+            latency = time.monotonic() - started
+            if outcome.ignored:
+                ## Give back a half-open probe without deciding on recovery, the next call probes again
+                if self.breaker.state == CircuitBreaker.HALF_OPEN:
+                    self.breaker.probes_in_flight = max(0, self.breaker.probes_in_flight - 1)
+            elif outcome.success:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            await self.limiter.release(latency=latency, success=outcome.success, adapt=not outcome.ignored)
+
+
+    def snapshot(self):
+        return {
+            "circuit_breaker": self.breaker.snapshot(),
+            "concurrency": self.limiter.snapshot()
+        }
+
+
+class _CallOutcome:
+    def __init__(self):
+        self.success = True
+        self.ignored = False
+
+
+os.register_at_fork(after_in_child=UpstreamGuard._reset_after_fork)
+
+
+def get_upstream_guard():
+    """Get the singleton instance of UpstreamGuard"""
+    return UpstreamGuard.get_instance()
@@ -3,6 +3,7 @@ This module provides services for audio processing in the transcription pipeline
 
 Key Responsibilities:
 1) Voice Activity Detection (VADService) for removing silences from audio
+2) Speech detection only (timestamps and speech ratio), used to skip transcription of silent audio
 
 Implementation Details:
 1) Singleton pattern for VADService ensures single model initialization
@@ -11,6 +12,8 @@ Implementation Details:
 4) Uses configurable threshold for silence detection (0.0 to 1.0)
    - Lower values (e.g., 0.3) = less aggressive, keeps more audio
    - Higher values (e.g., 0.7) = more aggressive silence removal
+5) In preload mode (gunicorn.conf.py) the model is loaded once in the master process before forking,
+   workers inherit the singleton and share the model weights copy-on-write
 
 Audio Requirements:
 - Input must be preprocessed to 16kHz sample rate
@@ -51,41 +54,76 @@ class VADService:
             cls._instance = cls() # If not, create an instance of VADService to be shared throughout the lifecycle. Equivalent to calling VADService __init__ method
         return cls._instance
 
-    async def remove_silence(self, audio_content: BytesIO):
+    async def detect_speech(self, audio_content: BytesIO, threshold: float = None) -> dict:
         """
-        Remove silence from audio using VAD following Silero's documentation.
-        Audio is expected to be 16kHz mono WAV.
+        Run VAD without modifying the audio. Audio is expected to be 16kHz mono WAV.
+        Threshold defaults to the VAD_THRESHOLD environment variable.
+        Returns the decoded samples, sample rate, speech timestamps (in samples), speech duration (seconds)
+        and speech ratio (share of the audio containing speech, 0.0 to 1.0).
         """
         
         try:
-            logger.debug("Applying VAD to remove silence")
+            logger.debug("Applying VAD to detect speech")
+            
+            if threshold is None:
+                threshold = float(os.getenv("VAD_THRESHOLD", 0.3))
             
             # Load audio from BytesIO
             wav, sr = sf.read(audio_content)
+            audio_content.seek(0)
             
             # Get speech timestamps using Silero's utility
             speech_timestamps = get_speech_timestamps(
                 wav,
                 self.model,
-                threshold=float(os.getenv("VAD_THRESHOLD", 0.3)),
+                threshold=threshold,
                 return_seconds=False
             )
             
-            # Initialize array for processed audio
-            processed_segments = []
-            
-            # Extract speech segments
-            for ts in speech_timestamps:
-                processed_segments.append(wav[ts['start']:ts['end']])
-            
-            # Concatenate all segments
-            processed_audio = np.concatenate(processed_segments)
-            
-            # Save processed audio
-            output_buffer = BytesIO()
-            sf.write(output_buffer, processed_audio, sr, format='WAV')
-            output_buffer.seek(0)
-            return output_buffer
+            speech_samples = sum(ts['end'] - ts['start'] for ts in speech_timestamps)
+            return {
+                "wav": wav,
+                "sample_rate": sr,
+                "speech_timestamps": speech_timestamps,
+                "speech_duration": speech_samples / sr if sr else 0.0,
+                "speech_ratio": speech_samples / len(wav) if len(wav) else 0.0
+            }
+
+        except Exception as e:
+            logger.error(f"Error in speech detection: {str(e)}")
+            raise
+
+    def extract_speech(self, speech: dict) -> BytesIO:
+        """
+        Build a WAV buffer containing only the speech segments found by detect_speech().
+        Returns an empty (zero frame) WAV when no speech was found.
+        """
+        
+        wav = speech["wav"]
+        
+        # Extract speech segments
+        processed_segments = [wav[ts['start']:ts['end']] for ts in speech["speech_timestamps"]]
+        
+        # Concatenate all segments, np.concatenate does not accept an empty list
+        processed_audio = np.concatenate(processed_segments) if processed_segments else wav[:0]
+        
+        # Save processed audio
+        output_buffer = BytesIO()
+        sf.write(output_buffer, processed_audio, speech["sample_rate"], format='WAV')
+        output_buffer.seek(0)
+        return output_buffer
+
+    async def remove_silence(self, audio_content: BytesIO, threshold: float = None):
+        """
+        Remove silence from audio using VAD following Silero's documentation.
+        Audio is expected to be 16kHz mono WAV.
+        Threshold defaults to the VAD_THRESHOLD environment variable.
+        """
+        
+        try:
+            logger.debug("Applying VAD to remove silence")
+            speech = await self.detect_speech(audio_content, threshold=threshold)
+            return self.extract_speech(speech)
 
         except Exception as e:
             logger.error(f"Error in silence removal: {str(e)}")
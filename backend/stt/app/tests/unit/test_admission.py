@@ -0,0 +1,80 @@
+"""
+Unit test for memory budget admission control. This test verifies:
+1. Memory estimates grow with duration, sample rate and channels
+2. Requests wait for budget in FIFO order, and are rejected with 503 + Retry-After after the queue timeout
+3. Requests larger than the whole budget are rejected with 413
+4. GET /stt/admission reports reservations
+"""
+
+import asyncio
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from main import app
+from services.admission_service import MemoryAdmissionController
+
+client = TestClient(app)
+
+
+def test_estimate_scales_with_metadata():
+    admission = MemoryAdmissionController(budget_bytes=10**9, overhead=1.0)
+
+    mono = admission.estimate(duration=60, sample_rate=16000, channel=1)
+    assert mono == 60 * 16000 * (4 + 16)
+    assert admission.estimate(duration=60, sample_rate=48000, channel=2) > mono
+    assert admission.estimate(duration=120, sample_rate=16000, channel=1) == 2 * mono
+
+
+@pytest.mark.asyncio
+async def test_requests_queue_until_budget_is_released():
+    admission = MemoryAdmissionController(budget_bytes=100, overhead=1.0, queue_timeout=1.0)
+    order = []
+
+    async def request(name: str, size: int, hold: float):
+        async with admission.admit(size, label=name):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    first = asyncio.create_task(request("first", 80, 0.1))
+    await asyncio.sleep(0.01)
+    assert admission.snapshot()["reserved_bytes"] == 80
+
+    # "large" is queued first and must not be overtaken by "small", even though "small" would fit right away
+    large = asyncio.create_task(request("large", 60, 0))
+    await asyncio.sleep(0.01)
+    small = asyncio.create_task(request("small", 10, 0))
+    await asyncio.sleep(0.01)
+    assert admission.snapshot()["queued"] == 2
+
+    await asyncio.gather(first, large, small)
+    assert order == ["first", "large", "small"]
+    assert admission.snapshot()["reserved_bytes"] == 0
+    assert admission.total_admitted == 3
+
+
+@pytest.mark.asyncio
+async def test_rejections():
+    admission = MemoryAdmissionController(budget_bytes=100, overhead=1.0, queue_timeout=0.05)
+
+    with pytest.raises(HTTPException) as error:
+        async with admission.admit(101):
+            pass
+    assert error.value.status_code == 413
+
+    async with admission.admit(90):
+        with pytest.raises(HTTPException) as error:
+            async with admission.admit(20):
+                pass
+    assert error.value.status_code == 503
+    assert int(error.value.headers["Retry-After"]) >= 1
+    assert admission.snapshot()["queued"] == 0
+    assert admission.total_rejected == 1
+
+
+def test_admission_endpoint():
+    response = client.get("/stt/admission")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["reserved_bytes"] == 0
+    assert body["reservations"] == []
+    assert body["budget_bytes"] > 0
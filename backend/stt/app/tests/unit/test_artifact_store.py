@@ -0,0 +1,74 @@
+"""
+Unit test for the content-addressed audio artifact store. This test verifies:
+1. Identical uploads are stored once and can be read back (compressed originals)
+2. Normalized PCM is memory-mapped on read without copying
+3. Least recently used artifacts are evicted when the size budget is exceeded
+"""
+
+import os
+import time
+import numpy as np
+import soundfile as sf
+from io import BytesIO
+from services.artifact_store_service import ArtifactStore
+
+
+def make_wav(samples: np.ndarray) -> BytesIO:
+    buffer = BytesIO()
+    sf.write(buffer, samples, 16000, format="WAV", subtype="PCM_16")
+    buffer.seek(0)
+    return buffer
+
+
+def test_put_original_deduplicates(tmp_path):
+    store = ArtifactStore(root_dir=str(tmp_path), max_bytes=10 * 1024 * 1024)
+    content = b"ID3" + os.urandom(2048)
+
+    first = store.put_original(content)
+    second = store.put_original(content)
+
+    assert first == second
+    assert store.stats()["artifacts"] == 1
+    assert store.get_original(first) == content
+
+
+def test_open_pcm_is_memory_mapped(tmp_path):
+    store = ArtifactStore(root_dir=str(tmp_path), max_bytes=10 * 1024 * 1024)
+    samples = (np.sin(np.linspace(0, 100, 16000)) * 10000).astype(np.int16)
+    wav = make_wav(samples)
+
+    sha256 = store.put_pcm(wav)
+    pcm = store.open_pcm(sha256)
+
+    assert wav.tell() == 0  # Buffer is rewound for the next pipeline stage
+    assert isinstance(pcm, np.memmap)
+    assert np.array_equal(np.asarray(pcm), samples)
+    assert store.get_pcm_wav(sha256) is not None
+
+
+def test_missing_artifact_returns_none(tmp_path):
+    store = ArtifactStore(root_dir=str(tmp_path), max_bytes=1024)
+    assert store.get_original("0" * 64) is None
+    assert store.open_pcm("0" * 64) is None
+
+
+def test_disabled_store_does_not_write(tmp_path):
+    store = ArtifactStore(root_dir="", max_bytes=1024)
+    assert store.enabled is False
+    assert store.get_original(store.put_original(b"data")) is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = ArtifactStore(root_dir=str(tmp_path), max_bytes=3000)
+
+    oldest = store.put_original(os.urandom(1200))
+    old_path = store._path("original", oldest)
+    past = time.time() - 60
+    os.utime(old_path, (past, past))
+
+    newest = store.put_original(os.urandom(1200))
+    store.put_original(os.urandom(1200))
+
+    assert store.get_original(oldest) is None
+    assert store.get_original(newest) is not None
+    assert store.stats()["size_bytes"] <= 3000
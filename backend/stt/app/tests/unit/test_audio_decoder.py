@@ -0,0 +1,157 @@
+"""
+Unit test for in-process audio probing and decoding. This test verifies:
+1. Metadata is read from the header of WAV, FLAC, OGG, MP3 and M4A uploads, with ffprobe's format names
+2. Decoding downmixes and resamples to 16kHz mono int16 without changing duration or pitch
+3. AudioReader and AudioService fall back to ffprobe / ffmpeg (pydub) for content not readable in process,
+   and with AUDIO_DECODER=ffmpeg
+4. AudioService decodes and resamples in a worker thread, off the event loop
+"""
+
+import os
+import av
+import numpy as np
+import pytest
+import threading
+import soundfile as sf
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+from services.audio_processor_service import AudioReader, AudioService
+from utils import audio_decoder
+
+
+def tone(seconds: float = 1.0, sample_rate: int = 44100, frequency: float = 440.0) -> np.ndarray:
+    """Stereo sine tone"""
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    mono = 0.5 * np.sin(2 * np.pi * frequency * t)
+    return np.stack([mono, mono], axis=1).astype(np.float32)
+
+
+def encode_soundfile(samples: np.ndarray, container_format: str, sample_rate: int = 44100) -> bytes:
+    buffer = BytesIO()
+    sf.write(buffer, samples, sample_rate, format=container_format)
+    return buffer.getvalue()
+
+
+def encode_m4a(samples: np.ndarray, sample_rate: int = 44100) -> bytes:
+    buffer = BytesIO()
+    with av.open(buffer, mode="w", format="ipod") as container:
+        stream = container.add_stream("aac", rate=sample_rate, layout="stereo")
+        pcm = (samples * 32767).astype(np.int16)
+        for start in range(0, len(pcm), 1024):
+            frame = av.AudioFrame.from_ndarray(pcm[start:start + 1024].reshape(1, -1), format="s16", layout="stereo")
+            frame.sample_rate = sample_rate
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buffer.getvalue()
+
+
+def dominant_frequency(samples: np.ndarray, sample_rate: int = 16000) -> float:
+    spectrum = np.abs(np.fft.rfft(samples.astype(np.float32)))
+    return np.fft.rfftfreq(len(samples), 1 / sample_rate)[np.argmax(spectrum)]
+
+
+def upload(content: bytes, file_name: str):
+    audio_file = MagicMock()
+    audio_file.filename = file_name
+    audio_file.file = BytesIO(content)
+    return audio_file
+
+
+"""
+Unit test for audio_decoder.probe and audio_decoder.decode
+"""
+@pytest.mark.parametrize("container_format, audio_format", [("WAV", "wav"), ("FLAC", "flac"), ("OGG", "ogg")])
+def test_soundfile_formats(container_format, audio_format):
+    content = encode_soundfile(tone(2.0), container_format)
+
+    assert audio_decoder.probe(content) == {"audio_format": audio_format, "channel": 2, "sample_rate": 44100, "duration": 2.0}
+
+    samples = audio_decoder.decode(content, audio_format)
+    assert samples.dtype == np.int16 and samples.ndim == 1
+    assert len(samples) == 32000
+    assert dominant_frequency(samples) == pytest.approx(440, abs=2)
+
+def test_mp3_sample():
+    with open(os.path.join("tests", "audio", "sample.mp3"), "rb") as f:
+        content = f.read()
+
+    ## Same metadata ffprobe reports for this file
+    assert audio_decoder.probe(content) == {"audio_format": "mp3", "channel": 1, "sample_rate": 48000, "duration": 11.088}
+    samples = audio_decoder.decode(content, "mp3")
+    assert len(samples) / 16000 == pytest.approx(11.088, abs=0.1)
+    assert np.abs(samples).max() > 0
+
+def test_m4a():
+    content = encode_m4a(tone(2.0))
+
+    info = audio_decoder.probe(content)
+    assert info["audio_format"] == "mov,mp4,m4a,3gp,3g2,mj2"
+    assert (info["channel"], info["sample_rate"]) == (2, 44100)
+    assert info["duration"] == pytest.approx(2.0, abs=0.05)
+
+    samples = audio_decoder.decode(content, info["audio_format"])
+    assert len(samples) / 16000 == pytest.approx(2.0, abs=0.05)
+    assert dominant_frequency(samples) == pytest.approx(440, abs=2)
+
+def test_unreadable_content():
+    assert audio_decoder.probe(b"not audio" * 100) is None
+    assert audio_decoder.decode(b"not audio" * 100, "wav") is None
+
+
+"""
+Unit test for AudioReader and AudioService with the in-process decoder and the ffmpeg fallback
+"""
+@pytest.mark.asyncio
+async def test_pipeline_decodes_in_process():
+    content = encode_soundfile(tone(1.0, sample_rate=8000), "WAV", sample_rate=8000)
+
+    with patch("services.audio_processor_service.mediainfo_json") as mock_mediainfo, \
+         patch("services.audio_processor_service.AudioSegment") as MockAudioSegment:
+        audio_reader = AudioReader(upload(content, "tone.wav"))
+        _, audio_content = audio_reader.get_audio_content()
+        wav = await AudioService().preprocess_audio(audio_format=audio_reader.audio_format, audio_content=audio_content)
+
+    mock_mediainfo.assert_not_called()
+    MockAudioSegment.from_wav.assert_not_called()
+    samples, sample_rate = sf.read(wav, dtype="int16")
+    assert (sample_rate, samples.ndim, len(samples)) == (16000, 1, 16000)
+
+@pytest.mark.asyncio
+async def test_pipeline_decodes_off_the_event_loop():
+    content = encode_soundfile(tone(1.0, sample_rate=8000), "WAV", sample_rate=8000)
+    decode_threads = []
+    native_decode = audio_decoder.decode
+
+    def decode(*args):
+        decode_threads.append(threading.get_ident())
+        return native_decode(*args)
+
+    with patch("services.audio_processor_service.audio_decoder.decode", side_effect=decode):
+        await AudioService().preprocess_audio(audio_format="wav", audio_content=BytesIO(content))
+
+    assert len(decode_threads) == 1 and decode_threads[0] != threading.get_ident()
+
+def test_probe_falls_back_to_ffprobe(monkeypatch):
+    mediainfo = {"format": {"format_name": "WMA"}, "streams": [{"channels": 2, "sample_rate": "44100", "duration": "3.5"}]}
+
+    with patch("services.audio_processor_service.mediainfo_json", return_value=mediainfo) as mock_mediainfo:
+        audio_reader = AudioReader(upload(b"not audio" * 100, "clip.wma"))
+        assert mock_mediainfo.call_count == 1
+        assert audio_reader.get_audio_info()["audio_format"] == "wma"
+
+        monkeypatch.setenv("AUDIO_DECODER", "ffmpeg")
+        AudioReader(upload(encode_soundfile(tone(), "WAV"), "tone.wav"))
+        assert mock_mediainfo.call_count == 2
+
+@pytest.mark.asyncio
+async def test_decode_falls_back_to_ffmpeg():
+    with patch("services.audio_processor_service.AudioSegment") as MockAudioSegment:
+        audio = MockAudioSegment.from_file.return_value
+        audio.channels = 1
+        audio.frame_rate = 16000
+        await AudioService().preprocess_audio(audio_format="wma", audio_content=BytesIO(b"not audio" * 100))
+
+    MockAudioSegment.from_file.assert_called_once()
+    audio.export.assert_called_once()
@@ -0,0 +1,84 @@
+"""
+Unit test for the re-transcription backfill. This test verifies:
+1. Candidate selection by filter in ascending id order, resuming after a checkpointed id
+2. Batched writes, replacing the transcript or adding a new version alongside it
+3. Checkpoints are only reused for the same filters, model, VAD threshold and --as-version
+"""
+
+import pytest
+from cli.backfill import checkpoint_key, load_checkpoint, save_checkpoint
+from services.pysqlite_service import SQLiteService
+
+
+@pytest.fixture
+def sqlite_service(tmp_path):
+    service = SQLiteService(str(tmp_path / "transcriptions.db"))
+    service._initialize_db()
+    return service
+
+
+async def insert_records(service):
+    for index, audio_format in enumerate(["mp3", "wav", "mp3"]):
+        await service.insert_transcription(
+            file_name=f"sample{index}.{audio_format}",
+            audio_format=audio_format,
+            channel=1,
+            sample_rate=16000,
+            duration=1.0,
+            transcription=f"old text {index}",
+            audio_sha256=f"{index}" * 64
+        )
+
+
+@pytest.mark.asyncio
+async def test_get_backfill_candidates_filters_and_resumes(sqlite_service):
+    await insert_records(sqlite_service)
+
+    records = await sqlite_service.get_backfill_candidates(after_id=0, limit=10, audio_format="mp3")
+    assert [record["id"] for record in records] == [1, 3]
+
+    records = await sqlite_service.get_backfill_candidates(after_id=1, limit=10, audio_format="mp3")
+    assert [record["id"] for record in records] == [3]
+    assert await sqlite_service.count_backfill_candidates(after_id=0, ids=[2, 3]) == 2
+
+
+@pytest.mark.asyncio
+async def test_apply_backfill_batch_replace_and_version(sqlite_service):
+    await insert_records(sqlite_service)
+
+    await sqlite_service.apply_backfill_batch([(1, "new text")], model="openai/whisper-base", vad_threshold=0.5)
+    await sqlite_service.apply_backfill_batch([(2, "versioned text")], model="openai/whisper-base", vad_threshold=0.5, as_version=True)
+
+    records = {record["id"]: record for record in await sqlite_service.get_all_transcriptions()}
+    assert records[1]["transcription"] == "new text"
+    assert records[2]["transcription"] == "old text 1"
+
+    sqlite_service.db.cursor.execute("SELECT transcription_id, model, transcription FROM transcription_version")
+    assert [tuple(row) for row in sqlite_service.db.cursor.fetchall()] == [(2, "openai/whisper-base", "versioned text")]
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    filters = {"since": "2024-11-01", "until": None, "audio_format": None, "ids": None}
+
+    checkpoint = load_checkpoint(path, filters)
+    assert checkpoint["last_id"] == 0
+
+    checkpoint["last_id"] = 42
+    save_checkpoint(path, checkpoint)
+    assert load_checkpoint(path, filters)["last_id"] == 42
+    assert load_checkpoint(path, dict(filters, audio_format="mp3"))["last_id"] == 0
+
+def test_checkpoint_not_resumed_for_another_model(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    filters = {"since": None, "until": None, "audio_format": None, "ids": None}
+    key = checkpoint_key(filters, model="openai/whisper-tiny", vad_threshold=0.3, as_version=False)
+
+    checkpoint = load_checkpoint(path, key)
+    checkpoint["last_id"] = 42  # A finished run with whisper-tiny
+    save_checkpoint(path, checkpoint)
+    assert load_checkpoint(path, key)["last_id"] == 42
+
+    assert load_checkpoint(path, checkpoint_key(filters, model="openai/whisper-base", vad_threshold=0.3, as_version=False))["last_id"] == 0
+    assert load_checkpoint(path, checkpoint_key(filters, model="openai/whisper-tiny", vad_threshold=0.5, as_version=False))["last_id"] == 0
+    assert load_checkpoint(path, checkpoint_key(filters, model="openai/whisper-tiny", vad_threshold=0.3, as_version=True))["last_id"] == 0
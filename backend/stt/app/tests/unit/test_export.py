@@ -0,0 +1,92 @@
+"""
+Unit test for the streaming bulk export. This test verifies:
+1. CSV and JSONL exports contain every row, streamed in chunks, with optional gzip compression
+2. Date range filters on created_at
+3. Parquet exports read back with pyarrow, one row group per chunk, with a column codec and for an empty result
+4. Invalid formats, and Parquet without pyarrow installed, are rejected by the /data/export endpoint before streaming
+"""
+
+import csv
+import gzip
+import json
+import sys
+import pytest
+import pyarrow.parquet as pq
+from io import BytesIO
+from fastapi.testclient import TestClient
+from main import app
+from services.export_service import export_transcriptions
+from services.pysqlite_service import SQLiteService
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def sqlite_service(tmp_path, monkeypatch):
+    service = SQLiteService(str(tmp_path / "transcriptions.db"))
+    service._initialize_db()
+    for index, created_at in enumerate(["2024-11-01 10:00:00", "2024-11-15 10:00:00", "2024-12-01 10:00:00"]):
+        service.db.cursor.execute(
+            """INSERT INTO transcription_result (file_name, audio_format, channel, sample_rate, duration, transcription, created_at)
+               VALUES (?, 'mp3', 1, 16000, 1.5, ?, ?)""",
+            (f"sample{index}.mp3", f'text, with "quotes" {index}', created_at)
+        )
+    service.db.conn.commit()
+    monkeypatch.setattr(SQLiteService, "_instance", service)
+    return service
+
+
+def test_export_csv_streams_in_chunks(sqlite_service):
+    chunks = list(export_transcriptions(export_format="csv", chunk_size=1))
+    rows = list(csv.DictReader("".join(chunk.decode("utf-8") for chunk in chunks).splitlines()))
+
+    assert len(chunks) == 3
+    assert [row["file_name"] for row in rows] == ["sample0.mp3", "sample1.mp3", "sample2.mp3"]
+    assert rows[0]["transcription"] == 'text, with "quotes" 0'
+
+
+def test_export_jsonl_gzip_with_date_range(sqlite_service):
+    data = b"".join(export_transcriptions(export_format="jsonl", compression="gzip", start="2024-11-10", end="2024-12-01"))
+    records = [json.loads(line) for line in gzip.decompress(data).decode("utf-8").splitlines()]
+
+    assert [record["file_name"] for record in records] == ["sample1.mp3"]
+    assert records[0]["duration"] == 1.5
+
+
+def test_export_parquet_round_trip(sqlite_service):
+    data = b"".join(export_transcriptions(export_format="parquet", compression="zstd", chunk_size=2))
+    parquet_file = pq.ParquetFile(BytesIO(data))
+
+    assert parquet_file.metadata.num_row_groups == 2
+    assert parquet_file.metadata.row_group(0).column(0).compression == "ZSTD"
+    table = parquet_file.read()
+    assert table.column("file_name").to_pylist() == ["sample0.mp3", "sample1.mp3", "sample2.mp3"]
+    assert table.column("transcription").to_pylist()[0] == 'text, with "quotes" 0'
+    assert table.column("duration").to_pylist() == [1.5, 1.5, 1.5]
+
+
+def test_export_parquet_empty_result(sqlite_service):
+    data = b"".join(export_transcriptions(export_format="parquet", start="2025-01-01"))
+    table = pq.read_table(BytesIO(data))
+
+    assert table.num_rows == 0
+    assert table.column_names[:3] == ["id", "file_name", "audio_format"]
+
+
+def test_export_endpoint_rejects_unknown_format(sqlite_service):
+    response = client.get("/data/export", params={"format": "xlsx"})
+    assert response.status_code == 400
+
+
+def test_export_endpoint_csv(sqlite_service):
+    response = client.get("/data/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert "attachment" in response.headers["content-disposition"]
+    assert len(response.text.strip().splitlines()) == 4
+
+
+def test_export_endpoint_parquet_without_pyarrow(sqlite_service, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)  # import pyarrow raises ImportError
+    response = client.get("/data/export", params={"format": "parquet"})
+    assert response.status_code == 400
+    assert "pyarrow" in response.json()["detail"]
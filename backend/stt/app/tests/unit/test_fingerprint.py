@@ -0,0 +1,172 @@
+"""
+Unit test for acoustic fingerprint duplicate detection. This test verifies:
+1. A re-encoded (quieter, low-passed, noisy) and trimmed copy matches the original, unrelated audio does not,
+   energy above the highest band edge does not change the fingerprint
+2. Fingerprints are found through the inverted index and removed together with their record
+3. POST /stt/transcribe reuses the transcript of a near-duplicate without running VAD or transcription, only when it
+   was produced by the model of the tier the upload gets
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+from io import BytesIO
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from main import app
+from services.fingerprint_service import FingerprintService
+from services.model_router_service import ModelRouter, ModelTier
+from services.pysqlite_service import SQLiteService
+
+client = TestClient(app)
+
+
+def make_audio(seed: int, seconds: float = 6.0) -> np.ndarray:
+    """Tones with drifting pitch and changing loudness plus noise bursts, loosely resembling speech"""
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(16000 * seconds)) / 16000
+    signal = np.zeros_like(t)
+    for _ in range(6):
+        frequency = rng.uniform(200, 1800) * (1 + 0.2 * np.sin(2 * np.pi * rng.uniform(0.2, 2) * t))
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(0.5, 4) * t + rng.uniform(0, 6))
+        signal += np.sin(2 * np.pi * np.cumsum(frequency) / 16000) * envelope
+    signal += 0.3 * rng.standard_normal(len(t)) * (np.sin(2 * np.pi * 3 * t) > 0)
+    return (signal / np.abs(signal).max() * 0.8).astype(np.float32)
+
+
+def to_wav(samples: np.ndarray) -> BytesIO:
+    buffer = BytesIO()
+    sf.write(buffer, samples, 16000, format="WAV", subtype="PCM_16")
+    buffer.seek(0)
+    return buffer
+
+
+def degrade(samples: np.ndarray, trim: int = 4900) -> np.ndarray:
+    smoothed = np.convolve(samples, np.ones(3) / 3, mode="same")
+    noise = 0.01 * np.random.default_rng(0).standard_normal(len(samples) - trim)
+    return (0.5 * smoothed[trim:] + noise).astype(np.float32)
+
+
+@pytest.fixture
+def sqlite_service(tmp_path, monkeypatch):
+    service = SQLiteService(str(tmp_path / "transcriptions.db"))
+    service._initialize_db()
+    monkeypatch.setattr(SQLiteService, "_instance", service)
+    return service
+
+
+def test_similarity_of_degraded_copy():
+    fingerprint_service = FingerprintService()
+    original = fingerprint_service.compute(to_wav(make_audio(1)))
+    copy = fingerprint_service.compute(to_wav(degrade(make_audio(1))))
+    unrelated = fingerprint_service.compute(to_wav(make_audio(2)))
+
+    assert fingerprint_service.similarity(copy, original, offset=round(4900 / 256))[0] > 0.85
+    assert fingerprint_service.similarity(unrelated, original, offset=0)[0] < 0.6
+    assert len(fingerprint_service.compute(to_wav(np.zeros(1000, dtype=np.float32)))) == 0
+
+
+def test_top_band_ignores_energy_above_it():
+    ## Hiss above 4kHz, far above the highest band edge (2kHz), must not flip the bit of the top band
+    samples = 0.6 * make_audio(1)
+    rng = np.random.default_rng(3)
+    spectrum = np.fft.rfft(rng.standard_normal(len(samples)))
+    spectrum[np.fft.rfftfreq(len(samples), 1 / 16000) < 4000] = 0
+    hiss = np.fft.irfft(spectrum, len(samples))
+    hiss = 0.3 * hiss / np.abs(hiss).max() * (np.sin(2 * np.pi * 0.7 * np.arange(len(samples)) / 16000) > 0)
+
+    fingerprint_service = FingerprintService()
+    clean = fingerprint_service.compute(to_wav(samples.astype(np.float32)))
+    noisy = fingerprint_service.compute(to_wav((samples + hiss).astype(np.float32)))
+    assert np.mean((clean >> 31) != (noisy >> 31)) < 0.02
+
+@pytest.mark.asyncio
+async def test_find_duplicate_through_index(sqlite_service):
+    fingerprint_service = FingerprintService()
+    record_id = await sqlite_service.insert_transcription("original.wav", "wav", 1, 16000, 6.0, "hello world")
+    assert await fingerprint_service.index(record_id, fingerprint_service.compute(to_wav(make_audio(1))))
+
+    match = await fingerprint_service.find_duplicate(fingerprint_service.compute(to_wav(degrade(make_audio(1)))))
+    assert match["record_id"] == record_id
+    assert match["similarity"] >= fingerprint_service.similarity_threshold
+    assert await fingerprint_service.find_duplicate(fingerprint_service.compute(to_wav(make_audio(2)))) is None
+
+    await sqlite_service.delete_transcription(record_id)
+    assert await fingerprint_service.find_duplicate(fingerprint_service.compute(to_wav(make_audio(1)))) is None
+
+
+@pytest.fixture
+def model_router(monkeypatch):
+    router = ModelRouter(
+        tiers=[
+            ModelTier(name="fast", model="openai/whisper-tiny", max_speech_duration=5),
+            ModelTier(name="accurate", model="openai/whisper-large-v3")
+        ],
+        endpoint_tiers={}
+    )
+    monkeypatch.setattr(ModelRouter, "_instance", router)
+    return router
+
+
+def test_transcribe_reuses_duplicate_transcript(model_router):
+    duplicate = {"id": 7, "transcription": "hello world", "speech_ratio": 0.8, "similarity": 0.93, "model": "openai/whisper-tiny"}
+
+    with patch("routers.stt.AudioReader") as MockAudioReader, \
+         patch("routers.stt.AudioService") as MockAudioService, \
+         patch("routers.stt.find_near_duplicate", AsyncMock(return_value=(np.zeros(0, dtype=np.uint32), duplicate))), \
+         patch("routers.stt.get_vad_service") as mock_get_vad, \
+         patch("routers.stt.TranscriptionService") as MockTransService, \
+         patch("routers.stt.get_sqlite_service") as mock_get_sqlite:
+
+        MockAudioReader.return_value.get_audio_info.return_value = {
+            "file_name": "copy.mp3", "audio_format": "mp3", "channel": 1, "sample_rate": 44100, "duration": 6.0
+        }
+        MockAudioReader.return_value.get_audio_content.return_value = (b"", BytesIO())
+        MockAudioService.return_value.preprocess_audio = AsyncMock(return_value=BytesIO())
+        mock_get_sqlite.return_value.insert_transcription = AsyncMock(return_value=8)
+
+        response = client.post("/stt/transcribe", files={"audio": ("copy.mp3", b"ID3", "audio/mpeg")})
+
+        assert response.status_code == 200
+        assert response.json()["transcript"] == "hello world"
+        assert response.json()["duplicate"] == {"record_id": 7, "similarity": 0.93}
+        assert response.json()["model"] == "openai/whisper-tiny"
+        mock_get_vad.assert_not_called()
+        MockTransService.assert_not_called()
+        insert_kwargs = mock_get_sqlite.return_value.insert_transcription.call_args.kwargs
+        assert insert_kwargs["duplicate_of"] == 7
+        assert insert_kwargs["speech_ratio"] == 0.8
+        assert insert_kwargs["model"] == "openai/whisper-tiny"
+
+def test_transcribe_does_not_reuse_transcript_of_another_model(model_router):
+    duplicate = {"id": 7, "transcription": "hello world", "speech_ratio": 0.8, "similarity": 0.93, "model": "openai/whisper-tiny"}
+
+    with patch("routers.stt.AudioReader") as MockAudioReader, \
+         patch("routers.stt.AudioService") as MockAudioService, \
+         patch("routers.stt.find_near_duplicate", AsyncMock(return_value=(np.zeros(0, dtype=np.uint32), duplicate))), \
+         patch("routers.stt.get_vad_service") as mock_get_vad, \
+         patch("routers.stt.TranscriptionService") as MockTransService, \
+         patch("routers.stt.get_fingerprint_service") as mock_get_fingerprint, \
+         patch("routers.stt.get_sqlite_service") as mock_get_sqlite:
+
+        MockAudioReader.return_value.get_audio_info.return_value = {
+            "file_name": "copy.mp3", "audio_format": "mp3", "channel": 1, "sample_rate": 44100, "duration": 6.0
+        }
+        MockAudioReader.return_value.get_audio_content.return_value = (b"", BytesIO())
+        MockAudioService.return_value.preprocess_audio = AsyncMock(return_value=BytesIO())
+        mock_get_vad.return_value.detect_speech = AsyncMock(return_value={"speech_ratio": 0.8, "speech_duration": 4.8})
+        MockTransService.return_value.transcribe = AsyncMock(return_value={"text": "hello world, large"})
+        mock_get_fingerprint.return_value.index = AsyncMock()
+        mock_get_sqlite.return_value.insert_transcription = AsyncMock(return_value=8)
+
+        ## The duplicate was transcribed by the fast tier, this upload asks for the accurate one
+        response = client.post("/stt/transcribe", files={"audio": ("copy.mp3", b"ID3", "audio/mpeg")}, headers={"X-STT-Tier": "accurate"})
+
+        assert response.status_code == 200
+        assert response.json()["transcript"] == "hello world, large"
+        assert response.json()["model"] == "openai/whisper-large-v3"
+        assert response.json()["duplicate"] is None
+        MockTransService.assert_called_once()
+        insert_kwargs = mock_get_sqlite.return_value.insert_transcription.call_args.kwargs
+        assert (insert_kwargs["duplicate_of"], insert_kwargs["model"]) == (None, "openai/whisper-large-v3")
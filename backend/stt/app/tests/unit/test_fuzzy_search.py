@@ -0,0 +1,104 @@
+"""
+Unit test for the typo tolerant search. This test verifies:
+1. Misspelled keywords find records, ranked by similarity score
+2. The similarity threshold filters weak matches
+3. The trigram index follows inserts, deletes and transcript replacements, words no record uses leave the vocabulary
+   with their trigrams
+4. GET /data/search?fuzzy=true returns scored records
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi.testclient import TestClient
+from main import app
+from services.pysqlite_service import SQLiteService
+from utils.trigram import similarity, split_words, word_trigrams
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def sqlite_service(tmp_path):
+    service = SQLiteService(str(tmp_path / "transcriptions.db"))
+    service._initialize_db()
+    return service
+
+
+async def insert_records(service):
+    for index, text in enumerate([
+        "i saw this pretty butterfly and followed it",
+        "help me find my parents",
+        "the butter is in the fridge"
+    ]):
+        await service.insert_transcription(
+            file_name=f"sample{index}.mp3",
+            audio_format="mp3",
+            channel=1,
+            sample_rate=16000,
+            duration=1.0,
+            transcription=text
+        )
+
+
+def test_trigrams_and_similarity():
+    assert split_words("Sample_1.MP3, can't") == ["sample_1", "mp3", "can", "t"]
+    assert word_trigrams("cat") == {"  c", " ca", "cat", "at "}
+    assert similarity(word_trigrams("butterfly"), word_trigrams("butterfly")) == 1.0
+    assert 0.5 < similarity(word_trigrams("buterfly"), word_trigrams("butterfly")) < 1.0
+    assert similarity(word_trigrams("parents"), word_trigrams("pretty")) < 0.2
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_search_ranks_misspellings(sqlite_service):
+    await insert_records(sqlite_service)
+
+    records = await sqlite_service.fuzzy_search_transcriptions("buterfly", threshold=0.3)
+    assert [record["id"] for record in records] == [1, 3]
+    assert records[0]["score"] > records[1]["score"]
+
+    records = await sqlite_service.fuzzy_search_transcriptions("buterfly", threshold=0.6)
+    assert [record["id"] for record in records] == [1]
+
+    assert await sqlite_service.fuzzy_search_transcriptions("xyzzy", threshold=0.3) == []
+
+    records = await sqlite_service.fuzzy_search_transcriptions("buterfly folowed", threshold=0.5)
+    assert [record["id"] for record in records] == [1]
+
+
+@pytest.mark.asyncio
+async def test_trigram_index_follows_changes(sqlite_service):
+    await insert_records(sqlite_service)
+
+    await sqlite_service.delete_transcription(1)
+    records = await sqlite_service.fuzzy_search_transcriptions("butterfly", threshold=0.6)
+    assert records == []
+
+    await sqlite_service.apply_backfill_batch([(2, "help me find my butterfly")], model="openai/whisper-base", vad_threshold=0.5)
+    records = await sqlite_service.fuzzy_search_transcriptions("butterfly", threshold=0.6)
+    assert [record["id"] for record in records] == [2]
+    assert await sqlite_service.fuzzy_search_transcriptions("parents", threshold=0.6) == []
+
+    cursor = sqlite_service.db.cursor
+    cursor.execute("SELECT COUNT(*) FROM transcription_word WHERE word = 'parents' OR doc_count <= 0")
+    assert cursor.fetchone()[0] == 0
+    cursor.execute("SELECT COUNT(*) FROM transcription_word_trigram WHERE word_id NOT IN (SELECT id FROM transcription_word)")
+    assert cursor.fetchone()[0] == 0
+    cursor.execute("""
+        SELECT COUNT(*) FROM transcription_trigram_stats AS stats
+        WHERE word_count != (SELECT COUNT(*) FROM transcription_word_trigram WHERE trigram = stats.trigram)
+    """)
+    assert cursor.fetchone()[0] == 0
+    cursor.execute("SELECT COUNT(*) FROM transcription_trigram_stats WHERE trigram = 'ent'")  # Only "parents" had it
+    assert cursor.fetchone()[0] == 0
+
+
+def test_fuzzy_search_endpoint(monkeypatch):
+    service = MagicMock()
+    service.fuzzy_search_transcriptions = AsyncMock(return_value=[{"id": 2, "file_name": "sample1.mp3", "score": 0.33}])
+    monkeypatch.setattr(SQLiteService, "_instance", service)
+
+    response = client.get("/data/search", params={"keyword": " parnets ", "fuzzy": "true", "threshold": 0.3, "limit": 10})
+    assert response.status_code == 200
+    assert response.json() == {"record": 1, "data": [{"id": 2, "file_name": "sample1.mp3", "score": 0.33}]}
+    service.fuzzy_search_transcriptions.assert_awaited_once_with("parnets", threshold=0.3, limit=10)
+    service.search_transcriptions.assert_not_called()
@@ -0,0 +1,122 @@
+"""
+Unit test for the load-testing harness. This test verifies:
+1. The HuggingFace stand-in answers 503 "currently loading" during the loading phase, then 200 with a transcript
+2. The stand-in injects 500 errors at the configured rate and rejects invalid latency distributions
+3. TranscriptionService targets HF_API_BASE_URL, so the API can be pointed at the stand-in
+4. The load generator parses Server-Timing headers and computes percentiles
+5. POST /stt/transcribe reports per stage durations in a Server-Timing header
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+from io import BytesIO
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from main import app
+from loadtest.hf_standin import LatencyDistribution, StandInConfig, create_app
+from loadtest.load_generator import parse_server_timing, percentile, summarize
+from services.transcription_service import TranscriptionService
+
+
+def make_wav(seconds: float = 1.0) -> bytes:
+    buffer = BytesIO()
+    sf.write(buffer, np.zeros(int(16000 * seconds)), 16000, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+"""
+Unit test for the HuggingFace stand-in
+"""
+def test_standin_loading_then_ready():
+    standin = TestClient(create_app(StandInConfig(latency="fixed:0", loading_seconds=0.2, text="hello world")))
+
+    response = standin.post("/models/openai/whisper-tiny", content=make_wav())
+    assert response.status_code == 503
+    assert "currently loading" in response.json()["error"]
+    assert 0 < response.json()["estimated_time"] <= 0.2
+
+    with patch("loadtest.hf_standin.time.monotonic", return_value=1e9):
+        response = standin.post("/models/openai/whisper-tiny", content=make_wav())
+    assert response.status_code == 200
+    assert response.json() == {"text": "hello world"}
+
+    assert standin.get("/stats").json()["responses"]["openai/whisper-tiny"] == {"503": 1, "200": 1}
+
+def test_standin_error_rate():
+    standin = TestClient(create_app(StandInConfig(latency="fixed:0", error_rate=1.0)))
+    assert standin.post("/models/openai/whisper-tiny", content=make_wav()).status_code == 500
+
+    standin = TestClient(create_app(StandInConfig(latency="fixed:0", seed=1)))
+    response = standin.post("/models/openai/whisper-tiny", content=make_wav(2.0))
+    assert response.status_code == 200
+    assert len(response.json()["text"].split()) == 5  # ~2.5 words per second of audio
+
+def test_latency_distributions():
+    import random
+
+    rng = random.Random(0)
+    assert LatencyDistribution("fixed:0.5").sample(rng) == 0.5
+    assert 1.0 <= LatencyDistribution("uniform:1:2").sample(rng) <= 2.0
+    assert LatencyDistribution("lognormal:0.8:0.5").sample(rng) > 0
+    assert LatencyDistribution("exponential:0.3").sample(rng) >= 0
+
+    with pytest.raises(ValueError):
+        LatencyDistribution("normal:1")
+    with pytest.raises(ValueError):
+        LatencyDistribution("uniform:1")
+
+def test_transcription_service_base_url(monkeypatch):
+    monkeypatch.setenv("HF_API_BASE_URL", "http://127.0.0.1:8081/models/")
+    service = TranscriptionService(api_key="test", model="openai/whisper-tiny")
+    assert service.api_url == "http://127.0.0.1:8081/models/openai/whisper-tiny"
+
+
+"""
+Unit test for the load generator report helpers
+"""
+def test_parse_server_timing():
+    assert parse_server_timing("decode;dur=12.5, vad;dur=40.1, upstream;desc=\"HF\";dur=300") == {
+        "decode": 12.5, "vad": 40.1, "upstream": 300.0
+    }
+    assert parse_server_timing(None) == {}
+    assert parse_server_timing("cache, db;dur=abc") == {}
+
+def test_percentiles_and_summary():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == pytest.approx(50.5)
+    assert percentile(values, 99) == pytest.approx(99.01)
+    assert percentile([], 50) is None
+
+    results = [{"status": 200, "latency": float(i), "stages": {"vad": 1.0}} for i in range(9)] + \
+              [{"status": 503, "latency": 1.0, "stages": {}}]
+    summary = summarize(results, elapsed=2.0)
+    assert summary["statuses"] == {"200": 9, "503": 1}
+    assert summary["error_rate"] == 0.1
+    assert summary["throughput_rps"] == 4.5
+    assert summary["latency_ms"]["p50"] == 4.0
+    assert summary["stages_ms"]["vad"] == {"p50": 1.0, "p95": 1.0, "p99": 1.0}
+
+
+"""
+Unit test for the Server-Timing header of /stt/transcribe
+"""
+def test_transcribe_reports_server_timing():
+    client = TestClient(app)
+    audio_info = {"file_name": "silence.wav", "audio_format": "wav", "channel": 1, "sample_rate": 16000, "duration": 1.0}
+
+    with patch("routers.stt.AudioReader") as MockAudioReader, \
+         patch("routers.stt.AudioService") as MockAudioService, \
+         patch("routers.stt.get_sqlite_service") as mock_get_sqlite:
+
+        MockAudioReader.return_value.get_audio_info.return_value = audio_info
+        MockAudioReader.return_value.get_audio_content.return_value = (b"", BytesIO(make_wav()))
+        MockAudioService.return_value.preprocess_audio = AsyncMock(return_value=BytesIO(make_wav()))
+        mock_get_sqlite.return_value.insert_transcription = AsyncMock(return_value=1)
+
+        response = client.post("/stt/transcribe", files={"audio": ("silence.wav", b"RIFF", "audio/wav")})
+
+    assert response.status_code == 200
+    stages = parse_server_timing(response.headers["server-timing"])
+    assert {"probe", "scheduler", "admission", "decode", "vad", "upstream", "store"} <= set(stages)
+    assert all(duration >= 0 for duration in stages.values())
@@ -0,0 +1,122 @@
+"""
+Unit test for filtered metadata queries. This test verifies:
+1. Records are filtered by audio format, sample rate, channel, duration range and created_at range
+2. Keyset pagination on (created_at, id) returns every record exactly once, also for equal timestamps
+3. EXPLAIN QUERY PLAN shows the composite indexes serving both the filters and the order (no full scan, no sort)
+4. GET /data/transcriptions returns pages with next_cursor, rejects invalid cursors and keeps the unfiltered listing
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi.testclient import TestClient
+from main import app
+from services.pysqlite_service import SQLiteService
+from services.query_cache_service import QueryCache
+
+client = TestClient(app)
+
+RECORDS = [
+    # (audio_format, sample_rate, channel, duration, created_at)
+    ("mp3", 44100, 2, 700.0, "2024-11-04 10:00:00"),
+    ("mp3", 44100, 2, 30.0, "2024-11-05 10:00:00"),
+    ("mp3", 8000, 1, 900.0, "2024-10-01 10:00:00"),
+    ("wav", 8000, 1, 12.0, "2024-11-06 10:00:00"),
+    ("wav", 8000, 1, 15.0, "2024-11-06 10:00:00"),
+    ("wav", 16000, 1, 3.0, "2024-11-06 10:00:00"),
+]
+
+
+@pytest.fixture
+def sqlite_service(tmp_path):
+    service = SQLiteService(str(tmp_path / "metadata.db"))
+    service._initialize_db()
+    for audio_format, sample_rate, channel, duration, created_at in RECORDS:
+        service.db.cursor.execute(
+            """INSERT INTO transcription_result (file_name, audio_format, channel, sample_rate, duration, transcription, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (f"file.{audio_format}", audio_format, channel, sample_rate, duration, "hello", created_at)
+        )
+    service.db.conn.commit()
+    yield service
+    service.db.conn.close()
+
+
+def query_plan(service, **filters):
+    sql, params = service._metadata_query(**filters)
+    service.db.cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+    return " | ".join(row[3] for row in service.db.cursor.fetchall())
+
+
+"""
+Unit test for SQLiteService.query_transcriptions
+"""
+@pytest.mark.asyncio
+async def test_filters(sqlite_service):
+    records, _ = await sqlite_service.query_transcriptions(audio_format="mp3", min_duration=600, start="2024-11-01", end="2024-11-08")
+    assert [record["id"] for record in records] == [1]
+
+    records, _ = await sqlite_service.query_transcriptions(sample_rate=8000, channel=1)
+    assert [record["id"] for record in records] == [5, 4, 3]
+
+    records, _ = await sqlite_service.query_transcriptions(min_duration=10, max_duration=30)
+    assert [record["id"] for record in records] == [5, 4, 2]
+
+@pytest.mark.asyncio
+async def test_keyset_pagination(sqlite_service):
+    seen, after = [], None
+    while True:
+        records, after = await sqlite_service.query_transcriptions(after=after, limit=2)
+        seen.extend(record["id"] for record in records)
+        if after is None:
+            break
+    assert seen == [6, 5, 4, 2, 1, 3]  # Newest first, id breaks ties between equal created_at
+
+@pytest.mark.parametrize("filters, index", [
+    ({}, "idx_transcription_result_created_at"),
+    ({"after": ("2024-11-06 10:00:00", 5)}, "idx_transcription_result_created_at"),
+    ({"start": "2024-11-01", "end": "2024-11-08"}, "idx_transcription_result_created_at"),
+    ({"audio_format": "mp3", "min_duration": 600, "start": "2024-11-01", "end": "2024-11-08"}, "idx_transcription_result_format_created_at"),
+    ({"audio_format": "mp3", "after": ("2024-11-06 10:00:00", 5)}, "idx_transcription_result_format_created_at"),
+    ({"sample_rate": 8000, "channel": 1}, "idx_transcription_result_rate_channel_created_at"),
+    ({"sample_rate": 8000, "channel": 1, "after": ("2024-11-06 10:00:00", 5)}, "idx_transcription_result_rate_channel_created_at"),
+])
+def test_query_plan_uses_composite_index(sqlite_service, filters, index):
+    plan = query_plan(sqlite_service, **filters)
+    assert f"USING INDEX {index}" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+"""
+Unit test for GET /data/transcriptions with filters
+"""
+@pytest.fixture
+def mock_sqlite_service(monkeypatch):
+    service = MagicMock()
+    service.data_generation = AsyncMock(return_value=(1, 0, 1))
+    service.get_all_transcriptions = AsyncMock(return_value=[{"id": 1}])
+    service.query_transcriptions = AsyncMock(return_value=([{"id": 7, "created_at": "2024-11-06 10:00:00"}], ("2024-11-06 10:00:00", 7)))
+    monkeypatch.setattr(SQLiteService, "_instance", service)
+    monkeypatch.setattr(QueryCache, "_instance", QueryCache(enabled=True))
+    return service
+
+def test_filtered_page_and_cursor(mock_sqlite_service):
+    response = client.get("/data/transcriptions", params={"audio_format": "MP3", "min_duration": 600, "limit": 1})
+    assert response.status_code == 200
+    assert response.json()["record"] == 1
+    next_cursor = response.json()["next_cursor"]
+
+    kwargs = mock_sqlite_service.query_transcriptions.call_args.kwargs
+    assert (kwargs["audio_format"], kwargs["min_duration"], kwargs["limit"], kwargs["after"]) == ("mp3", 600, 1, None)
+
+    mock_sqlite_service.query_transcriptions.return_value = ([], None)
+    response = client.get("/data/transcriptions", params={"audio_format": "mp3", "min_duration": 600, "limit": 1, "cursor": next_cursor})
+    assert response.json() == {"record": 0, "data": [], "next_cursor": None}
+    assert mock_sqlite_service.query_transcriptions.call_args.kwargs["after"] == ("2024-11-06 10:00:00", 7)
+
+def test_invalid_cursor(mock_sqlite_service):
+    response = client.get("/data/transcriptions", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_unfiltered_listing_unchanged(mock_sqlite_service):
+    assert client.get("/data/transcriptions").json() == {"record": 1, "data": [{"id": 1}]}
+    mock_sqlite_service.query_transcriptions.assert_not_called()
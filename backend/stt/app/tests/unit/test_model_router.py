@@ -0,0 +1,79 @@
+"""
+Unit test for duration based model tier routing. This test verifies:
+1. Tiers are selected by original duration and post-VAD speech length, with the last tier as fallback
+2. Header and endpoint overrides take precedence, unknown tiers are rejected before the upload is processed
+3. Per tier latency, audio seconds and cost metrics are recorded
+"""
+
+import pytest
+from fastapi import HTTPException
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from main import app
+from services.model_router_service import ModelRouter, ModelTier
+
+
+@pytest.fixture
+def model_router():
+    return ModelRouter(
+        tiers=[
+            ModelTier(name="fast", model="openai/whisper-tiny", max_speech_duration=5, cost_per_second=0.001),
+            ModelTier(name="standard", model="openai/whisper-base", max_duration=600),
+            ModelTier(name="accurate", model="openai/whisper-large-v3", cost_per_second=0.01)
+        ],
+        endpoint_tiers={}
+    )
+
+
+def test_select_tier_by_duration(model_router):
+    assert model_router.select_tier(duration=30, speech_duration=2).name == "fast"
+    assert model_router.select_tier(duration=30, speech_duration=20).name == "standard"
+    assert model_router.select_tier(duration=3600, speech_duration=1200).name == "accurate"
+
+
+def test_select_tier_overrides(model_router):
+    model_router.endpoint_tiers = {"/stt/transcribe": "standard"}
+
+    assert model_router.select_tier(duration=2, speech_duration=2, endpoint="/stt/transcribe").name == "standard"
+    assert model_router.select_tier(duration=2, speech_duration=2, requested="accurate", endpoint="/stt/transcribe").name == "accurate"
+
+    with pytest.raises(HTTPException) as exc_info:
+        model_router.select_tier(duration=2, speech_duration=2, requested="unknown")
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_track_records_metrics(model_router):
+    tier = model_router.get_tier("accurate")
+
+    async with model_router.track(tier, speech_duration=10):
+        pass
+    with pytest.raises(RuntimeError):
+        async with model_router.track(tier, speech_duration=10):
+            raise RuntimeError("upstream failed")
+
+    metrics = model_router.snapshot()["tiers"][2]["metrics"]
+    assert metrics["requests"] == 2
+    assert metrics["errors"] == 1
+    assert metrics["audio_seconds"] == 10
+    assert metrics["estimated_cost"] == pytest.approx(0.1)
+
+
+"""
+Unit test for the X-STT-Tier header of POST /stt/transcribe
+"""
+def test_unknown_tier_rejected_before_processing(monkeypatch, model_router):
+    monkeypatch.setattr(ModelRouter, "_instance", model_router)
+
+    with patch("routers.stt.AudioReader") as MockAudioReader, \
+         patch("routers.stt.store_artifacts") as mock_store_artifacts:
+        response = TestClient(app).post(
+            "/stt/transcribe",
+            files={"audio": ("sample.wav", b"RIFF", "audio/wav")},
+            headers={"X-STT-Tier": "unknown"}
+        )
+
+    assert response.status_code == 400
+    assert "unknown" in response.json()["detail"]
+    MockAudioReader.assert_not_called()
+    mock_store_artifacts.assert_not_called()
@@ -0,0 +1,175 @@
+"""
+Unit test for the query result cache. This test verifies:
+1. Results are evicted least recently used first, bounded by entry count and total size
+2. A lookup at another generation is a miss and drops the stale entry, hit rate is reported
+3. The database generation changes on insert, delete and on commits of other connections, not on reads
+4. GET /data/transcriptions and /data/search serve cached bodies until the generation changes
+5. Compressed variants are kept per encoding with the entry, counted in its size and reused on later hits
+"""
+
+import sqlite3
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi.testclient import TestClient
+from main import app
+from services.pysqlite_service import SQLiteService
+from services.query_cache_service import QueryCache, normalize_keyword
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def sqlite_service(tmp_path):
+    service = SQLiteService(str(tmp_path / "cache.db"))
+    service._initialize_db()
+    yield service
+    service.db.conn.close()
+
+
+@pytest.fixture
+def query_cache(monkeypatch):
+    cache = QueryCache(max_entries=8, max_bytes=1024 * 1024, enabled=True)
+    monkeypatch.setattr(QueryCache, "_instance", cache)
+    return cache
+
+
+async def insert(service, file_name: str, transcription: str):
+    return await service.insert_transcription(
+        file_name=file_name, audio_format="wav", channel=1, sample_rate=16000, duration=1.0, transcription=transcription
+    )
+
+
+"""
+Unit test for QueryCache
+"""
+def test_lru_eviction_by_entries_and_size():
+    cache = QueryCache(max_entries=2, max_bytes=100, enabled=True)
+    cache.put(("a",), (1,), b"a" * 10)
+    cache.put(("b",), (1,), b"b" * 10)
+    assert cache.get(("a",), (1,)).body == b"a" * 10  # a is now the most recently used
+
+    cache.put(("c",), (1,), b"c" * 10)
+    assert cache.get(("b",), (1,)) is None
+    assert cache.get(("a",), (1,)) is not None
+
+    cache.put(("d",), (1,), b"d" * 90)
+    assert cache.total_bytes <= 100
+    assert cache.snapshot()["evictions"] == 2
+
+    cache.put(("e",), (1,), b"e" * 101)  # Larger than the whole cache, returned but not kept
+    assert cache.get(("e",), (1,)) is None
+
+def test_stale_generation_is_a_miss():
+    cache = QueryCache(max_entries=8, max_bytes=1024, enabled=True)
+    result = cache.put(("search", "butterfly"), (1, 0, 1), b'{"record":0,"data":[]}')
+    assert result.etag.startswith('W/"')
+
+    assert cache.get(("search", "butterfly"), (1, 0, 1)).etag == result.etag
+    assert cache.get(("search", "butterfly"), (1, 1, 1)) is None
+    assert cache.get(("search", "butterfly"), (1, 0, 1)) is None  # The stale entry was dropped
+
+    snapshot = cache.snapshot()
+    assert (snapshot["hits"], snapshot["misses"], snapshot["stale"], snapshot["entries"]) == (1, 2, 1, 0)
+    assert snapshot["hit_rate"] == pytest.approx(1 / 3, abs=1e-4)
+
+def test_encoded_variants_cached_per_encoding():
+    cache = QueryCache(max_entries=8, max_bytes=1024, enabled=True)
+    entry = cache.put(("a",), (1,), b"a" * 100)
+    encode = MagicMock(side_effect=lambda body, encoding: encoding.encode() * 10)
+
+    assert cache.encoded(("a",), entry, "br", encode) == b"br" * 10
+    assert cache.encoded(("a",), entry, "br", encode) == b"br" * 10
+    assert cache.encoded(("a",), entry, "gzip", encode) == b"gzip" * 10
+    assert encode.call_count == 2
+    assert cache.total_bytes == 100 + 20 + 40
+    assert cache.snapshot()["compressions"] == 2
+
+    cache.put(("a",), (2,), b"b" * 100)  # Replaced, the variants leave with the old entry
+    assert cache.total_bytes == 100
+    assert cache.encoded(("a",), entry, "deflate", encode) == b"deflate" * 10
+    assert cache.total_bytes == 100  # Not kept for an entry that is no longer cached
+
+def test_normalize_keyword():
+    assert normalize_keyword("  Butterfly ") == "butterfly"
+    assert normalize_keyword("pretty  butterfly") == "pretty  butterfly"
+    assert normalize_keyword(" pretty  butterfly ", collapse_whitespace=True) == "pretty butterfly"
+    assert normalize_keyword("Ärger") == "Ärger"
+
+
+"""
+Unit test for SQLiteService.data_generation
+"""
+@pytest.mark.asyncio
+async def test_generation_follows_writes(sqlite_service):
+    initial = await sqlite_service.data_generation()
+    await sqlite_service.get_all_transcriptions()
+    assert await sqlite_service.data_generation() == initial
+
+    record_id = await insert(sqlite_service, "sample.wav", "pretty butterfly")
+    after_insert = await sqlite_service.data_generation()
+    assert after_insert != initial
+
+    await sqlite_service.delete_transcription(record_id)
+    assert await sqlite_service.data_generation() != after_insert
+
+@pytest.mark.asyncio
+async def test_generation_follows_other_connections(sqlite_service):
+    before = await sqlite_service.data_generation()
+
+    other = sqlite3.connect(sqlite_service.db_path)  # e.g. another gunicorn worker
+    other.execute("INSERT INTO transcription_result (file_name, transcription) VALUES ('other.wav', 'lost')")
+    other.commit()
+    other.close()
+
+    assert await sqlite_service.data_generation() != before
+
+
+"""
+Unit test for cached data endpoints
+"""
+def test_listing_served_from_cache_until_generation_changes(monkeypatch, query_cache):
+    service = MagicMock()
+    service.data_generation = AsyncMock(return_value=(1, 0, 1))
+    service.get_all_transcriptions = AsyncMock(return_value=[{"id": 1, "file_name": "sample.wav"}])
+    monkeypatch.setattr(SQLiteService, "_instance", service)
+
+    first = client.get("/data/transcriptions")
+    second = client.get("/data/transcriptions")
+    assert first.json() == second.json() == {"record": 1, "data": [{"id": 1, "file_name": "sample.wav"}]}
+    assert first.headers["etag"] == second.headers["etag"]
+    assert service.get_all_transcriptions.await_count == 1
+
+    service.data_generation.return_value = (1, 1, 1)
+    service.get_all_transcriptions.return_value = []
+    assert client.get("/data/transcriptions").json() == {"record": 0, "data": []}
+    assert service.get_all_transcriptions.await_count == 2
+
+    snapshot = client.get("/data/cache").json()
+    assert (snapshot["hits"], snapshot["misses"], snapshot["stale"]) == (1, 2, 1)
+
+def test_cached_listing_compressed_once_per_encoding(monkeypatch, query_cache):
+    service = MagicMock()
+    service.data_generation = AsyncMock(return_value=(1, 0, 1))
+    service.get_all_transcriptions = AsyncMock(return_value=[{"id": index, "file_name": f"sample{index}.wav"} for index in range(100)])
+    monkeypatch.setattr(SQLiteService, "_instance", service)
+
+    responses = [client.get("/data/transcriptions", headers={"Accept-Encoding": encoding}) for encoding in ("gzip", "gzip", "br", "br")]
+    assert [response.headers["content-encoding"] for response in responses] == ["gzip", "gzip", "br", "br"]
+    assert len({response.headers["etag"] for response in responses}) == 1
+    assert responses[0].json() == responses[3].json()
+    assert query_cache.snapshot()["compressions"] == 2
+
+def test_search_cache_keys(monkeypatch, query_cache):
+    service = MagicMock()
+    service.data_generation = AsyncMock(return_value=(1, 0, 1))
+    service.search_transcriptions = AsyncMock(return_value=[])
+    service.fuzzy_search_transcriptions = AsyncMock(return_value=[])
+    monkeypatch.setattr(SQLiteService, "_instance", service)
+
+    client.get("/data/search", params={"keyword": "Butterfly"})
+    client.get("/data/search", params={"keyword": " butterfly "})
+    assert service.search_transcriptions.await_count == 1
+
+    client.get("/data/search", params={"keyword": "butterfly", "fuzzy": True})
+    client.get("/data/search", params={"keyword": "butterfly", "fuzzy": True, "threshold": 0.7})
+    assert service.fuzzy_search_transcriptions.await_count == 2
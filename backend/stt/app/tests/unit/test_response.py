@@ -0,0 +1,59 @@
+"""
+Unit test for JSON responses of the data endpoints. This test verifies:
+1. Responses carry an ETag and unchanged listings return 304 Not Modified
+2. Compression is negotiated from Accept-Encoding above the size threshold
+3. Small bodies are sent uncompressed
+"""
+
+import orjson
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi.testclient import TestClient
+from main import app
+from services.pysqlite_service import SQLiteService
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def mock_sqlite_service(monkeypatch):
+    service = MagicMock()
+    service.get_all_transcriptions = AsyncMock(return_value=[
+        {"id": index, "file_name": f"sample{index}.mp3", "transcription": "sample content that is being tested " * 5}
+        for index in range(50)
+    ])
+    monkeypatch.setattr(SQLiteService, "_instance", service)
+    return service
+
+
+def test_etag_returns_not_modified(mock_sqlite_service):
+    response = client.get("/data/transcriptions")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = client.get("/data/transcriptions", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_changed_listing_returns_new_body(mock_sqlite_service):
+    etag = client.get("/data/transcriptions").headers["etag"]
+    mock_sqlite_service.get_all_transcriptions.return_value = []
+
+    response = client.get("/data/transcriptions", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json() == {"record": 0, "data": []}
+
+
+def test_gzip_negotiated_above_threshold(mock_sqlite_service):
+    response = client.get("/data/transcriptions", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["record"] == 50  # httpx decodes the gzip body transparently
+
+
+def test_small_body_not_compressed(mock_sqlite_service):
+    mock_sqlite_service.get_all_transcriptions.return_value = []
+    response = client.get("/data/transcriptions", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert orjson.loads(response.content) == {"record": 0, "data": []}
@@ -0,0 +1,215 @@
+"""
+Unit test for hot/cold retention. This test verifies:
+1. Archived transcripts round-trip through zstd and zstd with a trained dictionary, zlib values stay readable
+2. Records older than the cutoff move to the archive in batches, statistics rollups are unchanged, the records leave
+   the fuzzy search and fingerprint indexes
+3. Filtered queries (with keyset pagination), lookups by id, export and delete cover archived records transparently,
+   the unfiltered listing reads the hot table only
+4. The archive is not attached when the requested date range starts after the newest archived record
+5. GET /data/retention reports the retention state
+"""
+
+import zlib
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+from fastapi.testclient import TestClient
+from main import app
+from services.pysqlite_service import SQLiteService
+from services.retention_service import RetentionService
+from utils.archive_codec import ArchiveCodec
+
+client = TestClient(app)
+
+NOW = datetime(2024, 12, 1, tzinfo=timezone.utc)
+RECORDS = [
+    # (audio_format, duration, transcription, created_at)
+    ("mp3", 10.0, "pretty butterfly", "2024-09-01 10:00:00"),
+    ("mp3", 20.0, "help me find my parents", "2024-09-02 10:00:00"),
+    ("wav", 30.0, "the quick brown fox", "2024-09-02 10:00:00"),
+    ("wav", 40.0, "recent recording", "2024-11-30 10:00:00"),
+    ("mp3", 50.0, "another recent one", "2024-11-30 11:00:00"),
+]
+
+
+@pytest.fixture
+def sqlite_service(tmp_path, monkeypatch):
+    service = SQLiteService(str(tmp_path / "retention.db"))
+    service._initialize_db()
+    for audio_format, duration, transcription, created_at in RECORDS:
+        service.db.cursor.execute(
+            """INSERT INTO transcription_result (file_name, audio_format, channel, sample_rate, duration, speech_ratio, transcription, created_at)
+               VALUES (?, ?, 1, 16000, ?, 0.5, ?, ?)""",
+            (f"file.{audio_format}", audio_format, duration, transcription, created_at)
+        )
+        record_id = service.db.cursor.lastrowid
+        service._index_words(service.db.cursor, record_id, f"file.{audio_format}", transcription)
+        service.db.cursor.execute("INSERT INTO audio_fingerprint (record_id, frame_count, fingerprint) VALUES (?, 1, ?)", (record_id, b"\x00" * 4))
+        service.db.cursor.execute("INSERT INTO audio_fingerprint_hash (sub_hash, record_id, frame_offset) VALUES (?, ?, 0)", (record_id, record_id))
+    service.db.conn.commit()
+    monkeypatch.setattr(SQLiteService, "_instance", service)
+    yield service
+    service.db.conn.close()
+
+
+async def archive(batch_size: int = 2):
+    """Archive every record older than 30 days before NOW"""
+    return await RetentionService(days=30, batch_size=batch_size, batch_pause=0).run_once(now=NOW)
+
+
+"""
+Unit test for ArchiveCodec
+"""
+def test_codec_roundtrip():
+    text = "help me find my parents"
+
+    codec = ArchiveCodec()
+    data, codec_name = codec.compress(text)
+    assert codec_name == "zstd"
+    assert codec.decompress(data, codec_name) == text
+
+    samples = [f"recording {i} help me find my parents near the {word} station" for i, word in enumerate(["north", "south", "east", "west"] * 250)]
+    dictionary = ArchiveCodec.train_dictionary(samples, 4096)
+    codec.add_dictionary(1, dictionary)
+    data, codec_name = codec.compress(text)
+    assert codec_name == "zstd:1"
+    assert ArchiveCodec({1: dictionary}).decompress(data, codec_name) == text
+    assert ArchiveCodec().requires_dictionary(codec_name)
+
+    ## zlib is only read, for values archived before zstd was required
+    assert ArchiveCodec().decompress(zlib.compress(text.encode()), "zlib") == text
+
+
+"""
+Unit test for moving records to the archive
+"""
+@pytest.mark.asyncio
+async def test_move_keeps_stats_and_clears_indexes(sqlite_service):
+    stats_before = await sqlite_service.get_daily_stats()
+
+    assert await archive() == 3
+    assert await archive() == 0  # Nothing left to move
+
+    sqlite_service.db.cursor.execute("SELECT id FROM transcription_result ORDER BY id")
+    assert [row[0] for row in sqlite_service.db.cursor.fetchall()] == [4, 5]
+    sqlite_service.db.cursor.execute("SELECT id FROM archive.transcription_archive ORDER BY id")
+    assert [row[0] for row in sqlite_service.db.cursor.fetchall()] == [1, 2, 3]
+
+    assert await sqlite_service.get_daily_stats() == stats_before
+    assert await sqlite_service.search_transcriptions("butterfly") == []
+    sqlite_service.db.cursor.execute("SELECT COUNT(*) FROM transcription_word_posting WHERE record_id <= 3")
+    assert sqlite_service.db.cursor.fetchone()[0] == 0
+    sqlite_service.db.cursor.execute("SELECT COUNT(*) FROM audio_fingerprint_hash WHERE record_id <= 3")
+    assert sqlite_service.db.cursor.fetchone()[0] == 0
+
+    status = await sqlite_service.get_retention_status()
+    assert (status["watermark"], status["watermark_id"], status["archived_total"]) == ("2024-09-02 10:00:00", 3, 3)
+    assert status["archive_bytes"] > 0
+
+    ## Rebuilding the rollups from scratch counts the archived records too
+    assert await sqlite_service.rebuild_stats()
+    assert await sqlite_service.get_daily_stats() == stats_before
+
+
+"""
+Unit test for reads across the hot table and the archive
+"""
+@pytest.mark.asyncio
+async def test_listing_and_query_include_archive(sqlite_service):
+    await archive()
+
+    ## The unfiltered listing stays on the hot table, pages continue into the archive
+    records = await sqlite_service.get_all_transcriptions()
+    assert [record["id"] for record in records] == [5, 4]
+
+    seen, after = [], None
+    while True:
+        records, after = await sqlite_service.query_transcriptions(after=after, limit=2)
+        seen.extend(record["id"] for record in records)
+        if after is None:
+            break
+    assert seen == [5, 4, 3, 2, 1]
+    assert records[-1]["transcription"] == "pretty butterfly"
+    assert "codec" not in records[-1]
+
+    record = await sqlite_service.get_transcription(2)
+    assert record["transcription"] == "help me find my parents"
+    assert await sqlite_service.get_transcription(42) is None
+
+    records, _ = await sqlite_service.query_transcriptions(audio_format="mp3", start="2024-09-01", end="2024-12-01")
+    assert [record["id"] for record in records] == [5, 2, 1]
+    assert records[1]["transcription"] == "help me find my parents"
+
+@pytest.mark.asyncio
+async def test_archive_not_attached_for_recent_range(tmp_path, sqlite_service):
+    await archive()
+
+    ## A fresh instance (e.g. another worker) attaches the archive only when a query reaches into it
+    service = SQLiteService(str(tmp_path / "retention.db"))
+    service._initialize_db()
+    records, _ = await service.query_transcriptions(start="2024-11-01")
+    assert [record["id"] for record in records] == [5, 4]
+    assert service._archive_codec is None
+
+    records, _ = await service.query_transcriptions(start="2024-09-02")
+    assert [record["id"] for record in records] == [5, 4, 3, 2]
+    assert service._archive_codec is not None
+    service.db.conn.close()
+
+@pytest.mark.asyncio
+async def test_delete_archived_record(sqlite_service):
+    await archive()
+
+    assert await sqlite_service.get_transcription(1) is not None
+    assert await sqlite_service.delete_transcription(1)
+    assert await sqlite_service.get_transcription(1) is None
+    records, _ = await sqlite_service.query_transcriptions(start="2024-01-01")
+    assert [record["id"] for record in records] == [5, 4, 3, 2]
+    days = {day["day"]: day for day in await sqlite_service.get_daily_stats()}
+    assert "2024-09-01" not in days
+    assert days["2024-09-02"]["record_count"] == 2
+
+    sqlite_service.db.cursor.execute("SELECT day, audio_format, record_count FROM transcription_format_stats WHERE day < '2024-10-01' ORDER BY day, audio_format")
+    assert [tuple(row) for row in sqlite_service.db.cursor.fetchall()] == [("2024-09-02", "mp3", 1), ("2024-09-02", "wav", 1)]
+
+@pytest.mark.asyncio
+async def test_export_includes_archive(sqlite_service):
+    await archive()
+
+    rows = [row for chunk in sqlite_service.stream_transcriptions(["id", "transcription"], chunk_size=2) for row in chunk]
+    assert rows == [
+        (1, "pretty butterfly"), (2, "help me find my parents"), (3, "the quick brown fox"),
+        (4, "recent recording"), (5, "another recent one")
+    ]
+    rows = [row for chunk in sqlite_service.stream_transcriptions(["id"], start="2024-11-01") for row in chunk]
+    assert rows == [(4,), (5,)]
+
+
+"""
+Unit test for DELETE /data/delete_record
+"""
+def test_delete_record_looks_up_id(monkeypatch):
+    service = MagicMock()
+    service.get_transcription = AsyncMock(side_effect=lambda record_id: {"id": 1} if record_id == 1 else None)
+    service.delete_transcription = AsyncMock(return_value=True)
+    service.get_all_transcriptions = AsyncMock()
+    monkeypatch.setattr(SQLiteService, "_instance", service)
+
+    assert client.delete("/data/delete_record", params={"record_id": 1}).status_code == 200
+    assert client.delete("/data/delete_record", params={"record_id": 2}).status_code == 404
+    service.delete_transcription.assert_awaited_once_with(1)
+    service.get_all_transcriptions.assert_not_called()
+
+
+"""
+Unit test for GET /data/retention
+"""
+def test_retention_status_endpoint(monkeypatch):
+    service = MagicMock()
+    service.get_retention_status = AsyncMock(return_value={"watermark": "2024-09-02 10:00:00", "archived_total": 3})
+    monkeypatch.setattr(SQLiteService, "_instance", service)
+    monkeypatch.setattr(RetentionService, "_instance", RetentionService(days=30))
+
+    response = client.get("/data/retention")
+    assert response.status_code == 200
+    assert response.json() == {"retention_days": 30, "watermark": "2024-09-02 10:00:00", "archived_total": 3}
@@ -0,0 +1,149 @@
+"""
+Unit test for duration-aware scheduling of uploads. This test verifies:
+1. Uploads are classified into the interactive and bulk lanes by their duration
+2. Bulk work never holds more than its share of the slots, interactive clips start while long recordings run
+3. Waiting jobs start shortest audio first, and aging lets long recordings overtake clips that arrived much later
+4. A slot released before the block exits (before the upstream request) lets the next job start
+5. Per lane queue wait times are reported by the snapshot and GET /stt/scheduler
+"""
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from services.scheduler_service import LaneScheduler, wait_summary
+
+client = TestClient(app)
+
+
+async def job(scheduler: LaneScheduler, duration: float, started: list, release: asyncio.Event):
+    """Hold a slot until release is set, recording the start order"""
+    async with scheduler.schedule(duration, label=f"{duration:g}s") as slot:
+        started.append((duration, slot.lane))
+        await release.wait()
+
+
+"""
+Unit test for LaneScheduler
+"""
+def test_lanes():
+    scheduler = LaneScheduler(slots=4, interactive_max_seconds=30)
+    assert scheduler.lane(3) == "interactive"
+    assert scheduler.lane(30) == "interactive"
+    assert scheduler.lane(3600) == "bulk"
+    assert scheduler.bulk_slots == 3  # One slot always stays free for interactive clips
+
+@pytest.mark.asyncio
+async def test_bulk_cannot_take_every_slot():
+    scheduler = LaneScheduler(slots=2, bulk_slots=1, interactive_max_seconds=30, aging_rate=0)
+    started, release = [], asyncio.Event()
+
+    tasks = [asyncio.create_task(job(scheduler, 3600, started, release)), asyncio.create_task(job(scheduler, 1800, started, release))]
+    await asyncio.sleep(0.01)
+    assert started == [(3600, "bulk")]  # The second recording waits although a slot is free
+
+    tasks.append(asyncio.create_task(job(scheduler, 3, started, release)))
+    await asyncio.sleep(0.01)
+    assert started == [(3600, "bulk"), (3, "interactive")]
+    assert scheduler.snapshot()["lanes"]["bulk"]["queued"] == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert started[-1] == (1800, "bulk")
+    assert scheduler.running == {"interactive": 0, "bulk": 0}
+
+@pytest.mark.asyncio
+async def test_shortest_audio_first():
+    scheduler = LaneScheduler(slots=1, aging_rate=0)
+    started, release, blocker = [], asyncio.Event(), asyncio.Event()
+
+    tasks = [asyncio.create_task(job(scheduler, 5, started, blocker))]
+    await asyncio.sleep(0.01)
+    for duration in (3600, 10, 3):
+        tasks.append(asyncio.create_task(job(scheduler, duration, started, release)))
+    await asyncio.sleep(0.01)
+
+    release.set()
+    blocker.set()
+    await asyncio.gather(*tasks)
+    assert [duration for duration, _ in started] == [5, 3, 10, 3600]
+
+@pytest.mark.asyncio
+async def test_aging_prevents_starvation():
+    scheduler = LaneScheduler(slots=1, aging_rate=1000)  # Every second of waiting counts as 1000s less audio
+    started, release, blocker = [], asyncio.Event(), asyncio.Event()
+
+    tasks = [asyncio.create_task(job(scheduler, 5, started, blocker))]
+    await asyncio.sleep(0.01)
+    tasks.append(asyncio.create_task(job(scheduler, 100, started, release)))
+    await asyncio.sleep(0.2)  # The recording has aged by about 200s of audio
+    tasks.append(asyncio.create_task(job(scheduler, 3, started, release)))
+    await asyncio.sleep(0.01)
+
+    release.set()
+    blocker.set()
+    await asyncio.gather(*tasks)
+    assert [duration for duration, _ in started] == [5, 100, 3]
+
+    waits = scheduler.snapshot()["lanes"]["bulk"]["wait_seconds"]
+    assert waits["max"] >= 0.2
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    scheduler = LaneScheduler(slots=1, aging_rate=0)
+    started, release = [], asyncio.Event()
+
+    holder = asyncio.create_task(job(scheduler, 5, started, release))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(job(scheduler, 3, started, release))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert scheduler.snapshot()["lanes"]["interactive"]["queued"] == 0
+
+    release.set()
+    await holder
+    assert started == [(5, "interactive")]
+
+@pytest.mark.asyncio
+async def test_early_release():
+    scheduler = LaneScheduler(slots=1, aging_rate=0)
+    started, release, upstream = [], asyncio.Event(), asyncio.Event()
+
+    async def transcribe(duration):
+        async with scheduler.schedule(duration) as slot:
+            started.append(duration)
+            await slot.release()
+            await upstream.wait()  # The upstream request, no slot held
+            await slot.release()  # Releasing again on exit is a no-op
+
+    tasks = [asyncio.create_task(transcribe(5)), asyncio.create_task(job(scheduler, 3, started, release))]
+    await asyncio.sleep(0.01)
+    assert started == [5, (3, "interactive")]
+    assert scheduler.running == {"interactive": 1, "bulk": 0}
+
+    upstream.set()
+    release.set()
+    await asyncio.gather(*tasks)
+    assert scheduler.running == {"interactive": 0, "bulk": 0}
+
+def test_wait_summary():
+    assert wait_summary([]) == {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    summary = wait_summary([i / 100 for i in range(100)])
+    assert (summary["p50"], summary["p95"], summary["max"]) == (0.5, 0.95, 0.99)
+
+
+"""
+Unit test for GET /stt/scheduler
+"""
+def test_scheduler_status_endpoint(monkeypatch):
+    monkeypatch.setattr(LaneScheduler, "_instance", LaneScheduler(slots=3, bulk_slots=2, interactive_max_seconds=20))
+
+    response = client.get("/stt/scheduler")
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["slots"], body["bulk_slots"], body["interactive_max_seconds"]) == (3, 2, 20)
+    assert body["lanes"]["interactive"] == {
+        "running": 0, "queued": 0, "oldest_wait_seconds": 0.0, "total_scheduled": 0,
+        "wait_seconds": {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    }
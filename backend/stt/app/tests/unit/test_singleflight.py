@@ -0,0 +1,121 @@
+"""
+Unit test for single-flight coalescing of identical concurrent requests. This test verifies:
+1. Concurrent calls with the same key run the work once and share its result or exception
+2. The key is released when the work finishes, and a cancelled waiter does not cancel the work
+3. Concurrent identical uploads to POST /stt/transcribe share one pipeline run and upstream call
+"""
+
+import asyncio
+import httpx
+import numpy as np
+import pytest
+import soundfile as sf
+from io import BytesIO
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import HTTPException
+from main import app
+from services.singleflight_service import SingleFlight
+
+
+def make_wav(seconds: float = 1.0) -> BytesIO:
+    buffer = BytesIO()
+    sf.write(buffer, np.zeros(int(16000 * seconds)), 16000, format="WAV", subtype="PCM_16")
+    buffer.seek(0)
+    return buffer
+
+
+"""
+Unit test for SingleFlight
+"""
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"text": "hello"}
+
+    results = await asyncio.gather(*(single_flight.run("key", work) for _ in range(5)))
+
+    assert calls == 1
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert all(result == {"text": "hello"} for result, _ in results)
+    assert single_flight.snapshot() == {"in_flight": 0, "leaders": 1, "coalesced": 4, "failures": 0}
+
+    ## Released after completion, the next call runs the work again
+    await single_flight.run("key", work)
+    assert calls == 2
+
+@pytest.mark.asyncio
+async def test_errors_are_shared():
+    single_flight = SingleFlight()
+    work = AsyncMock(side_effect=HTTPException(status_code=503, detail="Upstream unavailable"))
+
+    results = await asyncio.gather(*(single_flight.run("key", work) for _ in range(3)), return_exceptions=True)
+
+    assert work.await_count == 1
+    assert all(isinstance(result, HTTPException) and result.status_code == 503 for result in results)
+    assert single_flight.snapshot()["failures"] == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_work():
+    single_flight = SingleFlight()
+    finished = asyncio.Event()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.set()
+        return "done"
+
+    leader = asyncio.create_task(single_flight.run("key", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(single_flight.run("key", work))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower == ("done", True)
+    assert finished.is_set()
+
+
+"""
+Unit test for coalescing in POST /stt/transcribe
+"""
+@pytest.mark.asyncio
+async def test_identical_uploads_are_coalesced(monkeypatch):
+    monkeypatch.setattr(SingleFlight, "_instance", SingleFlight())
+
+    async def slow_transcribe(audio):
+        await asyncio.sleep(0.1)
+        return {"text": "help me find my parents"}
+
+    audio_info = {"file_name": "sample.wav", "audio_format": "wav", "channel": 1, "sample_rate": 16000, "duration": 1.0}
+    speech = {"speech_timestamps": [{"start": 0, "end": 16000}], "speech_duration": 1.0, "speech_ratio": 1.0, "sample_rate": 16000}
+
+    with patch("routers.stt.AudioReader") as MockAudioReader, \
+         patch("routers.stt.AudioService") as MockAudioService, \
+         patch("routers.stt.get_vad_service") as mock_get_vad, \
+         patch("routers.stt.TranscriptionService") as MockTransService, \
+         patch("routers.stt.get_sqlite_service") as mock_get_sqlite:
+
+        MockAudioReader.return_value.get_audio_info.return_value = audio_info
+        MockAudioReader.return_value.file_content = b"RIFF"
+        MockAudioReader.return_value.get_audio_content.side_effect = lambda: (b"", make_wav())
+        MockAudioService.return_value.preprocess_audio = AsyncMock(side_effect=lambda **kwargs: make_wav())
+        mock_get_vad.return_value.detect_speech = AsyncMock(return_value=speech)
+        mock_get_vad.return_value.extract_speech = MagicMock(side_effect=lambda speech: make_wav())
+        MockTransService.return_value.transcribe = AsyncMock(side_effect=slow_transcribe)
+        mock_get_sqlite.return_value.insert_transcription = AsyncMock(return_value=1)
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            post = lambda content: client.post("/stt/transcribe", files={"audio": ("sample.wav", content, "audio/wav")})
+            first, second, other = await asyncio.gather(post(b"RIFF-same"), post(b"RIFF-same"), post(b"RIFF-other"))
+
+    assert first.status_code == second.status_code == other.status_code == 200
+    assert first.json() == second.json()
+    assert MockTransService.return_value.transcribe.await_count == 2  # One for the identical pair, one for the other upload
+    assert mock_get_sqlite.return_value.insert_transcription.await_count == 2
+    assert "singleflight" in second.headers["server-timing"]
+    assert "singleflight" not in first.headers["server-timing"]
@@ -0,0 +1,93 @@
+"""
+Unit test for the transcription statistics rollups. This test verifies:
+1. Rollups are updated incrementally on insert and delete, a failed delete leaves records and rollups unchanged
+2. Rebuilding from scratch gives the same result as the incremental maintenance
+3. Existing records are seeded into the rollups on first migration
+"""
+
+import pytest
+from services.pysqlite_service import SQLiteService, get_connection
+
+
+@pytest.fixture
+def sqlite_service(tmp_path):
+    service = SQLiteService(str(tmp_path / "transcriptions.db"))
+    service._initialize_db()
+    return service
+
+
+def insert_record(service, created_at, audio_format, duration, speech_ratio):
+    service.db.cursor.execute(
+        """INSERT INTO transcription_result (file_name, audio_format, channel, sample_rate, duration, transcription, speech_ratio, created_at)
+           VALUES ('sample', ?, 1, 16000, ?, 'text', ?, ?)""",
+        (audio_format, duration, speech_ratio, created_at)
+    )
+    service.db.conn.commit()
+    return service.db.cursor.lastrowid
+
+
+@pytest.mark.asyncio
+async def test_rollups_follow_insert_and_delete(sqlite_service):
+    insert_record(sqlite_service, "2024-11-14 08:00:00", "mp3", 10.0, 0.5)
+    record_id = insert_record(sqlite_service, "2024-11-14 20:00:00", "wav", 20.0, 0.7)
+    insert_record(sqlite_service, "2024-11-15 09:00:00", "mp3", 5.0, None)
+
+    days = {day["day"]: day for day in await sqlite_service.get_daily_stats()}
+    assert days["2024-11-14"]["record_count"] == 2
+    assert days["2024-11-14"]["total_duration"] == 30.0
+    assert days["2024-11-14"]["speech_ratio_sum"] == pytest.approx(1.2)
+    assert days["2024-11-14"]["formats"] == {"mp3": 1, "wav": 1}
+    assert days["2024-11-15"]["speech_ratio_count"] == 0
+
+    assert await sqlite_service.delete_transcription(record_id) is True
+    days = {day["day"]: day for day in await sqlite_service.get_daily_stats(start="2024-11-14", end="2024-11-15")}
+    assert list(days) == ["2024-11-14"]
+    assert days["2024-11-14"]["record_count"] == 1
+    assert days["2024-11-14"]["formats"] == {"mp3": 1}
+
+
+@pytest.mark.asyncio
+async def test_failed_delete_is_rolled_back(sqlite_service, monkeypatch):
+    record_id = insert_record(sqlite_service, "2024-11-14 08:00:00", "mp3", 10.0, 0.5)
+
+    def fail(cursor, record_id):
+        raise RuntimeError("disk I/O error")
+    monkeypatch.setattr(sqlite_service, "_unindex_words", fail)
+    assert await sqlite_service.delete_transcription(record_id) is False
+
+    ## The next commit on the shared connection must not write the half-done delete
+    insert_record(sqlite_service, "2024-11-15 08:00:00", "wav", 5.0, None)
+    assert await sqlite_service.get_transcription(record_id) is not None
+    days = {day["day"]: day for day in await sqlite_service.get_daily_stats()}
+    assert days["2024-11-14"]["record_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_incremental(sqlite_service):
+    for index in range(10):
+        insert_record(sqlite_service, f"2024-11-{10 + index % 3} 10:00:00", ["mp3", "wav"][index % 2], float(index), index / 10)
+
+    incremental = await sqlite_service.get_daily_stats()
+    assert await sqlite_service.rebuild_stats() is True
+    assert await sqlite_service.get_daily_stats() == incremental
+
+
+@pytest.mark.asyncio
+async def test_existing_records_are_seeded(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    conn = get_connection(db_path)
+    conn.execute("""
+        CREATE TABLE transcription_result (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, file_name TEXT, audio_format TEXT, channel INTEGER,
+            sample_rate INTEGER, duration REAL, transcription TEXT, created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("INSERT INTO transcription_result (audio_format, duration, created_at) VALUES ('mp3', 3.0, '2024-11-14 18:05:41')")
+    conn.commit()
+    conn.close()
+
+    service = SQLiteService(db_path)
+    service._initialize_db()
+    days = await service.get_daily_stats()
+    assert days[0]["day"] == "2024-11-14"
+    assert days[0]["record_count"] == 1
@@ -0,0 +1,182 @@
+"""
+Unit test for the upstream guard protecting the HuggingFace Inference API. This test verifies:
+1. Circuit breaker opens on error spikes, fails fast while open and half-opens to probe recovery
+2. Adaptive concurrency limit grows on fast successes and shrinks on errors
+3. UpstreamGuard rejects calls with 503 and Retry-After while the breaker is open
+4. "Model is currently loading" 503s during warm-up neither open the breaker nor shrink the concurrency limit,
+   a cancelled call marked ignored still propagates its cancellation
+5. transcribe() only warms up on loading 503s, other 503s are raised right away
+"""
+
+import asyncio
+import pytest
+from io import BytesIO
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import HTTPException
+from services.transcription_service import TranscriptionService
+from services.upstream_guard_service import AdaptiveConcurrencyLimiter, CircuitBreaker, UpstreamGuard
+
+
+"""
+Unit test for CircuitBreaker state transitions
+"""
+def test_circuit_breaker_opens_on_error_rate():
+    breaker = CircuitBreaker(window_size=10, min_calls=4, error_rate_threshold=0.5, reset_timeout=30)
+
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow_request() is False
+    assert breaker.retry_after() > 0
+
+def test_circuit_breaker_half_open_recovery():
+    breaker = CircuitBreaker(window_size=4, min_calls=1, error_rate_threshold=0.5, reset_timeout=0, half_open_probes=1)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Reset timeout elapsed, a single probe is allowed through
+    assert breaker.allow_request() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request() is False
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_circuit_breaker_half_open_failure_reopens():
+    breaker = CircuitBreaker(window_size=4, min_calls=1, error_rate_threshold=0.5, reset_timeout=0)
+
+    breaker.record_failure()
+    assert breaker.allow_request() is True
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+"""
+Unit test for AdaptiveConcurrencyLimiter (AIMD)
+"""
+@pytest.mark.asyncio
+async def test_limiter_increases_on_fast_success():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=1, max_limit=8, latency_target=1.0)
+
+    for _ in range(10):
+        assert await limiter.acquire(timeout=1) is True
+        await limiter.release(latency=0.1, success=True)
+
+    assert limiter.snapshot()["limit"] > 2
+
+@pytest.mark.asyncio
+async def test_limiter_decreases_on_failure_and_times_out():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=1, max_limit=8, latency_target=1.0)
+
+    assert await limiter.acquire(timeout=1) is True
+    await limiter.release(latency=5.0, success=False)
+    assert limiter.snapshot()["limit"] == 2
+
+    await limiter.acquire(timeout=1)
+    await limiter.acquire(timeout=1)
+    assert await limiter.acquire(timeout=0.05) is False
+
+
+"""
+Unit test for UpstreamGuard fail-fast behaviour
+"""
+@pytest.mark.asyncio
+async def test_guard_rejects_when_breaker_open():
+    guard = UpstreamGuard()
+    guard.breaker = CircuitBreaker(window_size=2, min_calls=1, error_rate_threshold=0.5, reset_timeout=60)
+
+    with pytest.raises(RuntimeError):
+        async with guard.call():
+            raise RuntimeError("upstream failed")
+
+    with pytest.raises(HTTPException) as exc_info:
+        async with guard.call():
+            pass
+
+    assert exc_info.value.status_code == 503
+    assert "Retry-After" in exc_info.value.headers
+    assert guard.snapshot()["circuit_breaker"]["state"] == CircuitBreaker.OPEN
+
+
+@pytest.mark.asyncio
+async def test_cancelled_ignored_call_propagates():
+    guard = UpstreamGuard()
+    started = asyncio.Event()
+
+    async def call():
+        async with guard.call() as outcome:
+            outcome.ignored = True
+            started.set()
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(call())
+    await started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert guard.limiter.in_flight == 0
+    assert guard.snapshot()["circuit_breaker"]["window_calls"] == 0
+
+
+"""
+Unit test for cold start 503s of the upstream
+"""
+def upstream_response(status_code: int, body: dict):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = body
+    response.content = b"{}"
+    return response
+
+@pytest.mark.asyncio
+async def test_warm_up_through_loading_503_keeps_breaker_closed(monkeypatch):
+    monkeypatch.setattr(UpstreamGuard, "_instance", UpstreamGuard())
+    monkeypatch.setenv("HF_RETRY_DELAY", "0")
+    monkeypatch.setenv("HF_MAX_RETRIES", "8")
+    loading = upstream_response(503, {"error": "Model openai/whisper-tiny is currently loading", "estimated_time": 20.0})
+    loaded = upstream_response(200, {"text": ""})
+
+    service = TranscriptionService(model="openai/whisper-tiny")
+    limit_before = service.guard.limiter.limit
+    with patch("services.transcription_service.requests.post", side_effect=[loading] * 6 + [loaded]):
+        assert await service.warm_up()
+
+    snapshot = service.guard.snapshot()
+    assert snapshot["circuit_breaker"]["state"] == CircuitBreaker.CLOSED
+    assert snapshot["circuit_breaker"]["window_calls"] == 1  # Only the 200 is an outcome
+    assert service.guard.limiter.limit >= limit_before
+    assert service.guard.limiter.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_real_503_still_counts_as_failure(monkeypatch):
+    monkeypatch.setattr(UpstreamGuard, "_instance", UpstreamGuard())
+    service = TranscriptionService(model="openai/whisper-tiny")
+
+    with patch("services.transcription_service.requests.post", return_value=upstream_response(503, {"error": "Service Unavailable"})):
+        await service._post(b"")
+
+    assert service.guard.breaker.error_rate() == 1.0
+
+@pytest.mark.asyncio
+async def test_transcribe_warms_up_only_while_loading(monkeypatch):
+    monkeypatch.setattr(UpstreamGuard, "_instance", UpstreamGuard())
+    service = TranscriptionService(model="openai/whisper-tiny")
+    service.warm_up = AsyncMock(return_value=True)
+
+    overloaded = upstream_response(503, {"error": "Service Unavailable"})
+    with patch("services.transcription_service.requests.post", return_value=overloaded) as mock_post:
+        with pytest.raises(HTTPException) as exc_info:
+            await service.transcribe(BytesIO(b"audio"))
+    assert exc_info.value.status_code == 503
+    assert mock_post.call_count == 1
+    service.warm_up.assert_not_called()
+
+    loading = upstream_response(503, {"error": "Model openai/whisper-tiny is currently loading", "estimated_time": 20.0})
+    with patch("services.transcription_service.requests.post", side_effect=[loading, upstream_response(200, {"text": "hello"})]):
+        assert await service.transcribe(BytesIO(b"audio")) == {"text": "hello"}
+    service.warm_up.assert_awaited_once()
@@ -0,0 +1,80 @@
+"""
+Unit test for VAD pre-screening and the silence short-circuit. This test verifies:
+1. Audio without speech produces no timestamps and an empty (zero frame) WAV instead of an error
+2. POST /stt/vad returns speech timestamps and speech ratio without calling the transcription service
+3. POST /stt/transcribe returns an empty transcript and no model for silent audio and never calls the HuggingFace API
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+from io import BytesIO
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from main import app
+from services.vad_service import get_vad_service
+
+client = TestClient(app)
+
+
+def make_silent_wav(seconds: float = 2.0) -> BytesIO:
+    buffer = BytesIO()
+    sf.write(buffer, np.zeros(int(16000 * seconds)), 16000, format="WAV", subtype="PCM_16")
+    buffer.seek(0)
+    return buffer
+
+
+audio_info = {
+    "file_name": "silence.wav",
+    "audio_format": "wav",
+    "channel": 1,
+    "sample_rate": 16000,
+    "duration": 2.0
+}
+
+
+@pytest.mark.asyncio
+async def test_detect_speech_on_silence():
+    vad_service = get_vad_service()
+    speech = await vad_service.detect_speech(make_silent_wav())
+
+    assert speech["speech_timestamps"] == []
+    assert speech["speech_ratio"] == 0.0
+    assert sf.info(vad_service.extract_speech(speech)).frames == 0
+
+
+def test_vad_endpoint_on_silence():
+    with patch("routers.stt.AudioReader") as MockAudioReader, \
+         patch("routers.stt.AudioService") as MockAudioService, \
+         patch("routers.stt.TranscriptionService") as MockTransService:
+
+        MockAudioReader.return_value.get_audio_info.return_value = audio_info
+        MockAudioReader.return_value.get_audio_content.return_value = (b"", make_silent_wav())
+        MockAudioService.return_value.preprocess_audio = AsyncMock(return_value=make_silent_wav())
+
+        response = client.post("/stt/vad", files={"audio": ("silence.wav", b"RIFF", "audio/wav")})
+
+        assert response.status_code == 200
+        assert response.json()["has_speech"] is False
+        assert response.json()["speech_timestamps"] == []
+        MockTransService.assert_not_called()
+
+
+def test_transcribe_skips_upstream_on_silence():
+    with patch("routers.stt.AudioReader") as MockAudioReader, \
+         patch("routers.stt.AudioService") as MockAudioService, \
+         patch("routers.stt.TranscriptionService") as MockTransService, \
+         patch("routers.stt.get_sqlite_service") as mock_get_sqlite:
+
+        MockAudioReader.return_value.get_audio_info.return_value = audio_info
+        MockAudioReader.return_value.get_audio_content.return_value = (b"", make_silent_wav())
+        MockAudioService.return_value.preprocess_audio = AsyncMock(return_value=make_silent_wav())
+        mock_get_sqlite.return_value.insert_transcription = AsyncMock(return_value=1)
+
+        response = client.post("/stt/transcribe", files={"audio": ("silence.wav", b"RIFF", "audio/wav")})
+
+        assert response.status_code == 200
+        assert response.json()["transcript"] == ""
+        assert response.json()["model"] is None  # No model was called
+        MockTransService.assert_not_called()
+        assert mock_get_sqlite.return_value.insert_transcription.call_args.kwargs["speech_ratio"] == 0.0
@@ -0,0 +1,73 @@
+"""
+Compression of archived transcripts (see services/retention_service.py).
+
+Transcripts are short and share most of their vocabulary, so on their own they barely compress. A zstd dictionary
+trained on earlier transcripts provides that shared context up front. Every value is stored with the name of its codec:
+- "zstd:<dictionary id>": zstd with a trained dictionary, stored in the archive database
+- "zstd": zstd without dictionary, until enough transcripts were archived to train one
+- "zlib": only read, values archived by earlier versions without zstandard
+so values written with an older dictionary stay readable.
+"""
+
+import zlib
+import zstandard
+
+ZSTD_LEVEL = 9
+
+
+class ArchiveCodec:
+    def __init__(self, dictionaries: dict = None):
+        self.dictionaries = {}
+        self.active_dictionary_id = None
+        self._compressors = {}
+        self._decompressors = {}
+        for dictionary_id, data in (dictionaries or {}).items():
+            self.add_dictionary(dictionary_id, data)
+
+
+    @staticmethod
+    def train_dictionary(samples: list, size: int) -> bytes:
+        """Train a zstd dictionary of at most size bytes on sample transcripts"""
+
+        return zstandard.train_dictionary(size, [sample.encode() for sample in samples]).as_bytes()
+
+
+    def add_dictionary(self, dictionary_id: int, data: bytes):
+        """Make a dictionary available for decompression, the newest one is used for compression"""
+
+        self.dictionaries[dictionary_id] = data
+        if self.active_dictionary_id is None or dictionary_id > self.active_dictionary_id:
+            self.active_dictionary_id = dictionary_id
+
+
+    def _zstd_dictionary(self, dictionary_id: int):
+        return zstandard.ZstdCompressionDict(self.dictionaries[dictionary_id]) if dictionary_id is not None else None
+
+
+    def compress(self, text: str):
+        """Returns (compressed bytes, codec name)"""
+
+        data = (text or "").encode()
+        dictionary_id = self.active_dictionary_id
+        if dictionary_id not in self._compressors:
+            self._compressors[dictionary_id] = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=self._zstd_dictionary(dictionary_id))
+        codec = f"zstd:{dictionary_id}" if dictionary_id is not None else "zstd"
+        return self._compressors[dictionary_id].compress(data), codec
+
+
+    def requires_dictionary(self, codec: str) -> bool:
+        """Whether values of this codec need a dictionary that has not been added"""
+
+        return codec.startswith("zstd:") and int(codec.split(":", 1)[1]) not in self.dictionaries
+
+
+    def decompress(self, data: bytes, codec: str) -> str:
+        if codec == "zlib":
+            return zlib.decompress(data).decode()
+        if codec is None or not codec.startswith("zstd"):
+            raise ValueError(f"Unknown archive codec {codec}")
+
+        dictionary_id = int(codec.split(":", 1)[1]) if ":" in codec else None
+        if dictionary_id not in self._decompressors:
+            self._decompressors[dictionary_id] = zstandard.ZstdDecompressor(dict_data=self._zstd_dictionary(dictionary_id))
+        return self._decompressors[dictionary_id].decompress(data).decode()
@@ -0,0 +1,110 @@
+"""
+In-process probing and decoding of uploads (see services/audio_processor_service.py), no ffprobe / ffmpeg subprocess
+and no temporary files per request.
+
+- libsndfile (soundfile): WAV, FLAC and OGG, metadata read from the file header
+- libav (PyAV, optional): MP3, AAC, M4A and the other containers ffmpeg reads, metadata from the container header
+Both return None for content they cannot read, callers then fall back to the pydub / ffmpeg subprocess path.
+
+Decoded audio is normalized to 16kHz mono int16, the input of VAD, fingerprinting and the artifact store.
+AUDIO_DECODER=ffmpeg disables the in-process path (default native).
+"""
+
+import os
+import numpy as np
+import soundfile as sf
+import torch
+from io import BytesIO
+from torchaudio.functional import resample
+
+try:
+    import av
+except ImportError:  # PyAV is optional, formats libsndfile cannot read fall back to the ffmpeg subprocess
+    av = None
+
+TARGET_SAMPLE_RATE = 16000
+# libsndfile format -> format name reported by ffprobe, so stored records look the same whichever path probed them
+SOUNDFILE_FORMATS = {"WAV": "wav", "WAVEX": "wav", "FLAC": "flac", "OGG": "ogg"}
+
+
+def native_enabled() -> bool:
+    return os.getenv("AUDIO_DECODER", "native").lower() != "ffmpeg"
+
+
+def probe(content: bytes):
+    """Returns audio_format, channel, sample_rate and duration from the file header, None when not readable in process"""
+
+    try:
+        info = sf.info(BytesIO(content))
+        if info.format in SOUNDFILE_FORMATS:
+            return {
+                "audio_format": SOUNDFILE_FORMATS[info.format],
+                "channel": info.channels,
+                "sample_rate": info.samplerate,
+                "duration": info.frames / info.samplerate
+            }
+    except Exception:
+        pass
+
+    if av is None:
+        return None
+    try:
+        with av.open(BytesIO(content)) as container:
+            stream = container.streams.audio[0]
+            if container.duration is not None:
+                duration = container.duration / av.time_base
+            else:
+                duration = float(stream.duration * stream.time_base)
+            return {
+                "audio_format": container.format.name,
+                "channel": len(stream.layout.channels),
+                "sample_rate": stream.codec_context.sample_rate,
+                "duration": duration
+            }
+    except Exception:
+        return None
+
+
+def decode(content: bytes, audio_format: str):
+    """Decode to 16kHz mono int16 samples, None when not readable in process"""
+
+    if audio_format in SOUNDFILE_FORMATS.values():
+        try:
+            return _decode_soundfile(content)
+        except Exception:
+            pass
+
+    if av is None:
+        return None
+    try:
+        return _decode_av(content)
+    except Exception:
+        return None
+
+
+def _decode_soundfile(content: bytes) -> np.ndarray:
+    samples, sample_rate = sf.read(BytesIO(content), dtype="float32", always_2d=True)
+    samples = samples.mean(axis=1)
+    if sample_rate != TARGET_SAMPLE_RATE:
+        samples = resample(torch.from_numpy(samples), sample_rate, TARGET_SAMPLE_RATE).numpy()
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def _decode_av(content: bytes) -> np.ndarray:
+    ## libswresample downmixes and resamples while decoding, frame by frame
+    with av.open(BytesIO(content)) as container:
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=TARGET_SAMPLE_RATE)
+        chunks = []
+        for frame in container.decode(container.streams.audio[0]):
+            chunks.extend(resampled.to_ndarray().reshape(-1) for resampled in resampler.resample(frame))
+        chunks.extend(resampled.to_ndarray().reshape(-1) for resampled in resampler.resample(None))
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16)
+
+
+def to_wav(samples: np.ndarray) -> BytesIO:
+    """16kHz mono int16 samples as a WAV file"""
+
+    buffer = BytesIO()
+    sf.write(buffer, samples, TARGET_SAMPLE_RATE, format="WAV", subtype="PCM_16")
+    buffer.seek(0)
+    return buffer
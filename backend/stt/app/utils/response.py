@@ -0,0 +1,79 @@
+"""
+Helpers for building JSON responses of the data endpoints from bodies serialized with orjson.
+
+Large listings are expensive to transfer, this module:
+1) Compresses with brotli (if installed) or gzip when the client accepts it and the body is above a size threshold,
+   through an encode callable so cached listings can reuse their compressed variants (QueryCache.encoded)
+2) Adds a weak ETag computed from the serialized body and answers 304 Not Modified when If-None-Match matches
+
+Configuration (environment variables):
+- RESPONSE_COMPRESSION_MIN_BYTES: Bodies smaller than this are sent uncompressed (default 1024)
+"""
+
+import os
+import gzip
+import hashlib
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+def _accepted_encodings(accept_encoding: str):
+    """Parse an Accept-Encoding header into the set of encodings with a non-zero quality"""
+
+    encodings = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name and quality > 0:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison as required for If-None-Match"""
+
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(","))
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    """Compress a body with a content encoding negotiated by build_json_response ("br" or "gzip")"""
+
+    if encoding == "br":
+        return brotli.compress(body, quality=4)
+    return gzip.compress(body, compresslevel=5)
+
+
+def build_json_response(request: Request, body: bytes, etag: str = None, encode=compress_body) -> Response:
+    """
+    Build a JSON response from an already serialized body, with ETag / If-None-Match and compression negotiation.
+    encode(body, encoding) returns the compressed body, the query cache passes one that keeps the result per encoding.
+    """
+
+    etag = etag or f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    if len(body) >= int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024")):
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        encoding = "br" if brotli is not None and "br" in accepted else "gzip" if "gzip" in accepted else None
+        if encoding:
+            body = encode(body, encoding)
+            headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type="application/json", headers=headers)
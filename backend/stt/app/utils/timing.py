@@ -0,0 +1,24 @@
+"""
+Per request stage timings, reported to clients in a Server-Timing header (e.g. "decode;dur=12.5, vad;dur=40.1").
+The load generator (loadtest/load_generator.py) and browser developer tools read it to break latency down by stage.
+"""
+
+import time
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+        self._last = time.perf_counter()
+
+
+    def lap(self, stage: str):
+        """Attribute the time since the previous lap (or creation) to a stage, repeated stages add up"""
+
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+
+    def header(self) -> str:
+        return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items())
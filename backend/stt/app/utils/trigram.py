@@ -0,0 +1,26 @@
+"""
+Trigram helpers for typo tolerant search.
+
+Text is lower-cased and split into words, every word is padded with two spaces in front and one at the end
+(as done by PostgreSQL's pg_trgm), so "cat" gives the trigrams "  c", " ca", "cat" and "at ".
+Similarity between two words is the Jaccard index of their trigram sets.
+"""
+
+import re
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def split_words(text: str):
+    return WORD_PATTERN.findall((text or "").lower())
+
+
+def word_trigrams(word: str):
+    padded = f"  {word} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def similarity(left: set, right: set) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
@@ -0,0 +1,134 @@
+"""
+Benchmark of in-process audio probing and decoding against the ffprobe / ffmpeg subprocess path.
+
+For each format, a synthetic clip (speech-band tones, 44.1kHz stereo) is encoded in memory and timed with:
+1) Probe: metadata from the file header (utils/audio_decoder.py) versus pydub's mediainfo_json (ffprobe subprocess)
+2) Decode: AudioService.preprocess_audio to 16kHz mono WAV, in process versus pydub (ffmpeg subprocess, temp files)
+
+MP3, AAC and M4A clips are encoded with PyAV, formats without an encoder in the installed build are skipped.
+The subprocess columns require ffmpeg / ffprobe on the PATH.
+
+Usage (from backend/stt, with the virtual environment activated):
+    python benchmarks/bench_decode.py --seconds 5 30 --repeat 10
+    python benchmarks/bench_decode.py --formats mp3 m4a
+"""
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import statistics
+import numpy as np
+import soundfile as sf
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from pydub.utils import mediainfo_json  # noqa: E402
+from services.audio_processor_service import AudioService  # noqa: E402
+from utils import audio_decoder  # noqa: E402
+
+try:
+    import av
+except ImportError:
+    av = None
+
+
+SAMPLE_RATE = 44100
+SOUNDFILE_FORMATS = {"wav": ("WAV", "PCM_16"), "flac": ("FLAC", "PCM_16"), "ogg": ("OGG", "VORBIS")}
+# format -> (container, codec) for PyAV
+AV_FORMATS = {"mp3": ("mp3", "libmp3lame"), "aac": ("adts", "aac"), "m4a": ("ipod", "aac")}
+
+
+def make_samples(seconds: float) -> np.ndarray:
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    mono = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.2 * np.sin(2 * np.pi * 1250 * t) * (np.sin(2 * np.pi * 3 * t) > 0)
+    return np.stack([mono, mono * 0.8], axis=1).astype(np.float32)
+
+
+def encode(samples: np.ndarray, audio_format: str):
+    """Clip encoded in memory, None when no encoder is available"""
+
+    if audio_format in SOUNDFILE_FORMATS:
+        buffer = BytesIO()
+        container_format, subtype = SOUNDFILE_FORMATS[audio_format]
+        sf.write(buffer, samples, SAMPLE_RATE, format=container_format, subtype=subtype)
+        return buffer.getvalue()
+
+    if av is None:
+        return None
+    container_format, codec = AV_FORMATS[audio_format]
+    buffer = BytesIO()
+    try:
+        with av.open(buffer, mode="w", format=container_format) as container:
+            stream = container.add_stream(codec, rate=SAMPLE_RATE, layout="stereo")
+            pcm = (samples * 32767).astype(np.int16)
+            for start in range(0, len(pcm), 1024):
+                frame = av.AudioFrame.from_ndarray(pcm[start:start + 1024].reshape(1, -1), format="s16", layout="stereo")
+                frame.sample_rate = SAMPLE_RATE
+                for packet in stream.encode(frame):
+                    container.mux(packet)
+            for packet in stream.encode(None):
+                container.mux(packet)
+    except Exception as e:
+        print(f"  {audio_format}: no encoder available ({e}), skipped", file=sys.stderr)
+        return None
+    return buffer.getvalue()
+
+
+def timed(function, repeat: int):
+    """Median of `repeat` runs in milliseconds"""
+
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+
+def decode_with(decoder: str, content: bytes, audio_format: str):
+    os.environ["AUDIO_DECODER"] = decoder
+    return asyncio.run(AudioService().preprocess_audio(audio_format=audio_format, audio_content=BytesIO(content)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process versus subprocess audio probing and decoding")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5, 30])
+    parser.add_argument("--formats", nargs="+", default=list(SOUNDFILE_FORMATS) + list(AV_FORMATS))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    subprocess_available = shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+    if not subprocess_available:
+        print("ffmpeg / ffprobe not on the PATH, subprocess columns skipped", file=sys.stderr)
+
+    for seconds in args.seconds:
+        samples = make_samples(seconds)
+        print(f"\n{seconds:g}s clips")
+        print(f"  {'format':<8} {'size (KB)':>10} {'probe native':>13} {'probe ffprobe':>14} {'decode native':>14} {'decode ffmpeg':>14}   (ms)")
+
+        for audio_format in args.formats:
+            content = encode(samples, audio_format)
+            if content is None:
+                continue
+            info = audio_decoder.probe(content)
+            if info is None:
+                print(f"  {audio_format:<8} not readable in process, skipped")
+                continue
+
+            probe_native = timed(lambda: audio_decoder.probe(content), args.repeat)
+            decode_native = timed(lambda: decode_with("native", content, info["audio_format"]), args.repeat)
+            if subprocess_available:
+                probe_ffprobe = f"{timed(lambda: mediainfo_json(BytesIO(content)), args.repeat):>14.1f}"
+                decode_ffmpeg = f"{timed(lambda: decode_with('ffmpeg', content, info['audio_format']), args.repeat):>14.1f}"
+            else:
+                probe_ffprobe = decode_ffmpeg = f"{'-':>14}"
+            print(f"  {audio_format:<8} {len(content) / 1024:>10.1f} {probe_native:>13.2f} {probe_ffprobe} {decode_native:>14.1f} {decode_ffmpeg}")
+
+
+if __name__ == "__main__":
+    main()
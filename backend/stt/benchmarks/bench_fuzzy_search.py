@@ -0,0 +1,122 @@
+"""
+Benchmark of the trigram fuzzy search against the LIKE substring search.
+
+For each table size, a synthetic database is built (or reused from --data-dir) with transcripts drawn from a
+Zipf distributed vocabulary of pseudo-words, and the same misspelled queries are timed with:
+1) search_transcriptions: LIKE '%term%', scans the whole table
+2) fuzzy_search_transcriptions: similar vocabulary words by trigrams, then posting lists of the matched words
+
+Usage (from backend/stt, with the virtual environment activated):
+    python benchmarks/bench_fuzzy_search.py --rows 10000 100000 1000000
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from services.pysqlite_service import SQLiteService  # noqa: E402
+
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "shi", "po", "ve", "da", "gri", "son", "bel", "tor", "fen", "ar", "ul", "om"]
+
+
+def make_vocabulary(size: int):
+    random.seed(7)
+    words = set()
+    while len(words) < size:
+        words.add("".join(random.choices(SYLLABLES, k=random.randint(2, 4))))
+    return sorted(words)
+
+
+def misspell(word: str):
+    """Swap two neighbouring letters, or drop one"""
+
+    index = random.randrange(len(word) - 1)
+    if random.random() < 0.5:
+        return word[:index] + word[index + 1] + word[index] + word[index + 2:]
+    return word[:index] + word[index + 1:]
+
+
+def build_database(path: Path, rows: int, vocabulary: list, batch_size: int = 5000):
+    service = SQLiteService(str(path))
+    service._initialize_db()
+    cursor = service.db.conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM transcription_result")
+    if cursor.fetchone()[0] >= rows:
+        return service
+
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    started = time.perf_counter()
+    for offset in range(0, rows, batch_size):
+        records = [
+            (
+                f"recording_{offset + index}.mp3",
+                " ".join(random.choices(vocabulary, weights=weights, k=random.randint(8, 40)))
+            )
+            for index in range(min(batch_size, rows - offset))
+        ]
+        with service.db.conn:
+            for file_name, transcription in records:
+                cursor.execute(
+                    """INSERT INTO transcription_result (file_name, audio_format, channel, sample_rate, duration, transcription)
+                       VALUES (?, 'mp3', 1, 16000, 10.0, ?)""",
+                    (file_name, transcription)
+                )
+                service._index_words(cursor, cursor.lastrowid, file_name, transcription)
+        print(f"\r  building {path.name}: {offset + len(records)}/{rows} rows", end="", file=sys.stderr)
+
+    cursor.execute("ANALYZE")
+    print(f"\n  built in {time.perf_counter() - started:.0f}s", file=sys.stderr)
+    return service
+
+
+async def time_queries(search, queries: list):
+    latencies, matches = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results = await search(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+        matches.append(len(results))
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], statistics.mean(matches)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Latency of fuzzy (trigram) search versus LIKE search by table size")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--data-dir", default="benchmarks/data", help="Databases are kept here and reused between runs")
+    parser.add_argument("--skip-like", action="store_true", help="Only time the fuzzy search")
+    args = parser.parse_args()
+
+    vocabulary = make_vocabulary(args.vocabulary)
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    # Misspelled words of the 2000 most frequent ones, so every query has real matches, and some two word queries
+    random.seed(11)
+    queries = [misspell(random.choice(vocabulary[:2000])) for _ in range(args.queries)]
+    queries += [f"{misspell(random.choice(vocabulary[:2000]))} {misspell(random.choice(vocabulary[:2000]))}" for _ in range(args.queries // 5)]
+
+    print(f"{'rows':>10} {'search':<8} {'p50 (ms)':>10} {'p95 (ms)':>10} {'avg results':>12}")
+    for rows in args.rows:
+        service = build_database(Path(args.data_dir).resolve() / f"fuzzy_{rows}.db", rows, vocabulary)
+
+        fuzzy = await time_queries(lambda query: service.fuzzy_search_transcriptions(query, threshold=args.threshold), queries)
+        print(f"{rows:>10} {'fuzzy':<8} {fuzzy[0]:>10.1f} {fuzzy[1]:>10.1f} {fuzzy[2]:>12.1f}")
+        if not args.skip_like:
+            like = await time_queries(service.search_transcriptions, queries[:10])
+            print(f"{rows:>10} {'like':<8} {like[0]:>10.1f} {like[1]:>10.1f} {like[2]:>12.1f}")
+        service.db.conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Benchmark of JSON serialization and compression for large /data responses.
+
+Compares, for a synthetic listing of N transcription records:
+1) Serialization time: FastAPI's default (jsonable_encoder + stdlib json) versus orjson
+2) Payload size: raw, gzip and brotli (if installed), together with the compression time
+
+Usage (from backend/stt, with the virtual environment activated):
+    python benchmarks/bench_serialization.py --rows 10000 50000
+"""
+
+import sys
+import gzip
+import json
+import time
+import random
+import string
+import argparse
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+WORDS = ["help", "me", "can't", "find", "my", "parents", "they", "told", "to", "wait", "for", "them",
+         "but", "i", "saw", "this", "pretty", "butterfly", "and", "followed", "it", "now", "am", "lost"]
+
+
+def make_rows(count: int):
+    random.seed(42)
+    return {
+        "record": count,
+        "data": [
+            {
+                "id": index,
+                "file_name": "".join(random.choices(string.ascii_lowercase, k=12)) + ".mp3",
+                "audio_format": random.choice(["mp3", "wav", "flac"]),
+                "channel": random.choice([1, 2]),
+                "sample_rate": random.choice([16000, 44100, 48000]),
+                "duration": round(random.uniform(1, 600), 3),
+                "transcription": " ".join(random.choices(WORDS, k=random.randint(10, 120))),
+                "created_at": f"2024-11-{random.randint(1, 30):02d} 18:05:41",
+                "audio_sha256": None,
+                "pcm_sha256": None
+            }
+            for index in range(count)
+        ]
+    }
+
+
+def timed(function, repeat: int):
+    """Best of `repeat` runs in milliseconds, together with the last result"""
+
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization time and payload size of large listings")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for count in args.rows:
+        payload = make_rows(count)
+
+        default_ms, _ = timed(
+            lambda: json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            args.repeat
+        )
+        orjson_ms, body = timed(lambda: orjson.dumps(payload), args.repeat)
+        gzip_ms, gzip_body = timed(lambda: gzip.compress(body, compresslevel=5), args.repeat)
+
+        print(f"\n{count} rows")
+        print(f"  {'serializer':<32} {'time (ms)':>10}")
+        print(f"  {'jsonable_encoder + json':<32} {default_ms:>10.1f}")
+        print(f"  {'orjson':<32} {orjson_ms:>10.1f}   ({default_ms / orjson_ms:.1f}x faster)")
+        print(f"  {'encoding':<32} {'size (KB)':>10} {'time (ms)':>10}")
+        print(f"  {'identity':<32} {len(body) / 1024:>10.1f} {0:>10.1f}")
+        print(f"  {'gzip (level 5)':<32} {len(gzip_body) / 1024:>10.1f} {gzip_ms:>10.1f}")
+        if brotli is not None:
+            br_ms, br_body = timed(lambda: brotli.compress(body, quality=4), args.repeat)
+            print(f"  {'brotli (quality 4)':<32} {len(br_body) / 1024:>10.1f} {br_ms:>10.1f}")
+        else:
+            print("  brotli not installed, skipped", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
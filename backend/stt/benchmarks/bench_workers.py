@@ -0,0 +1,152 @@
+"""
+Benchmark of memory and throughput versus worker count for the multi-worker deployment modes.
+
+For every worker count, the script starts gunicorn from the app directory, waits for /health,
+then measures:
+1) RSS: resident memory summed over master + workers (counts shared pages once per process)
+2) PSS: proportional set size summed over master + workers (shared copy-on-write pages are split between processes),
+   this is the number that shows the benefit of preloading
+3) Throughput: requests per second against the target endpoint using a pool of client threads
+
+Usage (from backend/stt, with the virtual environment activated):
+    python benchmarks/bench_workers.py --workers 1 2 4 8
+    python benchmarks/bench_workers.py --workers 1 2 4 --no-preload   # baseline, model loaded in every worker
+
+Linux only (reads /proc/<pid>/status and /proc/<pid>/smaps_rollup).
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+
+
+def read_memory_kb(pid: int):
+    """Return (rss_kb, pss_kb) for a single process"""
+
+    rss = pss = 0
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1])
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    pss = int(line.split()[1])
+    except FileNotFoundError:
+        pss = rss
+    return rss, pss
+
+
+def process_tree(pid: int):
+    """Master pid plus its direct children (gunicorn workers)"""
+
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    for tid in os.listdir(task_dir):
+        with open(f"{task_dir}/{tid}/children") as f:
+            children.extend(int(child) for child in f.read().split())
+    return [pid] + children
+
+
+def wait_for_health(url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except Exception:
+            time.sleep(0.5)
+    return False
+
+
+def drive_load(url: str, duration: float, concurrency: int):
+    """Send GET requests from `concurrency` threads for `duration` seconds, return (requests, errors)"""
+
+    deadline = time.monotonic() + duration
+
+    def client():
+        done = errors = 0
+        while time.monotonic() < deadline:
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    response.read()
+                done += 1
+            except Exception:
+                errors += 1
+        return done, errors
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: client(), range(concurrency)))
+
+    return sum(r[0] for r in results), sum(r[1] for r in results)
+
+
+def run(worker_count: int, args):
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(worker_count),
+        PORT=str(args.port),
+        GUNICORN_PRELOAD="0" if args.no_preload else "1"
+    )
+    command = [sys.executable, "-m", "gunicorn", "main:app", "-c", "gunicorn.conf.py"]
+
+    server = subprocess.Popen(command, cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        if not wait_for_health(base_url, timeout=args.startup_timeout):
+            raise RuntimeError(f"Server with {worker_count} worker(s) did not become healthy")
+
+        # Let every worker finish its startup (VAD service, SQLite connection, warm-up)
+        time.sleep(args.settle)
+
+        rss_total = pss_total = 0
+        for pid in process_tree(server.pid):
+            rss, pss = read_memory_kb(pid)
+            rss_total += rss
+            pss_total += pss
+
+        requests_done, errors = drive_load(f"{base_url}{args.path}", args.duration, args.concurrency)
+
+        return {
+            "workers": worker_count,
+            "rss_mb": rss_total / 1024,
+            "pss_mb": pss_total / 1024,
+            "rps": requests_done / args.duration,
+            "errors": errors
+        }
+
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS/PSS and throughput versus gunicorn worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--no-preload", action="store_true", help="Disable preload_app to measure the baseline")
+    parser.add_argument("--path", default="/data/transcriptions", help="Endpoint used for the throughput measurement")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load per worker count")
+    parser.add_argument("--concurrency", type=int, default=16, help="Number of client threads")
+    parser.add_argument("--port", type=int, default=8021)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--settle", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} | {'RSS (MB)':>9} | {'PSS (MB)':>9} | {'req/s':>8} | {'errors':>6}")
+    print("-" * 52)
+    for worker_count in args.workers:
+        result = run(worker_count, args)
+        print(f"{result['workers']:>7} | {result['rss_mb']:>9.1f} | {result['pss_mb']:>9.1f} | {result['rps']:>8.1f} | {result['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()